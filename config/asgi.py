@@ -2,5 +2,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Read by settings: no per-thread persistent DB connections under ASGI.
+os.environ['DJANGO_ASGI'] = '1'
+# Serve the public menu/health reads through core.async_views under ASGI.
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -1,17 +1,18 @@
-import logging
 import os
+import tempfile
 from pathlib import Path
 
-import dj_database_url
-import sentry_sdk
+from corsheaders.defaults import default_headers
 from django.core.management.utils import get_random_secret_key
-from dotenv import load_dotenv
-from sentry_sdk.integrations.django import DjangoIntegration
-from sentry_sdk.integrations.logging import LoggingIntegration
+
+# Heavy optional dependencies (dotenv, dj_database_url, sentry_sdk) are
+# imported only when used; `manage.py startup_profile` shows the effect.
 
 # Load environment variables from .env unless explicitly skipped
 BASE_DIR = Path(__file__).resolve().parent.parent
-if os.getenv('DJANGO_SKIP_DOTENV', '').lower() not in {'1', 'true', 'yes'}:
+if os.getenv('DJANGO_SKIP_DOTENV', '').lower() not in {'1', 'true', 'yes'} and (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+
     load_dotenv(BASE_DIR / '.env')
 
 
@@ -80,9 +81,11 @@ INSTALLED_APPS = [
     'miyanBeresht',
     'miyanMadi',
     'miyanGroup',
+    'sync',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -115,8 +118,37 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database ------------------------------------------------------------------
-DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+# Connection lifetime (core/connections.py), applied to every alias below:
+# ``request`` opens one connection per request, ``persistent`` keeps one per
+# worker thread for DB_CONN_MAX_AGE seconds, health-checked before reuse, and
+# ``pool`` (PostgreSQL only; others fall back to ``persistent``) shares
+# DB_POOL_SIZE connections per process, by default one per gunicorn thread.
+# Each connection's max age is cut by up to DB_CONN_MAX_AGE_JITTER of it.
+# Under ASGI (config/asgi.py sets DJANGO_ASGI) every request's sync code runs
+# in a thread of its own, so per-thread persistent connections would never be
+# reused and pile up until garbage collection; ``persistent`` becomes
+# ``request`` there, and ``pool`` needs an explicit DB_POOL_SIZE because
+# WEB_THREADS means nothing to uvicorn workers.
+SERVED_BY_ASGI = env_bool('DJANGO_ASGI', False)
+DB_CONNECTION_MODE = os.getenv('DB_CONNECTION_MODE', 'persistent').strip().lower()
+if DB_CONNECTION_MODE not in {'request', 'persistent', 'pool'}:
+    raise RuntimeError('DB_CONNECTION_MODE must be one of request, persistent or pool.')
+if SERVED_BY_ASGI and DB_CONNECTION_MODE == 'persistent':
+    DB_CONNECTION_MODE = 'request'
+if SERVED_BY_ASGI and DB_CONNECTION_MODE == 'pool' and not os.getenv('DB_POOL_SIZE'):
+    raise RuntimeError('DB_CONNECTION_MODE=pool under ASGI needs an explicit DB_POOL_SIZE.')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '300'))
+DB_CONN_MAX_AGE_JITTER = env_float('DB_CONN_MAX_AGE_JITTER', 0.2)
+DB_CONN_HEALTH_CHECKS = env_bool('DB_CONN_HEALTH_CHECKS', True)
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+WEB_THREADS = int(os.getenv('WEB_THREADS', '2'))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', str(WEB_THREADS)))
+DB_POOL_TIMEOUT = env_float('DB_POOL_TIMEOUT', 10.0)
+# Used by core.db.wait_for_db (``manage.py bootstrap``).
+DB_WAIT_TIMEOUT = int(os.getenv('DB_WAIT_TIMEOUT', '60'))
+DB_WAIT_INTERVAL = int(os.getenv('DB_WAIT_INTERVAL', '2'))
 DATABASE_URL = os.getenv('DATABASE_URL')
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
 POSTGRES_DB = os.getenv('POSTGRES_DB')
 POSTGRES_USER = os.getenv('POSTGRES_USER')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
@@ -138,10 +170,11 @@ if RUNNING_TESTS:
         }
     }
 elif DATABASE_URL:
+    import dj_database_url
+
     DATABASES = {
         'default': dj_database_url.parse(
             DATABASE_URL,
-            conn_max_age=DB_CONN_MAX_AGE,
             ssl_require=env_bool('DB_SSL_REQUIRE', False),
         )
     }
@@ -154,7 +187,6 @@ elif POSTGRES_DB or POSTGRES_USER or POSTGRES_PASSWORD:
             'PASSWORD': POSTGRES_PASSWORD or 'miyan_password',
             'HOST': POSTGRES_HOST,
             'PORT': POSTGRES_PORT,
-            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
         }
     }
 else:
@@ -165,6 +197,49 @@ else:
         }
     }
 
+# Read replica --------------------------------------------------------------
+# Optional. Safe-method requests to the public menu and catalog viewsets read
+# from it (core/replicas.py). A client that wrote stays on the primary for
+# REPLICA_PIN_SECONDS, and the replica is skipped while it lags more than
+# REPLICA_MAX_LAG_SECONDS. Any dj-database-url works, so two local SQLite
+# files or two local Postgres databases are enough to try it.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+REPLICA_PIN_COOKIE = os.getenv('REPLICA_PIN_COOKIE', 'db_pin')
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '10'))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', '5'))
+if DATABASE_REPLICA_URL and not RUNNING_TESTS:
+    import dj_database_url
+
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        ssl_require=env_bool('DB_SSL_REQUIRE', False),
+    )
+    # Test runs point the replica at the primary's test database.
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+    # Outside the session middleware so session writes pin the client too.
+    MIDDLEWARE.insert(MIDDLEWARE.index('core.middleware.MetricsMiddleware') + 1, 'core.middleware.ReplicaRoutingMiddleware')
+
+
+# Connection management -----------------------------------------------------
+def _manage_connections(database):
+    """Apply DB_CONNECTION_MODE and the shared connection options to one alias."""
+    database['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+    database['CONN_MAX_AGE_JITTER'] = DB_CONN_MAX_AGE_JITTER
+    database['CONN_MAX_AGE'] = 0 if DB_CONNECTION_MODE == 'request' else DB_CONN_MAX_AGE
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        return
+    database.setdefault('OPTIONS', {}).setdefault('connect_timeout', DB_CONNECT_TIMEOUT)
+    if DB_CONNECTION_MODE == 'pool':
+        # Django returns the connection after every request; the pool keeps it.
+        database['ENGINE'] = 'core.db_backends.postgresql_pool'
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = {'SIZE': DB_POOL_SIZE, 'TIMEOUT': DB_POOL_TIMEOUT, 'MAX_AGE': DB_CONN_MAX_AGE}
+
+
+for _database in DATABASES.values():
+    _manage_connections(_database)
+
 # When running inside Docker allow the common service hostnames so internal
 # requests from other containers (for example the telegram-bot calling
 # http://backend:8000) are accepted by Django's host header check.
@@ -172,6 +247,32 @@ if IN_DOCKER:
     _docker_hosts = ['backend', 'frontend', 'telegrambot', 'telegram-bot', 'db']
     ALLOWED_HOSTS = list(dict.fromkeys(ALLOWED_HOSTS + _docker_hosts))
 
+# Cache ---------------------------------------------------------------------
+# Backends are instrumented so hit ratios show up on /api/core/metrics/.
+# ``file`` shares entries between gunicorn workers; ``redis`` needs the
+# optional redis package and DJANGO_CACHE_LOCATION=redis://host:6379/0.
+CACHE_BACKEND = os.getenv('DJANGO_CACHE_BACKEND', 'locmem').lower()
+_cache_backends = {
+    'locmem': 'core.cache.InstrumentedLocMemCache',
+    'file': 'core.cache.InstrumentedFileBasedCache',
+    'redis': 'core.cache.InstrumentedRedisCache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backends.get(CACHE_BACKEND, _cache_backends['locmem']),
+        'LOCATION': os.getenv(
+            'DJANGO_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'miyan-cache') if CACHE_BACKEND == 'file' else '',
+        ),
+    }
+}
+
+# Async public views --------------------------------------------------------
+# config/asgi.py turns this on so anonymous menu and health reads are served
+# on the event loop (core/async_views.py); the WSGI deployment keeps DRF.
+ASYNC_PUBLIC_VIEWS = env_bool('DJANGO_ASYNC_VIEWS', False)
+MENU_CACHE_TIMEOUT = int(os.getenv('MENU_CACHE_TIMEOUT', '300'))
+
 # Password validation -------------------------------------------------------
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -194,6 +295,39 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Inventory reporting -------------------------------------------------------
+# Daily rollups bucket the ledger by the branches' local day, not TIME_ZONE.
+# Rows younger than the settle window are left for the next refresh so
+# transactions still in flight are not skipped by the high-water mark.
+INVENTORY_REPORT_TIME_ZONE = os.getenv('INVENTORY_REPORT_TIME_ZONE', 'Asia/Tehran')
+INVENTORY_ROLLUP_SETTLE_SECONDS = int(os.getenv('INVENTORY_ROLLUP_SETTLE_SECONDS', '60'))
+
+# Exports -------------------------------------------------------------------
+# Rows fetched per round trip by the streaming CSV/XLSX exports (core/exports.py).
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Idempotency ---------------------------------------------------------------
+# How long a stored Idempotency-Key response can be replayed (core/idempotency.py).
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', str(24 * 60 * 60)))
+
+# Sync feed -----------------------------------------------------------------
+# /api/sync/changes/ resends entries younger than the settle window so a
+# transaction that committed late is never skipped by a client's cursor.
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', '500'))
+SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', '30'))
+
+# Admin ---------------------------------------------------------------------
+# Unfiltered changelists of tables at least this big show the planner's row
+# estimate instead of running COUNT(*) (core/admin.py; PostgreSQL only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', '100000'))
+
+# Staff onboarding ----------------------------------------------------------
+# Bulk registration hashes passwords in a process pool of this many workers
+# (miyanGroup/onboarding.py); batches smaller than the minimum hash inline.
+STAFF_HASH_WORKERS = int(os.getenv('STAFF_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+STAFF_HASH_POOL_MIN_ROWS = int(os.getenv('STAFF_HASH_POOL_MIN_ROWS', '4'))
+STAFF_BULK_MAX_ROWS = int(os.getenv('STAFF_BULK_MAX_ROWS', '500'))
+
 # Static & media ------------------------------------------------------------
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -250,6 +384,8 @@ CORS_ALLOWED_ORIGINS = get_list_from_env(
 )
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # CSRF settings -------------------------------------------------------------
 CSRF_TRUSTED_ORIGINS = get_list_from_env(
@@ -321,19 +457,19 @@ SENTRY_ENVIRONMENT = os.getenv('SENTRY_ENVIRONMENT', 'development')
 SENTRY_TRACES_SAMPLE_RATE = env_float('SENTRY_TRACES_SAMPLE_RATE', 0.0)
 SENTRY_PROFILES_SAMPLE_RATE = env_float('SENTRY_PROFILES_SAMPLE_RATE', 0.0)
 
-if SENTRY_DSN:
-    sentry_sdk.init(
-        dsn=SENTRY_DSN,
-        environment=SENTRY_ENVIRONMENT,
-        release=APP_VERSION,
-        integrations=[
-            DjangoIntegration(),
-            LoggingIntegration(level=logging.INFO, event_level=logging.ERROR),
-        ],
-        traces_sample_rate=SENTRY_TRACES_SAMPLE_RATE,
-        profiles_sample_rate=SENTRY_PROFILES_SAMPLE_RATE,
-        send_default_pii=True,
-    )
+# The SDK is initialised by core.observability on the first request a worker
+# serves (or at startup with SENTRY_EAGER_INIT), not while loading settings.
+# Management commands such as bootstrap initialise it as soon as apps load.
+SENTRY_EAGER_INIT = env_bool('SENTRY_EAGER_INIT', False)
+
+# Built-in Prometheus metrics (see core/metrics.py). Every worker writes its
+# counters into METRICS_DIR, so all workers of a container must share it.
+METRICS_ENABLED = env_bool('METRICS_ENABLED', True)
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'miyan-metrics'))
+METRICS_FLUSH_INTERVAL = env_float('METRICS_FLUSH_INTERVAL', 1.0)
+# Scrapers authenticate with ``Authorization: Bearer <METRICS_TOKEN>``; without
+# it only staff users can read /api/core/metrics/.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 
 # Logging -------------------------------------------------------------------
 LOGGING = {
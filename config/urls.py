@@ -11,6 +11,7 @@ urlpatterns = [
     path('api/madi/', include('miyanMadi.urls')),
     path('api/group/', include('miyanGroup.urls')),
     path('api/inventory/', include('inventory.urls')),
+    path('api/sync/', include('sync.urls')),
 ]
 
 
@@ -1 +1,36 @@
-from django.contrib import admin
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .db import estimated_row_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use the planner's estimate instead of ``COUNT(*)`` for big unfiltered lists.
+
+    Filtered changelists (search, list filters, date drill-down) still count
+    exactly; those hit indexes and usually match far fewer rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """Changelist settings for append-heavy tables with millions of rows.
+
+    Pair with ``list_select_related`` for every relation ``list_display`` or
+    ``__str__`` touches, an indexed ``date_hierarchy`` field, and an ordering
+    that ends in a unique column so pages are stable.
+    """
+
+    paginator = EstimatedCountPaginator
+    # The "N total" link would run the full COUNT(*) the paginator avoids.
+    show_full_result_count = False
+    list_per_page = 50
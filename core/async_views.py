@@ -0,0 +1,158 @@
+"""Async fast paths for public read endpoints served under ASGI.
+
+Enabled by ``ASYNC_PUBLIC_VIEWS`` (``config/asgi.py`` turns it on). Anonymous
+GETs of the public menu actions and the healthcheck are answered on the event
+loop from the cache or the async ORM. Anything that needs authentication,
+content negotiation or a write goes to the regular DRF viewset in a worker
+thread, so the responses stay identical to the WSGI deployment.
+"""
+
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.utils import ProgrammingError
+from django.http import HttpResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.throttling import AnonRateThrottle
+
+from . import cache_versions
+from .menu_cache import payload_key, version_name
+from .views import HealthcheckView
+
+_renderer = JSONRenderer()
+
+
+# Helpers --------------------------------------------------------------------
+def _json_response(body: bytes, status: int = 200, headers: dict | None = None) -> HttpResponse:
+    response = HttpResponse(body, status=status, content_type='application/json', headers=headers)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def needs_sync_path(request) -> bool:
+    """True when a request depends on DRF auth, negotiation or write handling."""
+    return bool(
+        request.method != 'GET'
+        or request.GET
+        or 'HTTP_AUTHORIZATION' in request.META
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+        or 'text/html' in request.headers.get('Accept', '')
+    )
+
+
+def _throttle_key(throttle: AnonRateThrottle, request) -> str:
+    return throttle.cache_format % {'scope': throttle.scope, 'ident': throttle.get_ident(request)}
+
+
+def _throttle_history(throttle: AnonRateThrottle, history) -> tuple[list[float], float | None]:
+    """Trim ``history`` like SimpleRateThrottle; return it and the wait if throttled."""
+    now = throttle.timer()
+    history = [stamp for stamp in (history or []) if stamp > now - throttle.duration]
+    if len(history) >= throttle.num_requests:
+        return history, throttle.duration - (now - history[-1])
+    return [now, *history], None
+
+
+async def _call_sync_view(view, request):
+    def run():
+        response = view(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    return await sync_to_async(run)()
+
+
+# Views ----------------------------------------------------------------------
+async def _render_menu(viewset_class, spec, request) -> tuple[int, bytes]:
+    queryset = viewset_class.queryset.all()
+    if viewset_class.public_filter_field:
+        queryset = queryset.filter(**{viewset_class.public_filter_field: viewset_class.public_filter_value})
+    context = {'request': request}
+    serializer_class = viewset_class.serializer_class
+    try:
+        if spec.menu_type is None:
+            menus = [menu async for menu in queryset]
+            return 200, _renderer.render(serializer_class(menus, many=True, context=context).data)
+        menu = await queryset.filter(menu_type=spec.menu_type).afirst()
+        if menu is None and spec.fallback_first:
+            menu = await queryset.afirst()
+    except ProgrammingError:
+        # Same outcome as SafeQuerysetMixin: a missing table reads as "no menu".
+        menu = None
+        if spec.menu_type is None:
+            return 200, _renderer.render([])
+    if menu is None:
+        return 404, _renderer.render({'detail': getattr(viewset_class, spec.not_found_attr)})
+    return 200, _renderer.render(serializer_class(menu, context=context).data)
+
+
+def menu_action_view(viewset_class, action_name: str):
+    """Build an async view for one of ``viewset_class.public_menu_actions``."""
+    spec = viewset_class.public_menu_actions[action_name]
+    label = viewset_class.queryset.model._meta.app_label
+    sync_view = viewset_class.as_view({'get': action_name})
+    timeout = settings.MENU_CACHE_TIMEOUT
+
+    async def view(request, *args, **kwargs):
+        if needs_sync_path(request):
+            return await _call_sync_view(sync_view, request)
+
+        throttle = AnonRateThrottle()
+        throttle_key = _throttle_key(throttle, request) if throttle.rate else None
+        if throttle_key:
+            history, wait = _throttle_history(throttle, await cache.aget(throttle_key))
+            if wait is not None:
+                wait = max(0, int(wait + 1))
+                body = _renderer.render({'detail': f'Request was throttled. Expected available in {wait} seconds.'})
+                return _json_response(body, status=429, headers={'Retry-After': str(wait)})
+            await cache.aset(throttle_key, history, throttle.duration)
+
+        # One primary-key lookup; the version is shared by every worker.
+        version = await cache_versions.acurrent(version_name(label))
+        key = payload_key(label, version, action_name, request.build_absolute_uri('/'))
+        payload = await cache.aget(key)
+        if payload is None:
+            payload = await _render_menu(viewset_class, spec, request)
+            await cache.aset(key, payload, timeout)
+        status, body = payload
+        return _json_response(body, status=status)
+
+    # Keeps the metrics labels identical to the DRF action.
+    view.cls = viewset_class
+    view.actions = {'get': action_name}
+    view.csrf_exempt = True
+    return view
+
+
+def async_menu_urlpatterns(viewset_class, *, prefix: str, basename: str) -> list:
+    """URL patterns that shadow the router's public menu actions under ASGI."""
+    if not settings.ASYNC_PUBLIC_VIEWS:
+        return []
+    return [
+        path(f'{prefix}/{action_name}/', menu_action_view(viewset_class, action_name), name=f'{basename}-{action_name}')
+        for action_name in viewset_class.public_menu_actions
+    ]
+
+
+async def healthcheck(request):
+    """Async twin of ``core.views.HealthcheckView``."""
+    if needs_sync_path(request):
+        return await _call_sync_view(HealthcheckView.as_view(), request)
+    body = _renderer.render(
+        {
+            'status': 'ok',
+            'timestamp': timezone.now().isoformat(),
+            'version': settings.APP_VERSION,
+            'revision': settings.APP_COMMIT_SHA,
+        }
+    )
+    return _json_response(body)
+
+
+healthcheck.csrf_exempt = True
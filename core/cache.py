@@ -0,0 +1,37 @@
+"""Cache backends that report hit/miss counts to :mod:`core.metrics`."""
+
+from __future__ import annotations
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from . import metrics
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Count ``get`` hits and misses; the label is the cache's KEY_PREFIX."""
+
+    @property
+    def metrics_label(self) -> str:
+        return self.key_prefix or 'default'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        hit = value is not _MISSING
+        metrics.record_cache_lookup(self.metrics_label, hit)
+        return value if hit else default
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    """Requires the optional ``redis`` package (imported lazily by Django)."""
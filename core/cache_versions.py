@@ -0,0 +1,37 @@
+"""Database-backed versions for data memoized per process.
+
+A worker that memoizes something (the recipe graph, rendered menus) keeps it
+under the version it read first and re-reads the version on each use; one
+primary-key lookup tells it whether another worker changed the data since.
+:func:`bump` runs in the writer's transaction, so the new version becomes
+visible exactly when the change does and a rollback discards both. The row
+stays locked until commit, which serializes writers of the same name.
+"""
+
+from __future__ import annotations
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+def current(name: str) -> int:
+    """The committed (or, inside the writer's transaction, pending) version of ``name``."""
+    return CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+async def acurrent(name: str) -> int:
+    return await CacheVersion.objects.filter(name=name).values_list('version', flat=True).afirst() or 0
+
+
+def bump(name: str) -> None:
+    """Increment ``name`` in the current transaction."""
+    if CacheVersion.objects.filter(name=name).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            CacheVersion.objects.create(name=name, version=1)
+    except IntegrityError:
+        # Created by a concurrent first bump.
+        CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
@@ -0,0 +1,218 @@
+"""Database connection management for threaded workers.
+
+``DB_CONNECTION_MODE`` (see settings) decides how connections live:
+
+* ``request``: Django's default; every request opens and closes one.
+* ``persistent``: every worker thread keeps its connection for up to
+  ``DB_CONN_MAX_AGE`` seconds and health-checks it before reuse.
+* ``pool``: PostgreSQL only. ``core.db_backends.postgresql_pool`` hands out
+  connections from a per-process :class:`ConnectionPool` sized to the worker
+  thread count and takes them back when Django closes them.
+
+In both long-lived modes the maximum age is shortened by a random share of
+up to ``DB_CONN_MAX_AGE_JITTER`` per connection, so connections opened
+together by a fresh worker do not all expire, and reconnect, together.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import OperationalError
+
+from . import metrics
+
+
+class PoolTimeout(OperationalError):
+    """No pooled connection became free within the checkout timeout."""
+
+
+def jittered_max_age(max_age: float | None, jitter: float) -> float | None:
+    """``max_age`` shortened by a random share of at most ``jitter``."""
+    if not max_age or not jitter:
+        return max_age
+    return max_age * (1 - random.uniform(0, min(jitter, 1.0)))
+
+
+class ConnectionPool:
+    """A fixed-size, thread-safe pool of DB-API connections.
+
+    At most ``size`` connections are checked out at once; further callers
+    wait up to ``timeout`` seconds. Idle connections are reused newest first
+    and are discarded once past their (jittered) ``max_age``, when ``check``
+    says they are broken, or when ``reset`` cannot return them to a clean
+    state on checkin.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int,
+        timeout: float,
+        max_age: float | None = None,
+        jitter: float = 0.0,
+        check: Callable[[Any], bool] | None = None,
+        reset: Callable[[Any], None] | None = None,
+        alias: str = 'default',
+    ):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_age = max_age
+        self.jitter = jitter
+        self.check = check
+        self.reset = reset
+        self.alias = alias
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: deque[Any] = deque()
+        self._expires: dict[int, float | None] = {}
+        self._in_use = 0
+
+    def checkout(self, connect: Callable[[], Any]):
+        """Return an idle connection, or a new one from ``connect()``."""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            metrics.record_db_pool_timeout(self.alias)
+            raise PoolTimeout(f'No database connection available for {self.alias!r} within {self.timeout}s.')
+        metrics.record_db_pool_checkout(self.alias, time.monotonic() - started)
+        try:
+            connection = self._reuse()
+            if connection is None:
+                connection = connect()
+                age = jittered_max_age(self.max_age, self.jitter)
+                with self._lock:
+                    self._expires[id(connection)] = None if age is None else time.monotonic() + age
+                metrics.record_db_connection(self.alias, reused=False)
+            else:
+                metrics.record_db_connection(self.alias, reused=True)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        self._report()
+        return connection
+
+    def checkin(self, connection, *, reusable: bool = True) -> None:
+        """Take ``connection`` back; it is closed instead if it cannot be reused."""
+        try:
+            reusable = reusable and not self._expired(connection)
+            if reusable and self.reset is not None:
+                try:
+                    self.reset(connection)
+                except Exception:
+                    reusable = False
+            with self._lock:
+                self._in_use -= 1
+                if reusable:
+                    self._idle.append(connection)
+            if not reusable:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+        self._report()
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
+        self._report()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle), 'in_use': self._in_use}
+
+    def _reuse(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+            if self._expired(connection) or (self.check is not None and not self.check(connection)):
+                self._discard(connection)
+                continue
+            return connection
+
+    def _expired(self, connection) -> bool:
+        with self._lock:
+            expires_at = self._expires.get(id(connection))
+        return expires_at is not None and time.monotonic() >= expires_at
+
+    def _discard(self, connection) -> None:
+        with self._lock:
+            self._expires.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _report(self) -> None:
+        stats = self.stats()
+        metrics.record_db_pool_state(self.alias, idle=stats['idle'], in_use=stats['in_use'])
+
+
+# One pool per database alias and process; gunicorn forks after settings load.
+_pools: dict[str, ConnectionPool] = {}
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, settings_dict: dict, **kwargs) -> ConnectionPool:
+    """The process-wide pool for ``alias``, built from its ``POOL`` settings."""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Connections inherited from the parent must not be shared.
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(alias)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = _pools[alias] = ConnectionPool(
+                size=options.get('SIZE', 2),
+                timeout=options.get('TIMEOUT', 10),
+                max_age=options.get('MAX_AGE'),
+                jitter=settings_dict.get('CONN_MAX_AGE_JITTER', 0),
+                alias=alias,
+                **kwargs,
+            )
+        return pool
+
+
+# Persistent connections ------------------------------------------------------
+def jitter_close_at(sender, connection, **kwargs):
+    """Spread the expiry of persistent connections opened at the same time."""
+    if getattr(connection, 'pooled', False):
+        # Fired on every pool checkout; the pool does its own accounting.
+        return
+    metrics.record_db_connection(connection.alias, reused=False)
+    if connection.close_at is None:
+        return
+    max_age = connection.settings_dict['CONN_MAX_AGE']
+    jitter = connection.settings_dict.get('CONN_MAX_AGE_JITTER', 0)
+    connection.close_at -= max_age - jittered_max_age(max_age, jitter)
+
+
+def count_reused_connections(sender, **kwargs):
+    """Count persistent connections that survived into a new request.
+
+    Runs after Django's ``close_old_connections`` receiver, so whatever is
+    still open here is reused by this request.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None and not getattr(connection, 'pooled', False):
+            metrics.record_db_connection(connection.alias, reused=True)
+
+
+def install() -> None:
+    connection_created.connect(jitter_close_at, dispatch_uid='db-connection-jitter')
+    request_started.connect(count_reused_connections, dispatch_uid='db-connection-reuse')
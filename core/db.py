@@ -0,0 +1,50 @@
+"""Database helpers shared by management commands and the container entrypoint."""
+
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+
+
+def wait_for_db(alias: str = DEFAULT_DB_ALIAS, timeout: float | None = None, interval: float | None = None) -> int:
+    """Block until ``alias`` accepts connections; return the number of attempts.
+
+    Defaults come from ``DB_WAIT_TIMEOUT``/``DB_WAIT_INTERVAL``. Attempts go
+    through the alias's own wrapper, so they use the same backend and
+    ``DB_CONNECTION_MODE`` as requests, and PostgreSQL attempts give up after
+    ``DB_CONNECT_TIMEOUT`` instead of hanging on an unreachable host.
+    """
+    timeout = settings.DB_WAIT_TIMEOUT if timeout is None else timeout
+    interval = max(1, settings.DB_WAIT_INTERVAL if interval is None else interval)
+    deadline = time.monotonic() + timeout
+    conn = connections[alias]
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            conn.ensure_connection()
+            conn.close()
+            return attempts
+        except OperationalError as exc:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError('Database is unavailable') from exc
+            time.sleep(min(interval, remaining))
+
+
+def estimated_row_count(model, using: str = DEFAULT_DB_ALIAS) -> int | None:
+    """The planner's row estimate for ``model``'s table (PostgreSQL only).
+
+    Read from ``pg_class.reltuples``, which autovacuum keeps roughly current;
+    None on other databases or for a table that was never analyzed.
+    """
+    conn = connections[using]
+    if conn.vendor != 'postgresql':
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
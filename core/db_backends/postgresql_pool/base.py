@@ -0,0 +1,61 @@
+"""PostgreSQL backend that borrows connections from :mod:`core.connections`.
+
+Selected by ``DB_CONNECTION_MODE=pool``. Django still "opens" and "closes" a
+connection around every request (``CONN_MAX_AGE`` is 0), but opening checks
+one out of the process's pool and closing puts it back, so a request only
+pays for a TCP and authentication handshake when the pool has to grow.
+"""
+
+from __future__ import annotations
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.connections import get_pool
+
+
+def _is_usable(connection) -> bool:
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+def _reset(connection) -> None:
+    # Django closes connections mid-transaction after errors and in tests;
+    # the next borrower must start clean.
+    if connection.closed:
+        raise base.Database.InterfaceError('connection already closed')
+    if connection.info.transaction_status != base.Database.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pooled = True
+
+    @property
+    def pool(self):
+        return get_pool(
+            self.alias,
+            self.settings_dict,
+            check=_is_usable if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+            reset=_reset,
+        )
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.checkout(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Normally set while connecting; a reused connection skips that.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            # Closed inside atomic(), Django keeps referring to the connection
+            # until the outermost block exits, so it cannot go back yet.
+            self.pool.checkin(self.connection, reusable=not self.in_atomic_block)
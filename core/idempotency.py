@@ -0,0 +1,94 @@
+"""``Idempotency-Key`` support for write endpoints called over flaky links.
+
+A client sends the same key when it retries a write. The first request
+inserts an :class:`~core.models.IdempotencyKey` row, performs the write and
+stores the response, all in one transaction. A retry with the same key gets
+the stored response back instead of writing again.
+
+Concurrent duplicates need no locks: the second INSERT hits the unique
+constraint, which on PostgreSQL waits until the first transaction ends. If
+the first committed, the retry replays its response; if it rolled back, the
+retry's INSERT succeeds and it performs the write itself.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+def request_fingerprint(request) -> str:
+    payload = request.data
+    if hasattr(payload, 'lists'):
+        payload = {name: values for name, values in payload.lists()}
+    body = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def _claim(user, key: str, fingerprint: str) -> tuple[IdempotencyKey, IdempotencyKey | None]:
+    """Insert the key row; returns (row, None), or (existing row, existing row) for a replay."""
+    expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, request_hash=fingerprint, expires_at=expires_at), None
+    except IntegrityError:
+        existing = IdempotencyKey.objects.get(user=user, key=key)
+    if existing.expires_at > timezone.now():
+        return existing, existing
+    # Expired but not purged yet: reuse the row for this request.
+    existing.request_hash, existing.expires_at = fingerprint, expires_at
+    existing.status_code = existing.response_body = None
+    existing.save(update_fields=['request_hash', 'expires_at', 'status_code', 'response_body'])
+    return existing, None
+
+
+class IdempotencyMixin:
+    """Honour ``Idempotency-Key`` on ``create``; other actions opt in via :meth:`idempotent`."""
+
+    def create(self, request, *args, **kwargs):
+        return self.idempotent(request, super().create, *args, **kwargs)
+
+    def idempotent(self, request, handler, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or not request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise ValidationError({HEADER: 'Must be 1-255 characters.'})
+
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            record, stored = _claim(request.user, key, fingerprint)
+            if stored is not None:
+                if stored.request_hash != fingerprint:
+                    raise IdempotencyKeyReused()
+                return Response(stored.response_body, status=stored.status_code, headers={REPLAYED_HEADER: 'true'})
+
+            response = handler(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                record.status_code, record.response_body = response.status_code, response.data
+                record.save(update_fields=['status_code', 'response_body'])
+            else:
+                # Nothing was written; let a retry run the request again.
+                record.delete()
+        return response
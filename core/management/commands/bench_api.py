@@ -0,0 +1,508 @@
+"""Benchmark every public and staff API endpoint against a synthetic dataset.
+
+By default the command creates a throwaway test database, seeds it with a
+configurable amount of data, drives each endpoint through the Django test
+client and writes latency percentiles, query counts, allocated memory and
+response sizes as JSON. Pass ``--baseline`` to compare against an earlier run.
+``--use-current-db`` seeds the configured database instead and rolls every
+change back when the run ends.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-api'}}
+
+
+@dataclass
+class Endpoint:
+    name: str
+    url_name: str
+    role: str = 'anon'
+    method: str = 'get'
+    url_kwargs: Callable[['SyntheticDataset'], dict] | None = None
+    payload: Callable[['SyntheticDataset', int], dict] | None = None
+
+    def url(self, dataset: 'SyntheticDataset') -> str:
+        kwargs = self.url_kwargs(dataset) if self.url_kwargs else None
+        return reverse(self.url_name, kwargs=kwargs)
+
+
+ENDPOINTS: list[Endpoint] = [
+    # Public -------------------------------------------------------------
+    Endpoint('health', 'core-health'),
+    Endpoint('beresht.menu.list', 'beresht-menu-list'),
+    Endpoint('beresht.menu.main', 'beresht-menu-main'),
+    Endpoint('beresht.menu.today', 'beresht-menu-today'),
+    Endpoint('beresht.menu.all', 'beresht-menu-all'),
+    Endpoint('beresht.items.list', 'beresht-items-list'),
+    Endpoint('madi.menu.list', 'madi-menu-list'),
+    Endpoint('madi.menu.main', 'madi-menu-main'),
+    Endpoint('madi.menu.breakfast', 'madi-menu-breakfast'),
+    Endpoint('madi.items.list', 'madi-items-list'),
+    Endpoint('group.branches.list', 'branch-list'),
+    Endpoint('group.gallery.list', 'gallery-list'),
+    # Staff on an active shift --------------------------------------------
+    Endpoint('inventory.basic_items.list', 'basic-item-list', role='staff'),
+    Endpoint('inventory.recipes.list', 'recipe-list', role='staff'),
+    Endpoint('inventory.basic_stock.list', 'branch-basic-stock-list', role='staff'),
+    Endpoint('inventory.recipe_stock.list', 'branch-recipe-stock-list', role='staff'),
+    Endpoint(
+        'inventory.branches.snapshot',
+        'inventory-branch-snapshot',
+        role='staff',
+        url_kwargs=lambda data: {'pk': data.branch_ids[0]},
+    ),
+    Endpoint('inventory.adjustments.list', 'inventory-adjustment-list', role='staff'),
+    Endpoint(
+        'inventory.adjustments.create',
+        'inventory-adjustment-list',
+        role='staff',
+        method='post',
+        payload=lambda data, i: {
+            'item_type': 'basic',
+            'basic_item': data.basic_item_ids[i % len(data.basic_item_ids)],
+            'mode': 'delta',
+            'quantity': '1',
+        },
+    ),
+    Endpoint(
+        'inventory.adjustments.batch',
+        'inventory-adjustment-batch',
+        role='staff',
+        method='post',
+        payload=lambda data, i: {
+            'lines': [
+                {'item_type': 'basic', 'basic_item': item_id, 'mode': 'delta', 'quantity': '1'}
+                for item_id in data.basic_item_ids[:60]
+            ],
+        },
+    ),
+    Endpoint(
+        'inventory.consumptions.create',
+        'recipe-consumption-list',
+        role='staff',
+        method='post',
+        payload=lambda data, i: {
+            'lines': [{'recipe': recipe_id, 'quantity': '1'} for recipe_id in data.recipe_ids[:20]],
+        },
+    ),
+    Endpoint('group.staff.me', 'staff-me', role='staff'),
+    Endpoint('group.shifts.current', 'shift-current', role='staff'),
+    Endpoint('group.inventory_items.list', 'inventory-item-list', role='staff'),
+    Endpoint('group.measurements.list', 'inventory-measurement-list', role='staff'),
+    Endpoint('group.inputs.list', 'inventory-input-list', role='staff'),
+    Endpoint('sync.changes', 'sync-changes', role='staff'),
+    # Admin ----------------------------------------------------------------
+    Endpoint('group.staff.list', 'staff-list', role='admin'),
+    Endpoint('group.assignments.list', 'staff-assignment-list', role='admin'),
+    Endpoint('group.shifts.roster', 'shift-roster', role='admin'),
+    Endpoint('group.shifts.timesheet', 'shift-timesheet', role='admin'),
+    Endpoint('inventory.reports.usage', 'stock-rollup-usage', role='admin'),
+    Endpoint(
+        'inventory.recipes.detail',
+        'recipe-detail',
+        role='admin',
+        url_kwargs=lambda data: {'pk': data.recipe_ids[0]},
+    ),
+]
+
+
+@dataclass
+class SyntheticDataset:
+    """Sizes of the generated dataset plus the ids the endpoints need."""
+
+    menus: int = 3
+    sections: int = 8
+    items: int = 10
+    branches: int = 3
+    basic_items: int = 200
+    recipes: int = 50
+    adjustments: int = 2000
+    measurements: int = 2000
+    shifts: int = 500
+    staff: int = 20
+    branch_ids: list[int] = field(default_factory=list)
+    basic_item_ids: list[int] = field(default_factory=list)
+    recipe_ids: list[int] = field(default_factory=list)
+    users: dict[str, Any] = field(default_factory=dict)
+
+    def describe(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in (
+                'menus', 'sections', 'items', 'branches', 'basic_items', 'recipes',
+                'adjustments', 'measurements', 'shifts', 'staff',
+            )
+        }
+
+    def seed(self):
+        from inventory import models as inventory_models
+        from miyanBeresht.models import BereshtMenu, BereshtMenuItem, BereshtMenuSection
+        from miyanGroup import models as group_models
+        from miyanMadi.models import MadiMenu, MadiMenuItem, MadiMenuSection
+
+        for menu_model, section_model, item_model, prefix in (
+            (BereshtMenu, BereshtMenuSection, BereshtMenuItem, 'Beresht'),
+            (MadiMenu, MadiMenuSection, MadiMenuItem, 'Madi'),
+        ):
+            menu_types = ['main', 'today', 'breakfast']
+            menus = menu_model.objects.bulk_create(
+                menu_model(
+                    title_fa=f'{prefix} {index}',
+                    title_en=f'{prefix} menu {index}',
+                    menu_type=menu_types[index % len(menu_types)],
+                    display_order=index,
+                )
+                for index in range(self.menus)
+            )
+            sections = section_model.objects.bulk_create(
+                section_model(
+                    menu=menu,
+                    title_fa=f'بخش {index}',
+                    title_en=f'Section {index}',
+                    display_order=index,
+                    is_main_section=index % 4 != 3,
+                )
+                for menu in menus
+                for index in range(self.sections)
+            )
+            item_model.objects.bulk_create(
+                item_model(
+                    section=section,
+                    name_fa=f'آیتم {index}',
+                    name_en=f'Item {section.pk}-{index}',
+                    description_fa='توضیحات',
+                    description_en='Description',
+                    price_fa=str(100 + index),
+                    price_en=str(100 + index),
+                    display_order=index,
+                )
+                for section in sections
+                for index in range(self.items)
+            )
+
+        branches = list(group_models.Branch.objects.all()[: self.branches])
+        branches += group_models.Branch.objects.bulk_create(
+            group_models.Branch(name=f'Bench branch {index}', code=f'bench-{index}')
+            for index in range(max(0, self.branches - len(branches)))
+        )
+
+        basic_items = inventory_models.BasicItem.objects.bulk_create(
+            inventory_models.BasicItem(
+                name=f'Bench item {index}',
+                unit='kg',
+                unit_price=Decimal(1000 + index),
+            )
+            for index in range(self.basic_items)
+        )
+        recipes = inventory_models.Recipe.objects.bulk_create(
+            inventory_models.Recipe(name=f'Bench recipe {index}', price=Decimal(5000 + index))
+            for index in range(self.recipes)
+        )
+        inventory_models.RecipeIngredient.objects.bulk_create(
+            inventory_models.RecipeIngredient(
+                recipe=recipe,
+                basic_item=basic_items[(recipe_index * 5 + offset) % len(basic_items)],
+                amount=Decimal('0.250'),
+            )
+            for recipe_index, recipe in enumerate(recipes)
+            for offset in range(min(5, len(basic_items)))
+        )
+        inventory_models.BranchBasicItemStock.objects.bulk_create(
+            inventory_models.BranchBasicItemStock(branch=branch, item=item, quantity=Decimal('1000'))
+            for branch in branches
+            for item in basic_items
+        )
+        inventory_models.BranchRecipeStock.objects.bulk_create(
+            inventory_models.BranchRecipeStock(branch=branch, recipe=recipe, quantity=Decimal('50'))
+            for branch in branches
+            for recipe in recipes
+        )
+        self.branch_ids = [branch.pk for branch in branches]
+        self.basic_item_ids = [item.pk for item in basic_items]
+        self.recipe_ids = [recipe.pk for recipe in recipes]
+
+        # Bench accounts may already exist when seeding into the configured
+        # database, so they are reused rather than created again.
+        User = get_user_model()
+        admin, _ = User.objects.get_or_create(
+            username='bench-admin',
+            defaults={'email': 'bench@example.com', 'is_staff': True, 'is_superuser': True, 'password': '!'},
+        )
+        usernames = ['bench-staff', *(f'bench-staff-{index}' for index in range(self.staff))]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        User.objects.bulk_create(User(username=name, password='!') for name in usernames if name not in existing)
+        users = sorted(User.objects.filter(username__in=usernames), key=lambda user: usernames.index(user.username))
+        worker = users[0]
+        with_profile = set(group_models.Staff.objects.filter(user__in=users).values_list('user_id', flat=True))
+        group_models.Staff.objects.bulk_create(
+            group_models.Staff(user=user) for user in users if user.pk not in with_profile
+        )
+        staff_members = sorted(
+            group_models.Staff.objects.filter(user__in=users).select_related('user'),
+            key=lambda staff: usernames.index(staff.user.username),
+        )
+        group_models.StaffBranchAssignment.objects.bulk_create(
+            (
+                group_models.StaffBranchAssignment(
+                    staff=staff, branch=branches[index % len(branches)], is_primary=True
+                )
+                for index, staff in enumerate(staff_members)
+            ),
+            ignore_conflicts=True,
+        )
+        now = timezone.now()
+        shifts = group_models.StaffShift.objects.bulk_create(
+            group_models.StaffShift(
+                staff=staff_members[index % len(staff_members)],
+                branch=branches[index % len(branches)],
+            )
+            for index in range(self.shifts)
+        )
+        for index, shift in enumerate(shifts):
+            shift.started_at = now - timedelta(hours=8 * (index + 1))
+            shift.ended_at = shift.started_at + timedelta(hours=7)
+        group_models.StaffShift.objects.bulk_update(shifts, ['started_at', 'ended_at'])
+        group_models.StaffShift.objects.create(staff=staff_members[0], branch=branches[0])
+
+        inventory_models.InventoryAdjustment.objects.bulk_create(
+            inventory_models.InventoryAdjustment(
+                branch=branches[index % len(branches)],
+                item_type='basic',
+                basic_item=basic_items[index % len(basic_items)],
+                mode='delta',
+                quantity=Decimal('1'),
+                stock_before=Decimal('999'),
+                stock_after=Decimal('1000'),
+                recorded_by=staff_members[index % len(staff_members)],
+            )
+            for index in range(self.adjustments)
+        )
+        inventory_items = group_models.InventoryItem.objects.bulk_create(
+            group_models.InventoryItem(branch=branch, name=f'Bench stock {index}', unit='kg')
+            for branch in branches
+            for index in range(20)
+        )
+        group_models.InventoryMeasurement.objects.bulk_create(
+            group_models.InventoryMeasurement(
+                branch=inventory_items[index % len(inventory_items)].branch,
+                item=inventory_items[index % len(inventory_items)],
+                quantity=Decimal('3'),
+                recorded_by=staff_members[index % len(staff_members)],
+            )
+            for index in range(self.measurements)
+        )
+        group_models.InventoryInput.objects.bulk_create(
+            group_models.InventoryInput(
+                branch=inventory_items[index % len(inventory_items)].branch,
+                item=inventory_items[index % len(inventory_items)],
+                quantity=Decimal('2'),
+                recorded_by=staff_members[index % len(staff_members)],
+            )
+            for index in range(self.measurements)
+        )
+        self.users = {'admin': admin, 'staff': worker}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile; ``samples`` need not be sorted."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms"
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Benchmark the API against a synthetic dataset and write the results as JSON."
+
+    def add_arguments(self, parser):
+        defaults = SyntheticDataset()
+        for name, value in defaults.describe().items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}',
+                type=int,
+                default=value,
+                help=f'Synthetic {name.replace("_", " ")} to seed (default: {value}).',
+            )
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint.')
+        parser.add_argument('--only', action='append', default=[], help='Run only endpoints with this name prefix.')
+        parser.add_argument('--output', type=str, default='bench_output.json', help='Where to write the JSON results.')
+        parser.add_argument('--baseline', type=str, help='Earlier results to compare against.')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed relative p95 slowdown before a regression is reported (default: 0.2).',
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when the baseline comparison finds regressions.',
+        )
+        parser.add_argument(
+            '--use-current-db',
+            action='store_true',
+            help='Seed into the configured database inside a transaction that is rolled back afterwards.',
+        )
+
+    def handle(self, *args, **options):
+        dataset = SyntheticDataset(
+            **{name: options[name] for name in SyntheticDataset().describe()}
+        )
+        if options['use_current_db']:
+            # Everything the run seeds or writes is rolled back at the end, and
+            # a private cache keeps the rolled-back rows out of the shared one.
+            with override_settings(CACHES=BENCH_CACHES), transaction.atomic():
+                results = self._run(dataset, options)
+                transaction.set_rollback(True)
+        else:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = self._run(dataset, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = Path(options['output'])
+        output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(results["endpoints"])} results to {output}'))
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            regressions = compare_to_baseline(results, baseline, options['threshold'])
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(f'regression: {line}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) against the baseline.')
+
+    def _run(self, dataset: SyntheticDataset, options) -> dict:
+        started = time.perf_counter()
+        dataset.seed()
+        seed_seconds = time.perf_counter() - started
+        self.stdout.write(f'Seeded synthetic dataset in {seed_seconds:.2f}s')
+
+        clients = {'anon': Client()}
+        for role in ('staff', 'admin'):
+            clients[role] = Client()
+            clients[role].force_login(dataset.users[role])
+
+        endpoints = [
+            endpoint
+            for endpoint in ENDPOINTS
+            if not options['only'] or any(endpoint.name.startswith(prefix) for prefix in options['only'])
+        ]
+        results = {}
+        # Throttling and the SSL redirect would otherwise dominate the numbers,
+        # and metrics are disabled so a benchmark never pollutes a live store.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            SECURE_SSL_REDIRECT=False,
+            METRICS_ENABLED=False,
+        ), mock.patch('rest_framework.views.APIView.get_throttles', lambda self: []):
+            for endpoint in endpoints:
+                results[endpoint.name] = self._bench_endpoint(
+                    endpoint, clients[endpoint.role], dataset, options
+                )
+                self.stdout.write(
+                    f"{endpoint.name:<40} p50={results[endpoint.name]['p50_ms']:8.2f}ms "
+                    f"p95={results[endpoint.name]['p95_ms']:8.2f}ms "
+                    f"queries={results[endpoint.name]['queries']:<4} "
+                    f"bytes={results[endpoint.name]['response_bytes']}"
+                )
+
+        return {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'version': settings.APP_VERSION,
+                'revision': settings.APP_COMMIT_SHA,
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'seed_seconds': round(seed_seconds, 3),
+                'dataset': dataset.describe(),
+            },
+            'endpoints': results,
+        }
+
+    def _bench_endpoint(self, endpoint: Endpoint, client: Client, dataset: SyntheticDataset, options) -> dict:
+        url = endpoint.url(dataset)
+        counter = itertools.count()
+
+        def call():
+            request = getattr(client, endpoint.method)
+            if endpoint.payload is None:
+                return request(url)
+            return request(url, data=endpoint.payload(dataset, next(counter)), content_type='application/json')
+
+        for _ in range(options['warmup']):
+            call()
+
+        timings = []
+        for _ in range(options['iterations']):
+            start = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        # Queries and allocations are measured on a separate request so the
+        # tracing overhead never leaks into the latency samples.
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'method': endpoint.method.upper(),
+            'path': url,
+            'role': endpoint.role,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3) if timings else 0.0,
+            'queries': len(queries),
+            'peak_alloc_kb': round(peak / 1024, 1),
+            'response_bytes': len(response.content),
+        }
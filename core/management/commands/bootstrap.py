@@ -0,0 +1,169 @@
+"""Prepare a container for serving in a single Python process.
+
+Replaces the separate ``wait_for_db``/``makemigrations``/``migrate``/seed/
+``collectstatic`` invocations of the entrypoint, each of which paid the full
+``django.setup()`` cost. Every phase first checks whether it has anything to
+do and the command finishes with a per-phase timing report.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db import wait_for_db
+
+STATIC_HASH_FILE = '.bootstrap_static_hash'
+STATIC_SENTINEL = '.static_collected'
+
+
+def project_apps() -> list[str]:
+    """Labels of the installed apps that live in this repository."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    return [
+        config.label
+        for config in apps.get_app_configs()
+        if Path(config.path).resolve().is_relative_to(base_dir)
+    ]
+
+
+def pending_migrations(alias: str = DEFAULT_DB_ALIAS) -> list[str]:
+    """Return ``app.migration`` names that are not applied yet."""
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [f'{migration.app_label}.{migration.name}' for migration, _ in plan]
+
+
+def detect_model_changes(app_labels: list[str]) -> dict:
+    """Run the makemigrations autodetector without writing anything."""
+    from django.db.migrations.autodetector import MigrationAutodetector
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.questioner import NonInteractiveMigrationQuestioner
+    from django.db.migrations.state import ProjectState
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    autodetector = MigrationAutodetector(
+        loader.project_state(),
+        ProjectState.from_apps(apps),
+        NonInteractiveMigrationQuestioner(specified_apps=set(app_labels), dry_run=True),
+    )
+    labels = set(app_labels)
+    # convert_apps lets apps without a migrations package get an initial one.
+    return autodetector.changes(graph=loader.graph, trim_to_apps=labels, convert_apps=labels)
+
+
+def static_sources_hash() -> str:
+    """Hash the path, size and mtime of every file collectstatic would copy."""
+    from django.contrib.staticfiles.finders import get_finders
+
+    digest = hashlib.sha256()
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list([]):
+            stat = Path(storage.path(path)).stat()
+            entries.append(f'{path}\0{stat.st_size}\0{int(stat.st_mtime)}')
+    for entry in sorted(entries):
+        digest.update(entry.encode('utf-8'))
+        digest.update(b'\n')
+    digest.update(settings.STORAGES['staticfiles']['BACKEND'].encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = "Wait for the database, migrate, seed and collect static files in one process."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-wait', action='store_true', help='Do not wait for the database.')
+        parser.add_argument(
+            '--skip-makemigrations',
+            action='store_true',
+            help='Never generate migrations at runtime, even when models changed.',
+        )
+        parser.add_argument('--skip-migrate', action='store_true', help='Do not apply migrations.')
+        parser.add_argument('--skip-seed', action='store_true', help='Do not run the curated seed commands.')
+        parser.add_argument('--skip-collectstatic', action='store_true', help='Do not collect static files.')
+
+    def handle(self, *args, **options):
+        self.timings: list[tuple[str, float, str]] = []
+        self.verbosity = max(0, options['verbosity'] - 1)
+        started = time.perf_counter()
+
+        self._phase('wait_for_db', options['skip_wait'], self._wait_for_db)
+        self._phase('makemigrations', options['skip_makemigrations'], self._makemigrations)
+        self._phase('migrate', options['skip_migrate'], self._migrate)
+        self._phase('seed_items', options['skip_seed'], self._seed_items)
+        self._phase('seed_inventory_items', options['skip_seed'], self._seed_inventory_items)
+        self._phase('collectstatic', options['skip_collectstatic'], self._collectstatic)
+
+        self.stdout.write('')
+        for name, seconds, status in self.timings:
+            self.stdout.write(f'{name:<22} {seconds * 1000:9.1f} ms  {status}')
+        total = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{'bootstrap':<22} {total * 1000:9.1f} ms  done"))
+
+    def _phase(self, name: str, skip: bool, func):
+        if skip:
+            self.timings.append((name, 0.0, 'skipped (flag)'))
+            return
+        self.stdout.write(f'[bootstrap] {name}...')
+        start = time.perf_counter()
+        try:
+            status = func() or 'ran'
+        except CommandError:
+            raise
+        except Exception as exc:
+            if name.startswith('seed'):
+                # Seeding is best effort, like the `|| true` it replaces.
+                self.stderr.write(self.style.WARNING(f'[bootstrap] {name} failed: {exc}'))
+                status = 'failed (ignored)'
+            else:
+                raise CommandError(f'{name} failed: {exc}') from exc
+        self.timings.append((name, time.perf_counter() - start, status))
+
+    # Phases -----------------------------------------------------------------
+    def _wait_for_db(self):
+        attempts = wait_for_db()
+        return f'ready after {attempts} attempt(s)'
+
+    def _makemigrations(self):
+        changes = detect_model_changes(project_apps())
+        if not changes:
+            return 'skipped (models match migrations)'
+        call_command('makemigrations', *sorted(changes), interactive=False, verbosity=self.verbosity)
+        return f"generated for {', '.join(sorted(changes))}"
+
+    def _migrate(self):
+        pending = pending_migrations()
+        if not pending:
+            return 'skipped (up to date)'
+        call_command('migrate', interactive=False, verbosity=self.verbosity)
+        return f'applied {len(pending)} migration(s)'
+
+    def _seed_items(self):
+        call_command('seed_items', with_inventory=True, verbosity=self.verbosity, stdout=self.stdout)
+
+    def _seed_inventory_items(self):
+        call_command('seed_inventory_items', verbosity=self.verbosity, stdout=self.stdout)
+
+    def _collectstatic(self):
+        static_root = Path(settings.STATIC_ROOT)
+        hash_path = static_root / STATIC_HASH_FILE
+        current = static_sources_hash()
+        if hash_path.exists() and hash_path.read_text().strip() == current:
+            return 'skipped (manifest hash matches)'
+
+        static_root.mkdir(parents=True, exist_ok=True)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        hash_path.write_text(current)
+        # Lets config.wsgi._auto_collect_static() return immediately in workers.
+        (static_root / STATIC_SENTINEL).write_text('collected')
+        return 'collected'
@@ -1,9 +1,319 @@
-import os
+import hashlib
+import json
 
-from django.core.files import File
 from django.core.management.base import BaseCommand, CommandError
 from django.db import connection, transaction
 
+from core.menu_cache import invalidate_menu_cache
+
+MAIN_MENU_SECTIONS = [
+    {
+        'title_fa': 'بر پایه اسپرسو - سیاه',
+        'title_en': 'Espresso Based - Black',
+        'items': [
+            {'name_fa': 'اسپرسو کامرشیال', 'name_en': 'Espresso (Commercial)', 'price_fa': '145'},
+            {'name_fa': 'اسپرسو پرمیوم', 'name_en': 'Espresso (Premium)', 'price_fa': '190'},
+            {'name_fa': 'آمریکانو کامرشیال', 'name_en': 'Americano (Commercial)', 'price_fa': '150'},
+            {'name_fa': 'آمریکانو پرمیوم', 'name_en': 'Americano (Premium)', 'price_fa': '195'},
+            {
+                'name_fa': 'قهوه روز',
+                'name_en': 'Coffee of the Day',
+                'price_fa': '125',
+                'description_fa': '[شارژ رایگان]',
+                'description_en': '[free refill]',
+            },
+        ],
+    },
+    {
+        'title_fa': 'بر پایه اسپرسو - سفید',
+        'title_en': 'Espresso Based - White',
+        'items': [
+            {'name_fa': 'اسپرسو ماکیاتو', 'name_en': 'Espresso Macchiato', 'price_fa': '160'},
+            {'name_fa': 'کورتادو', 'name_en': 'Cortado', 'price_fa': '175'},
+            {'name_fa': 'کاپوچینو', 'name_en': 'Cappuccino', 'price_fa': '185'},
+            {
+                'name_fa': 'لاته',
+                'name_en': 'Latte',
+                'price_fa': '195',
+                'description_fa': '[سرد / گرم]',
+                'description_en': '[iced / hot]',
+            },
+            {
+                'name_fa': 'موکا',
+                'name_en': 'Mocha',
+                'price_fa': '210',
+                'description_fa': '[سرد / گرم]',
+                'description_en': '[iced / hot]',
+            },
+            {'name_fa': 'لاته تیرامیسو', 'name_en': 'Tiramisu Latte', 'price_fa': '280'},
+        ],
+    },
+    {
+        'title_fa': 'افزودنی‌ها',
+        'title_en': 'Add-ons',
+        'is_main_section': False,
+        'items': [
+            {'name_fa': 'عسل', 'name_en': 'Honey', 'price_fa': '+30'},
+            {'name_fa': 'دی کف', 'name_en': 'Decaf', 'price_fa': '+30'},
+            {'name_fa': 'شیر گیاهی', 'name_en': 'Plant-based Milk', 'price_fa': '+75'},
+            {'name_fa': 'سیروپ', 'name_en': 'Syrup', 'price_fa': '+30'},
+            {'name_fa': 'خامه', 'name_en': 'Cream', 'price_fa': '+50'},
+        ],
+    },
+    {
+        'title_fa': 'چای و دمنوش',
+        'title_en': 'Tea & Infusions',
+        'items': [
+            {'name_fa': 'چای سیاه', 'name_en': 'Black Tea', 'price_fa': '110'},
+            {
+                'name_fa': 'ماچا',
+                'name_en': 'Matcha',
+                'price_fa': '210',
+                'description_fa': '[سرد / گرم]',
+                'description_en': '[iced / hot]',
+            },
+            {'name_fa': 'چای سیب و به', 'name_en': 'Apple & Quince Tea', 'price_fa': '135'},
+            {
+                'name_fa': 'چای سبز',
+                'name_en': 'Green Tea',
+                'price_fa': '135',
+                'description_fa': '[بابونه، دارچین، زنجبیل]',
+                'description_en': '[chamomile, cinnamon, ginger]',
+            },
+            {'name_fa': 'دمنوش رز، پنیرک، بابونه، سیب', 'name_en': 'Rose, Mallow, Chamomile, Apple', 'price_fa': '135'},
+            {'name_fa': 'دمنوش دارچین، میخک، زنجبیل', 'name_en': 'Cinnamon, Clove, Ginger', 'price_fa': '135'},
+        ],
+    },
+    {
+        'title_fa': 'فراتر',
+        'title_en': 'Beyond',
+        'items': [
+            {'name_fa': 'هات چاکلت', 'name_en': 'Hot Chocolate', 'price_fa': '270'},
+            {'name_fa': 'ماسالا', 'name_en': 'Masala', 'price_fa': '210'},
+            {
+                'name_fa': 'هات پینات',
+                'name_en': 'Hot Peanut',
+                'price_fa': '175',
+                'description_fa': '[شیر، دارچین، پینات]',
+                'description_en': '[milk, cinnamon, peanut]',
+            },
+            {
+                'name_fa': 'اسپیرولینا',
+                'name_en': 'Spirulina',
+                'price_fa': '210',
+                'description_fa': '[سرد / گرم]',
+                'description_en': '[iced / hot]',
+            },
+            {
+                'name_fa': 'بلوندی',
+                'name_en': 'Blondie',
+                'price_fa': '250',
+                'description_fa': '[شکلات سفید، آلبالو، شیر]',
+                'description_en': '[white chocolate, sour cherry, milk]',
+            },
+        ],
+    },
+    {
+        'title_fa': 'نوشیدنی‌های سرد',
+        'title_en': 'Cold Drinks',
+        'items': [
+            {'name_fa': 'کلد برو', 'name_en': 'Cold Brew', 'price_fa': '275', 'description_fa': 'طعم‌ها: پرتقال کارامل آیریش / آلبالو لیمو'},
+            {'name_fa': 'فیزی آیسد تی', 'name_en': 'Fizzy Iced Tea', 'price_fa': '195', 'description_fa': 'طعم‌ها: انار / انگور سیاه / سودا'},
+            {'name_fa': 'میموسا', 'name_en': 'Mimosa', 'price_fa': '195'},
+            {'name_fa': 'ویشنوکا', 'name_en': 'Vishnuka', 'price_fa': '180'},
+            {
+                'name_fa': 'مرلوت',
+                'name_en': 'Merlot',
+                'price_fa': '195',
+                'description_fa': '[زنجبیل]',
+                'description_en': '[ginger]',
+            },
+            {'name_fa': 'لیموناد', 'name_en': 'Lemonade', 'price_fa': '150'},
+            {'name_fa': 'خاکشیر و آلوئه‌ورا', 'name_en': 'Khakshir & Aloe Vera', 'price_fa': '175'},
+            {
+                'name_fa': 'کلودا',
+                'name_en': 'Cloda',
+                'price_fa': '290',
+                'description_fa': '[سیب دارچین / هلو انبه]',
+                'description_en': '[apple cinnamon / peach mango]',
+            },
+        ],
+    },
+    {
+        'title_fa': 'متفرقه',
+        'title_en': 'Misc',
+        'items': [
+            {'name_fa': 'آبمیوه روز', 'name_en': 'Juice of the Day', 'price_fa': 'از ما بپرسید'},
+        ],
+    },
+]
+
+TODAYS_SPECIAL_SECTIONS = [
+    {
+        'title_fa': 'کیک و شیرینی',
+        'title_en': 'Cakes & Pastries',
+        'items': [
+            {'name_fa': 'کروسان بادام', 'name_en': 'Almond Croissant', 'price_fa': '230'},
+            {'name_fa': 'کروسان پاییز', 'name_en': 'Autumn Croissant', 'price_fa': '210'},
+            {'name_fa': 'کروسان شکلاتی', 'name_en': 'Chocolate Croissant', 'price_fa': '180'},
+            {'name_fa': 'رول دارچین', 'name_en': 'Cinnamon Roll', 'price_fa': '170'},
+            {'name_fa': 'پن سوئیسی', 'name_en': 'Pain Suisse', 'price_fa': '175'},
+            {'name_fa': 'تارت فصل', 'name_en': 'Seasonal Tart', 'price_fa': '180'},
+            {'name_fa': 'دماوند', 'name_en': 'Damavand', 'price_fa': '250'},
+            {'name_fa': 'حریره بادام', 'name_en': 'Almond Porridge', 'price_fa': '125'},
+        ],
+    },
+    {
+        'title_fa': 'کوکی',
+        'title_en': 'Cookies',
+        'items': [
+            {'name_fa': 'کوکی دبل چاکلت', 'name_en': 'Double Chocolate Cookie', 'price_fa': '125'},
+            {
+                'name_fa': 'کوکی خرما',
+                'name_en': 'Date Cookie',
+                'price_fa': '125',
+                'description_fa': '[بدون شکر]',
+                'description_en': '[sugar free]',
+            },
+            {
+                'name_fa': 'کوکی هویج و گردو',
+                'name_en': 'Carrot Walnut Cookie',
+                'price_fa': '150',
+                'description_fa': '[بدون شکر]',
+                'description_en': '[sugar free]',
+            },
+        ],
+    },
+    {
+        'title_fa': 'میان‌وعده و صبحانه',
+        'title_en': 'Snacks & Breakfast',
+        'items': [
+            {'name_fa': 'پروتئین بار', 'name_en': 'Protein Bar', 'price_fa': '250'},
+            {'name_fa': 'سرشیر و عسل', 'name_en': 'Cream & Honey', 'price_fa': '245'},
+            {
+                'name_fa': 'اوتمیل',
+                'name_en': 'Oatmeal',
+                'price_fa': '240',
+                'description_fa': '[سوهان عسلی / میوه]',
+                'description_en': '[honey Sohaan / fruit]',
+            },
+        ],
+    },
+    {
+        'title_fa': 'تست و نان',
+        'title_en': 'Toasts & Bread',
+        'items': [
+            {'name_fa': 'تست پنیر شوید', 'name_en': 'Dill Cheese Toast', 'price_fa': '150'},
+            {'name_fa': 'تست پنیر زیره و پسته', 'name_en': 'Cumin Pistachio Cheese Toast', 'price_fa': '280'},
+            {'name_fa': 'تست پینات و عسل', 'name_en': 'Peanut Butter & Honey Toast', 'price_fa': '240'},
+            {
+                'name_fa': 'سیمیت',
+                'name_en': 'Simit',
+                'price_fa': '250',
+                'description_fa': '[پنیر، گوجه، ریحان]',
+                'description_en': '[cheese, tomato, basil]',
+            },
+            {'name_fa': 'کروسان خامه مربا', 'name_en': 'Cream & Jam Croissant', 'price_fa': '150'},
+        ],
+    },
+    {
+        'title_fa': 'ساندویچ',
+        'title_en': 'Sandwiches',
+        'items': [
+            {'name_fa': 'ساندویچ تخم‌مرغ', 'name_en': 'Egg Sandwich', 'price_fa': '245'},
+            {'name_fa': 'چاباتا مرغ و پستو', 'name_en': 'Chicken Pesto Ciabatta', 'price_fa': '375'},
+            {'name_fa': 'چاباتا پولد بیف', 'name_en': 'Pulled Beef Ciabatta', 'price_fa': '435'},
+            {'name_fa': 'چاباتا بیکن', 'name_en': 'Bacon Ciabatta', 'price_fa': '290'},
+        ],
+    },
+    {
+        'title_fa': 'متفرقه',
+        'title_en': 'Misc Specials',
+        'items': [
+            {'name_fa': 'سالاد روز', 'name_en': 'Salad of the Day', 'price_fa': 'از ما بپرسید'},
+        ],
+    },
+]
+
+MENUS_TO_SEED = [
+    {
+        'title_en': "Today's Special",
+        'title_fa': 'پخت روز',
+        'subtitle_en': '',
+        'subtitle_fa': '',
+        'menu_type': 'today',
+        'sections': TODAYS_SPECIAL_SECTIONS,
+    },
+    {
+        'title_en': 'Main Menu',
+        'title_fa': 'منوی نوشیدنی',
+        'subtitle_en': '',
+        'subtitle_fa': '',
+        'menu_type': 'main',
+        'sections': MAIN_MENU_SECTIONS,
+    },
+]
+
+INVENTORY_DEFAULTS = [
+    {'name': 'Espresso Beans', 'unit': 'kg'},
+    {'name': 'Milk', 'unit': 'L'},
+    {'name': 'Chai Mix', 'unit': 'g'},
+    {'name': 'Pastry Base', 'unit': 'pcs'},
+    {'name': 'Lemonade Syrup', 'unit': 'ml'},
+]
+
+MENU_FIELDS = ['title_fa', 'subtitle_en', 'subtitle_fa', 'is_active', 'show_images', 'display_order', 'menu_type']
+SECTION_FIELDS = ['description_en', 'description_fa', 'is_active', 'display_order', 'is_main_section']
+ITEM_FIELDS = ['name_en', 'price_fa', 'price_en', 'description_fa', 'description_en', 'display_order']
+
+
+def curated_menu_rows(menu_data, menu_idx):
+    """Return the desired (menu, sections) rows for one curated menu."""
+    menu = {
+        'title_fa': menu_data['title_fa'],
+        'subtitle_en': menu_data.get('subtitle_en', ''),
+        'subtitle_fa': menu_data.get('subtitle_fa', ''),
+        'is_active': True,
+        'show_images': False,
+        'display_order': menu_idx,
+        'menu_type': menu_data.get('menu_type', 'main'),
+    }
+    sections = []
+    for section_idx, section_data in enumerate(menu_data['sections'], start=1):
+        items = []
+        for item_idx, item_data in enumerate(section_data.get('items', []), start=1):
+            price_fa = item_data.get('price_fa', '')
+            items.append(
+                {
+                    'name_fa': item_data['name_fa'],
+                    'name_en': item_data.get('name_en', ''),
+                    'price_fa': price_fa,
+                    'price_en': item_data.get('price_en', price_fa),
+                    'description_fa': item_data.get('description_fa', ''),
+                    'description_en': item_data.get('description_en', ''),
+                    'display_order': item_idx,
+                }
+            )
+        sections.append(
+            {
+                'title_fa': section_data['title_fa'],
+                'title_en': section_data['title_en'],
+                'description_en': section_data.get('description_en', ''),
+                'description_fa': section_data.get('description_fa', ''),
+                'is_active': True,
+                'display_order': section_idx,
+                'is_main_section': section_data.get('is_main_section', True),
+                'items': items,
+            }
+        )
+    return menu, sections
+
+
+def fingerprint(state) -> str:
+    return hashlib.sha256(
+        json.dumps(state, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+
 
 class Command(BaseCommand):
     help = "Seed menus, sections, and items with the real Beresht/Madi menus"
@@ -26,421 +336,261 @@ class Command(BaseCommand):
             action='store_true',
             help='Also seed inventory items for each branch (default: off)',
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Write even when the database fingerprint already matches the curated data.',
+        )
 
     def handle(self, *args, **options):
-        visuals_dir = options['visuals_dir']
-
-        self.stdout.write(f"Visuals dir: {visuals_dir}")
+        self.stdout.write(f"Visuals dir: {options['visuals_dir']}")
         self.stdout.write("Items per section flag is ignored; using curated menu data.")
+        # Image/GIF attachment stays disabled to keep seeded menus pictureless by default.
 
         # Guard against stale schema (branch_id still present) and drop it if needed
         self._ensure_column_dropped('beresht_menu', 'branch_id')
         self._ensure_column_dropped('madi_menu', 'branch_id')
 
-        # Collect image files from visuals/items/ and root visuals/ (optional)
-        images_dir = os.path.join(visuals_dir, 'items')
-        images = []
-
-        # Collect GIF files from visuals/items/ (kept but disabled by design)
-        gifs = []
-
-        # Disable auto-attachment to keep seeded menus pictureless by default
-        self.stdout.write(self.style.SUCCESS("Skipping image/GIF attachment for seeded menus (pictureless by default)."))
-
         # Map brands to their models using explicit imports
         from miyanBeresht.models import BereshtMenu, BereshtMenuSection, BereshtMenuItem
         from miyanMadi.models import MadiMenu, MadiMenuSection, MadiMenuItem
-        from miyanGroup.models import Branch, InventoryItem
 
         brand_configs = [
             {
                 'name': 'Beresht',
+                'code': 'beresht',
                 'menu_model': BereshtMenu,
                 'section_model': BereshtMenuSection,
                 'item_model': BereshtMenuItem,
-                'branch': Branch.objects.get_or_create(
-                    code='beresht', defaults={'name': 'Beresht', 'is_active': True}
-                )[0],
             },
             {
                 'name': 'Madi',
+                'code': 'madi',
                 'menu_model': MadiMenu,
                 'section_model': MadiMenuSection,
                 'item_model': MadiMenuItem,
-                'branch': Branch.objects.get_or_create(
-                    code='madi', defaults={'name': 'Madi', 'is_active': True}
-                )[0],
             },
         ]
-
-        main_menu_sections = [
-            {
-                'title_fa': 'بر پایه اسپرسو - سیاه',
-                'title_en': 'Espresso Based - Black',
-                'items': [
-                    {'name_fa': 'اسپرسو کامرشیال', 'name_en': 'Espresso (Commercial)', 'price_fa': '145'},
-                    {'name_fa': 'اسپرسو پرمیوم', 'name_en': 'Espresso (Premium)', 'price_fa': '190'},
-                    {'name_fa': 'آمریکانو کامرشیال', 'name_en': 'Americano (Commercial)', 'price_fa': '150'},
-                    {'name_fa': 'آمریکانو پرمیوم', 'name_en': 'Americano (Premium)', 'price_fa': '195'},
-                    {
-                        'name_fa': 'قهوه روز',
-                        'name_en': 'Coffee of the Day',
-                        'price_fa': '125',
-                        'description_fa': '[شارژ رایگان]',
-                        'description_en': '[free refill]',
-                    },
-                ],
-            },
-            {
-                'title_fa': 'بر پایه اسپرسو - سفید',
-                'title_en': 'Espresso Based - White',
-                'items': [
-                    {'name_fa': 'اسپرسو ماکیاتو', 'name_en': 'Espresso Macchiato', 'price_fa': '160'},
-                    {'name_fa': 'کورتادو', 'name_en': 'Cortado', 'price_fa': '175'},
-                    {'name_fa': 'کاپوچینو', 'name_en': 'Cappuccino', 'price_fa': '185'},
-                    {
-                        'name_fa': 'لاته',
-                        'name_en': 'Latte',
-                        'price_fa': '195',
-                        'description_fa': '[سرد / گرم]',
-                        'description_en': '[iced / hot]',
-                    },
-                    {
-                        'name_fa': 'موکا',
-                        'name_en': 'Mocha',
-                        'price_fa': '210',
-                        'description_fa': '[سرد / گرم]',
-                        'description_en': '[iced / hot]',
-                    },
-                    {'name_fa': 'لاته تیرامیسو', 'name_en': 'Tiramisu Latte', 'price_fa': '280'},
-                ],
-            },
-            {
-                'title_fa': 'افزودنی‌ها',
-                'title_en': 'Add-ons',
-                'is_main_section': False,
-                'items': [
-                    {'name_fa': 'عسل', 'name_en': 'Honey', 'price_fa': '+30'},
-                    {'name_fa': 'دی کف', 'name_en': 'Decaf', 'price_fa': '+30'},
-                    {'name_fa': 'شیر گیاهی', 'name_en': 'Plant-based Milk', 'price_fa': '+75'},
-                    {'name_fa': 'سیروپ', 'name_en': 'Syrup', 'price_fa': '+30'},
-                    {'name_fa': 'خامه', 'name_en': 'Cream', 'price_fa': '+50'},
-                ],
-            },
-            {
-                'title_fa': 'چای و دمنوش',
-                'title_en': 'Tea & Infusions',
-                'items': [
-                    {'name_fa': 'چای سیاه', 'name_en': 'Black Tea', 'price_fa': '110'},
-                    {
-                        'name_fa': 'ماچا',
-                        'name_en': 'Matcha',
-                        'price_fa': '210',
-                        'description_fa': '[سرد / گرم]',
-                        'description_en': '[iced / hot]',
-                    },
-                    {'name_fa': 'چای سیب و به', 'name_en': 'Apple & Quince Tea', 'price_fa': '135'},
-                    {
-                        'name_fa': 'چای سبز',
-                        'name_en': 'Green Tea',
-                        'price_fa': '135',
-                        'description_fa': '[بابونه، دارچین، زنجبیل]',
-                        'description_en': '[chamomile, cinnamon, ginger]',
-                    },
-                    {'name_fa': 'دمنوش رز، پنیرک، بابونه، سیب', 'name_en': 'Rose, Mallow, Chamomile, Apple', 'price_fa': '135'},
-                    {'name_fa': 'دمنوش دارچین، میخک، زنجبیل', 'name_en': 'Cinnamon, Clove, Ginger', 'price_fa': '135'},
-                ],
-            },
-            {
-                'title_fa': 'فراتر',
-                'title_en': 'Beyond',
-                'items': [
-                    {'name_fa': 'هات چاکلت', 'name_en': 'Hot Chocolate', 'price_fa': '270'},
-                    {'name_fa': 'ماسالا', 'name_en': 'Masala', 'price_fa': '210'},
-                    {
-                        'name_fa': 'هات پینات',
-                        'name_en': 'Hot Peanut',
-                        'price_fa': '175',
-                        'description_fa': '[شیر، دارچین، پینات]',
-                        'description_en': '[milk, cinnamon, peanut]',
-                    },
-                    {
-                        'name_fa': 'اسپیرولینا',
-                        'name_en': 'Spirulina',
-                        'price_fa': '210',
-                        'description_fa': '[سرد / گرم]',
-                        'description_en': '[iced / hot]',
-                    },
-                    {
-                        'name_fa': 'بلوندی',
-                        'name_en': 'Blondie',
-                        'price_fa': '250',
-                        'description_fa': '[شکلات سفید، آلبالو، شیر]',
-                        'description_en': '[white chocolate, sour cherry, milk]',
-                    },
-                ],
-            },
-            {
-                'title_fa': 'نوشیدنی‌های سرد',
-                'title_en': 'Cold Drinks',
-                'items': [
-                    {'name_fa': 'کلد برو', 'name_en': 'Cold Brew', 'price_fa': '275', 'description_fa': 'طعم‌ها: پرتقال کارامل آیریش / آلبالو لیمو'},
-                    {'name_fa': 'فیزی آیسد تی', 'name_en': 'Fizzy Iced Tea', 'price_fa': '195', 'description_fa': 'طعم‌ها: انار / انگور سیاه / سودا'},
-                    {'name_fa': 'میموسا', 'name_en': 'Mimosa', 'price_fa': '195'},
-                    {'name_fa': 'ویشنوکا', 'name_en': 'Vishnuka', 'price_fa': '180'},
-                    {
-                        'name_fa': 'مرلوت',
-                        'name_en': 'Merlot',
-                        'price_fa': '195',
-                        'description_fa': '[زنجبیل]',
-                        'description_en': '[ginger]',
-                    },
-                    {'name_fa': 'لیموناد', 'name_en': 'Lemonade', 'price_fa': '150'},
-                    {'name_fa': 'خاکشیر و آلوئه‌ورا', 'name_en': 'Khakshir & Aloe Vera', 'price_fa': '175'},
-                    {
-                        'name_fa': 'کلودا',
-                        'name_en': 'Cloda',
-                        'price_fa': '290',
-                        'description_fa': '[سیب دارچین / هلو انبه]',
-                        'description_en': '[apple cinnamon / peach mango]',
-                    },
-                ],
-            },
-            {
-                'title_fa': 'متفرقه',
-                'title_en': 'Misc',
-                'items': [
-                    {'name_fa': 'آبمیوه روز', 'name_en': 'Juice of the Day', 'price_fa': 'از ما بپرسید'},
-                ],
-            },
+        with_inventory = options.get('with_inventory')
+        desired = [
+            curated_menu_rows(menu_data, menu_idx)
+            for menu_idx, menu_data in enumerate(MENUS_TO_SEED, start=1)
         ]
+        desired_state = {
+            brand['name']: self._desired_brand_state(desired) for brand in brand_configs
+        }
+        if with_inventory:
+            desired_state['inventory'] = self._desired_inventory_state(brand_configs)
 
-        todays_special_sections = [
-            {
-                'title_fa': 'کیک و شیرینی',
-                'title_en': 'Cakes & Pastries',
-                'items': [
-                    {'name_fa': 'کروسان بادام', 'name_en': 'Almond Croissant', 'price_fa': '230'},
-                    {'name_fa': 'کروسان پاییز', 'name_en': 'Autumn Croissant', 'price_fa': '210'},
-                    {'name_fa': 'کروسان شکلاتی', 'name_en': 'Chocolate Croissant', 'price_fa': '180'},
-                    {'name_fa': 'رول دارچین', 'name_en': 'Cinnamon Roll', 'price_fa': '170'},
-                    {'name_fa': 'پن سوئیسی', 'name_en': 'Pain Suisse', 'price_fa': '175'},
-                    {'name_fa': 'تارت فصل', 'name_en': 'Seasonal Tart', 'price_fa': '180'},
-                    {'name_fa': 'دماوند', 'name_en': 'Damavand', 'price_fa': '250'},
-                    {'name_fa': 'حریره بادام', 'name_en': 'Almond Porridge', 'price_fa': '125'},
-                ],
-            },
-            {
-                'title_fa': 'کوکی',
-                'title_en': 'Cookies',
-                'items': [
-                    {'name_fa': 'کوکی دبل چاکلت', 'name_en': 'Double Chocolate Cookie', 'price_fa': '125'},
-                    {
-                        'name_fa': 'کوکی خرما',
-                        'name_en': 'Date Cookie',
-                        'price_fa': '125',
-                        'description_fa': '[بدون شکر]',
-                        'description_en': '[sugar free]',
-                    },
-                    {
-                        'name_fa': 'کوکی هویج و گردو',
-                        'name_en': 'Carrot Walnut Cookie',
-                        'price_fa': '150',
-                        'description_fa': '[بدون شکر]',
-                        'description_en': '[sugar free]',
-                    },
-                ],
-            },
-            {
-                'title_fa': 'میان‌وعده و صبحانه',
-                'title_en': 'Snacks & Breakfast',
-                'items': [
-                    {'name_fa': 'پروتئین بار', 'name_en': 'Protein Bar', 'price_fa': '250'},
-                    {'name_fa': 'سرشیر و عسل', 'name_en': 'Cream & Honey', 'price_fa': '245'},
-                    {
-                        'name_fa': 'اوتمیل',
-                        'name_en': 'Oatmeal',
-                        'price_fa': '240',
-                        'description_fa': '[سوهان عسلی / میوه]',
-                        'description_en': '[honey Sohaan / fruit]',
-                    },
-                ],
-            },
-            {
-                'title_fa': 'تست و نان',
-                'title_en': 'Toasts & Bread',
-                'items': [
-                    {'name_fa': 'تست پنیر شوید', 'name_en': 'Dill Cheese Toast', 'price_fa': '150'},
-                    {'name_fa': 'تست پنیر زیره و پسته', 'name_en': 'Cumin Pistachio Cheese Toast', 'price_fa': '280'},
-                    {'name_fa': 'تست پینات و عسل', 'name_en': 'Peanut Butter & Honey Toast', 'price_fa': '240'},
-                    {
-                        'name_fa': 'سیمیت',
-                        'name_en': 'Simit',
-                        'price_fa': '250',
-                        'description_fa': '[پنیر، گوجه، ریحان]',
-                        'description_en': '[cheese, tomato, basil]',
-                    },
-                    {'name_fa': 'کروسان خامه مربا', 'name_en': 'Cream & Jam Croissant', 'price_fa': '150'},
-                ],
-            },
-            {
-                'title_fa': 'ساندویچ',
-                'title_en': 'Sandwiches',
-                'items': [
-                    {'name_fa': 'ساندویچ تخم‌مرغ', 'name_en': 'Egg Sandwich', 'price_fa': '245'},
-                    {'name_fa': 'چاباتا مرغ و پستو', 'name_en': 'Chicken Pesto Ciabatta', 'price_fa': '375'},
-                    {'name_fa': 'چاباتا پولد بیف', 'name_en': 'Pulled Beef Ciabatta', 'price_fa': '435'},
-                    {'name_fa': 'چاباتا بیکن', 'name_en': 'Bacon Ciabatta', 'price_fa': '290'},
-                ],
-            },
-            {
-                'title_fa': 'متفرقه',
-                'title_en': 'Misc Specials',
-                'items': [
-                    {'name_fa': 'سالاد روز', 'name_en': 'Salad of the Day', 'price_fa': 'از ما بپرسید'},
-                ],
-            },
-        ]
+        with transaction.atomic():
+            loaded = {brand['name']: self._load_brand(brand) for brand in brand_configs}
+            current_state = {
+                brand['name']: self._brand_state(loaded[brand['name']]) for brand in brand_configs
+            }
+            if with_inventory:
+                current_state['inventory'] = self._inventory_state(brand_configs)
 
-        menus_to_seed = [
-            {
-                'title_en': "Today's Special",
-                'title_fa': 'پخت روز',
-                'subtitle_en': '',
-                'subtitle_fa': '',
-                'menu_type': 'today',
-                'sections': todays_special_sections,
-            },
-            {
-                'title_en': 'Main Menu',
-                'title_fa': 'منوی نوشیدنی',
-                'subtitle_en': '',
-                'subtitle_fa': '',
-                'menu_type': 'main',
-                'sections': main_menu_sections,
-            },
-        ]
+            target = fingerprint(desired_state)
+            if not options.get('force') and fingerprint(current_state) == target:
+                self.stdout.write(
+                    self.style.SUCCESS(f"✓ Curated data already in place (fingerprint {target[:12]}); nothing to do.")
+                )
+                return
 
-        with transaction.atomic():
             for brand_config in brand_configs:
-                brand_name = brand_config['name']
-                menu_model = brand_config['menu_model']
-                section_model = brand_config['section_model']
-                item_model = brand_config['item_model']
-
                 self.stdout.write(f"\n{'='*60}")
-                self.stdout.write(f"Brand: {brand_name}")
+                self.stdout.write(f"Brand: {brand_config['name']}")
                 self.stdout.write(f"{'='*60}")
+                self._sync_brand(brand_config, loaded[brand_config['name']], desired)
 
-                for menu_idx, menu_data in enumerate(menus_to_seed, start=1):
-                    menu_defaults = {
-                        'title_fa': menu_data['title_fa'],
-                        'subtitle_en': menu_data.get('subtitle_en', ''),
-                        'subtitle_fa': menu_data.get('subtitle_fa', ''),
-                        'is_active': True,
-                        'show_images': False,
-                        'display_order': menu_idx,
-                        'menu_type': menu_data.get('menu_type', 'main'),
-                    }
-                    menu, created = menu_model.objects.get_or_create(
-                        title_en=menu_data['title_en'],
-                        defaults=menu_defaults,
-                    )
-                    if not created:
-                        for field, value in menu_defaults.items():
-                            setattr(menu, field, value)
-                        menu.save(update_fields=list(menu_defaults.keys()))
-
-                    self.stdout.write(self.style.SUCCESS(f"✓ Menu: {menu.title_en}"))
-
-                    keep_section_ids = []
-                    for section_idx, section_data in enumerate(menu_data['sections'], start=1):
-                        section, _ = section_model.objects.get_or_create(
-                            menu=menu,
-                            title_fa=section_data['title_fa'],
-                            title_en=section_data['title_en'],
-                            defaults={
-                                'description_en': section_data.get('description_en', ''),
-                                'description_fa': section_data.get('description_fa', ''),
-                                'is_active': True,
-                                'display_order': section_idx,
-                                'is_main_section': section_data.get('is_main_section', True),
-                            },
-                        )
-                        section.description_en = section_data.get('description_en', '')
-                        section.description_fa = section_data.get('description_fa', '')
-                        section.is_active = True
-                        section.display_order = section_idx
-                        section.is_main_section = section_data.get('is_main_section', True)
-                        section.save(update_fields=['description_en', 'description_fa', 'is_active', 'display_order', 'is_main_section'])
-                        keep_section_ids.append(section.id)
-
-                        keep_item_ids = []
-                        for item_idx, item_data in enumerate(section_data.get('items', []), start=1):
-                            item, _ = item_model.objects.get_or_create(
-                                section=section,
-                                name_fa=item_data['name_fa'],
-                                defaults={
-                                    'name_en': item_data.get('name_en', ''),
-                                    'price_fa': item_data.get('price_fa', ''),
-                                    'price_en': item_data.get('price_en', item_data.get('price_fa', '')),
-                                    'description_fa': item_data.get('description_fa', ''),
-                                    'description_en': item_data.get('description_en', ''),
-                                    'display_order': item_idx,
-                                },
-                            )
-                            item.name_en = item_data.get('name_en', '')
-                            item.price_fa = item_data.get('price_fa', '')
-                            item.price_en = item_data.get('price_en', item.price_fa)
-                            item.description_fa = item_data.get('description_fa', '')
-                            item.description_en = item_data.get('description_en', '')
-                            item.display_order = item_idx
-                            item.save(update_fields=['name_en', 'price_fa', 'price_en', 'description_fa', 'description_en', 'display_order'])
-                            keep_item_ids.append(item.id)
-
-                            # Attach first available image/GIF for a bit of visual variety
-                            if images and not item.image:
-                                img_path = images[(item_idx - 1) % len(images)]
-                                try:
-                                    with open(img_path, 'rb') as fp:
-                                        item.image.save(os.path.basename(img_path), File(fp), save=True)
-                                except Exception as e:
-                                    self.stdout.write(self.style.WARNING(f"      Warning: Failed to attach image: {e}"))
-                            if gifs and not item.video:
-                                gif_path = gifs[(item_idx - 1) % len(gifs)]
-                                try:
-                                    with open(gif_path, 'rb') as fp:
-                                        item.video.save(os.path.basename(gif_path), File(fp), save=True)
-                                except Exception as e:
-                                    self.stdout.write(self.style.WARNING(f"      Warning: Failed to attach GIF: {e}"))
-
-                        # prune items not in curated list
-                        item_model.objects.filter(section=section).exclude(id__in=keep_item_ids).delete()
-
-                    # prune sections not in curated list
-                    section_model.objects.filter(menu=menu).exclude(id__in=keep_section_ids).delete()
-
-                if options.get('with_inventory'):
-                    inventory_defaults = [
-                        {'name': 'Espresso Beans', 'unit': 'kg'},
-                        {'name': 'Milk', 'unit': 'L'},
-                        {'name': 'Chai Mix', 'unit': 'g'},
-                        {'name': 'Pastry Base', 'unit': 'pcs'},
-                        {'name': 'Lemonade Syrup', 'unit': 'ml'},
-                    ]
-                    for inv in inventory_defaults:
-                        inv_obj, created = InventoryItem.objects.get_or_create(
-                            branch=brand_config['branch'],
-                            name=inv['name'],
-                            defaults={'unit': inv.get('unit', ''), 'is_active': True},
-                        )
-                        if created:
-                            self.stdout.write(f"  ✓ Inventory item: {inv_obj.name}")
+            if with_inventory:
+                self._sync_inventory(brand_configs)
 
         self.stdout.write(self.style.SUCCESS(f"\n{'='*60}"))
-        self.stdout.write(self.style.SUCCESS("✓ Seeding finished with curated menus."))
+        self.stdout.write(self.style.SUCCESS(f"✓ Seeding finished with curated menus (fingerprint {target[:12]})."))
+
+    # ------------------------------------------------------------------ #
+    # State used for the fingerprint: only curated menus are compared, but
+    # any extra section or item inside them counts since it would be pruned.
+    def _desired_brand_state(self, desired):
+        return {
+            menu_data['title_en']: {**menu_row, 'sections': sections}
+            for (menu_row, sections), menu_data in zip(desired, MENUS_TO_SEED)
+        }
+
+    def _load_brand(self, brand_config):
+        """Read the curated menus with their sections and items: 3 queries."""
+        titles = [menu_data['title_en'] for menu_data in MENUS_TO_SEED]
+        menus = {}
+        for menu in brand_config['menu_model'].objects.filter(title_en__in=titles).order_by('id'):
+            menus.setdefault(menu.title_en, menu)
+        sections = list(
+            brand_config['section_model'].objects.filter(menu__in=list(menus.values())).order_by('display_order', 'id')
+        )
+        items = list(
+            brand_config['item_model'].objects.filter(section__in=sections).order_by('display_order', 'id')
+        )
+        return {'menus': menus, 'sections': sections, 'items': items}
+
+    def _brand_state(self, loaded):
+        items_by_section = {}
+        for item in loaded['items']:
+            items_by_section.setdefault(item.section_id, []).append(
+                {'name_fa': item.name_fa, **{field: getattr(item, field) for field in ITEM_FIELDS}}
+            )
+        sections_by_menu = {}
+        for section in loaded['sections']:
+            sections_by_menu.setdefault(section.menu_id, []).append(
+                {
+                    'title_fa': section.title_fa,
+                    'title_en': section.title_en,
+                    **{field: getattr(section, field) for field in SECTION_FIELDS},
+                    'items': items_by_section.get(section.id, []),
+                }
+            )
+        return {
+            title_en: {
+                **{field: getattr(menu, field) for field in MENU_FIELDS},
+                'sections': sections_by_menu.get(menu.id, []),
+            }
+            for title_en, menu in loaded['menus'].items()
+        }
+
+    def _desired_inventory_state(self, brand_configs):
+        names = sorted(inv['name'] for inv in INVENTORY_DEFAULTS)
+        return {brand['code']: names for brand in brand_configs}
+
+    def _inventory_state(self, brand_configs):
+        from miyanGroup.models import InventoryItem
+
+        names = [inv['name'] for inv in INVENTORY_DEFAULTS]
+        state = {brand['code']: [] for brand in brand_configs}
+        rows = InventoryItem.objects.filter(
+            branch__code__in=list(state), name__in=names
+        ).values_list('branch__code', 'name')
+        for code, name in rows:
+            state[code].append(name)
+        return {code: sorted(values) for code, values in state.items()}
 
     # ------------------------------------------------------------------ #
+    def _sync_brand(self, brand_config, loaded, desired):
+        menu_model = brand_config['menu_model']
+        section_model = brand_config['section_model']
+        item_model = brand_config['item_model']
+
+        # Menus --------------------------------------------------------
+        menus_by_title = dict(loaded['menus'])
+        new_menus, changed_menus = [], []
+        for (menu_row, _), menu_data in zip(desired, MENUS_TO_SEED):
+            menu = menus_by_title.get(menu_data['title_en'])
+            if menu is None:
+                menu = menu_model(title_en=menu_data['title_en'], **menu_row)
+                new_menus.append(menu)
+                menus_by_title[menu.title_en] = menu
+            elif self._apply(menu, menu_row, MENU_FIELDS):
+                changed_menus.append(menu)
+        menu_model.objects.bulk_create(new_menus)
+        menu_model.objects.bulk_update(changed_menus, MENU_FIELDS)
+        menus = [menus_by_title[menu_data['title_en']] for menu_data in MENUS_TO_SEED]
+        for menu in menus:
+            self.stdout.write(self.style.SUCCESS(f"✓ Menu: {menu.title_en}"))
+
+        # Sections -----------------------------------------------------
+        existing_sections = {}
+        for section in loaded['sections']:
+            existing_sections.setdefault((section.menu_id, section.title_fa, section.title_en), section)
+        new_sections, changed_sections, section_plan = [], [], []
+        for menu, (_, sections_rows) in zip(menus, desired):
+            for row in sections_rows:
+                fields = {key: value for key, value in row.items() if key != 'items'}
+                section = existing_sections.get((menu.id, row['title_fa'], row['title_en']))
+                if section is None:
+                    section = section_model(menu=menu, **fields)
+                    new_sections.append(section)
+                elif self._apply(section, fields, SECTION_FIELDS):
+                    changed_sections.append(section)
+                section_plan.append((section, row['items']))
+        section_model.objects.bulk_create(new_sections)
+        section_model.objects.bulk_update(changed_sections, SECTION_FIELDS)
+        keep_section_ids = [section.id for section, _ in section_plan]
+        # prune sections not in curated list (their items cascade)
+        section_model.objects.filter(menu__in=menus).exclude(id__in=keep_section_ids).delete()
+
+        # Items --------------------------------------------------------
+        existing_items = {}
+        for item in loaded['items']:
+            existing_items.setdefault((item.section_id, item.name_fa), item)
+        new_items, changed_items, keep_item_ids = [], [], []
+        for section, item_rows in section_plan:
+            for row in item_rows:
+                item = existing_items.get((section.id, row['name_fa']))
+                if item is None:
+                    new_items.append(item_model(section=section, **row))
+                    continue
+                if self._apply(item, row, ITEM_FIELDS):
+                    changed_items.append(item)
+                keep_item_ids.append(item.id)
+        item_model.objects.bulk_update(changed_items, ITEM_FIELDS)
+        # prune items not in curated list
+        item_model.objects.filter(section_id__in=keep_section_ids).exclude(id__in=keep_item_ids).delete()
+        item_model.objects.bulk_create(new_items)
+
+        # Bulk writes skip the model signals that normally drop cached menus.
+        invalidate_menu_cache(menu_model._meta.app_label)
+
+        self.stdout.write(
+            f"  menus +{len(new_menus)}/~{len(changed_menus)}, "
+            f"sections +{len(new_sections)}/~{len(changed_sections)}, "
+            f"items +{len(new_items)}/~{len(changed_items)}"
+        )
+
+    def _sync_inventory(self, brand_configs):
+        from miyanGroup.models import Branch, InventoryItem
+        from sync import changelog
+
+        branches = {branch.code: branch for branch in Branch.objects.filter(code__in=[b['code'] for b in brand_configs])}
+        missing_branches = [
+            Branch(code=brand['code'], name=brand['name'], is_active=True)
+            for brand in brand_configs
+            if brand['code'] not in branches
+        ]
+        for branch in Branch.objects.bulk_create(missing_branches):
+            branches[branch.code] = branch
+
+        existing = set(
+            InventoryItem.objects.filter(
+                branch__in=list(branches.values()),
+                name__in=[inv['name'] for inv in INVENTORY_DEFAULTS],
+            ).values_list('branch_id', 'name')
+        )
+        new_items = [
+            InventoryItem(branch=branch, name=inv['name'], unit=inv.get('unit', ''), is_active=True)
+            for branch in branches.values()
+            for inv in INVENTORY_DEFAULTS
+            if (branch.id, inv['name']) not in existing
+        ]
+        InventoryItem.objects.bulk_create(new_items, ignore_conflicts=True)
+        if new_items:
+            changelog.record_queryset(
+                InventoryItem.objects.filter(
+                    branch__in=list(branches.values()),
+                    name__in=[inv_obj.name for inv_obj in new_items],
+                ),
+                changelog.Action.CREATE,
+            )
+        for inv_obj in new_items:
+            self.stdout.write(f"  ✓ Inventory item: {inv_obj.name} ({inv_obj.branch.code})")
+
+    @staticmethod
+    def _apply(obj, values, fields) -> bool:
+        """Copy ``fields`` from ``values`` onto ``obj``; return True if anything changed."""
+        changed = False
+        for field in fields:
+            if getattr(obj, field) != values[field]:
+                setattr(obj, field, values[field])
+                changed = True
+        return changed
+
     def _ensure_column_dropped(self, table_name: str, column: str):
         """Drop legacy column if it exists so seeding matches the current models."""
         try:
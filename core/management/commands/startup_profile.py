@@ -0,0 +1,152 @@
+"""Report where process start-up time goes.
+
+Runs ``django.setup()`` in a fresh interpreter with ``-X importtime`` and
+prints the modules with the largest cumulative import time, the self time per
+top-level package, and the time spent in every ``AppConfig.ready``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Executed in the child interpreter. Wraps AppConfig.create so each app's
+# ready() is timed, then prints a JSON summary as the last stdout line.
+CHILD_SCRIPT = r'''
+import json, sys, time
+from django.apps.config import AppConfig
+
+ready_timings = []
+_create = AppConfig.create.__func__
+
+
+def create(cls, entry):
+    app_config = _create(cls, entry)
+    ready = app_config.ready
+
+    def timed_ready():
+        start = time.perf_counter()
+        ready()
+        ready_timings.append([app_config.label, time.perf_counter() - start])
+
+    app_config.ready = timed_ready
+    return app_config
+
+
+AppConfig.create = classmethod(create)
+
+import django
+phases = {}
+start = time.perf_counter()
+django.setup()
+phases['setup'] = time.perf_counter() - start
+if '--urls' in sys.argv:
+    from django.conf import settings
+    from django.urls import get_resolver
+    start = time.perf_counter()
+    get_resolver(settings.ROOT_URLCONF).url_patterns
+    phases['urls'] = time.perf_counter() - start
+if '--checks' in sys.argv:
+    from django.core import checks
+    start = time.perf_counter()
+    checks.run_checks()
+    phases['checks'] = time.perf_counter() - start
+print(json.dumps({'ready': ready_timings, 'phases': phases}))
+'''
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    """Parse ``-X importtime`` stderr lines into records."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+            records.append(
+                ImportRecord(
+                    module=name.strip(),
+                    self_us=int(self_us),
+                    cumulative_us=int(cumulative_us),
+                    depth=(len(name) - len(name.lstrip()) - 1) // 2,
+                )
+            )
+        except ValueError:
+            continue
+    return records
+
+
+def package_totals(records: list[ImportRecord]) -> dict[str, int]:
+    """Sum self time per top-level package; unlike cumulative time it never double counts."""
+    totals: dict[str, int] = {}
+    for record in records:
+        root = record.module.split('.')[0]
+        totals[root] = totals.get(root, 0) + record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+class Command(BaseCommand):
+    help = "Profile imports and AppConfig.ready() during django.setup() in a fresh interpreter."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='How many modules/packages to list.')
+        parser.add_argument('--urls', action='store_true', help='Also import ROOT_URLCONF, as a worker does on its first request.')
+        parser.add_argument('--checks', action='store_true', help='Also run the system checks, as most commands do.')
+        parser.add_argument('--prefix', default='', help='Only list modules starting with this prefix.')
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON.')
+
+    def handle(self, *args, **options):
+        child_args = [flag for flag in ('--urls', '--checks') if options[flag.lstrip('-')]]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, *child_args],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'Start-up failed:\n{completed.stderr[-2000:]}')
+
+        summary = json.loads(completed.stdout.strip().splitlines()[-1])
+        records = [r for r in parse_importtime(completed.stderr) if r.module.startswith(options['prefix'])]
+        top = options['top']
+        report = {
+            'phases': summary['phases'],
+            'ready': sorted(summary['ready'], key=lambda item: item[1], reverse=True),
+            'modules': [
+                [r.module, r.cumulative_us, r.self_us]
+                for r in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]
+            ],
+            'packages': list(package_totals(records).items())[:top],
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for phase, seconds in report['phases'].items():
+            self.stdout.write(f'{phase:<10} {seconds * 1000:9.1f} ms')
+        self.stdout.write('\nAppConfig.ready()')
+        for label, seconds in report['ready']:
+            self.stdout.write(f'  {label:<28} {seconds * 1000:9.2f} ms')
+        self.stdout.write('\nCumulative import time [us] | self [us] | module')
+        for module, cumulative_us, self_us in report['modules']:
+            self.stdout.write(f'  {cumulative_us:>10} | {self_us:>9} | {module}')
+        self.stdout.write('\nSelf import time per package [us]')
+        for package, self_us in report['packages']:
+            self.stdout.write(f'  {self_us:>10} | {package}')
@@ -0,0 +1,43 @@
+"""Versioned cache keys for the public menu payloads.
+
+Payloads are cached per process, under a per-brand version kept in the
+database (``core.cache_versions``); an edit bumps it in the writer's
+transaction, so every worker stops using its old payloads on commit.
+
+Kept free of DRF imports: brand apps connect the invalidation signals from
+``AppConfig.ready`` and that must stay cheap (see ``startup_profile``).
+"""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+
+from . import cache_versions
+
+MENU_CACHE_PREFIX = 'public-menu'
+
+
+def version_name(label: str) -> str:
+    return f'{MENU_CACHE_PREFIX}:{label}'
+
+
+def payload_key(label: str, version: int, action_name: str, base_url: str) -> str:
+    # Absolute media URLs depend on the host, so it is part of the key.
+    return f'{MENU_CACHE_PREFIX}:{label}:{version}:{action_name}:{base_url}'
+
+
+def invalidate_menu_cache(label: str) -> None:
+    """Drop every cached payload of ``label`` by bumping its version."""
+    cache_versions.bump(version_name(label))
+
+
+def _on_menu_change(sender, **kwargs):
+    invalidate_menu_cache(sender._meta.app_label)
+
+
+def connect_menu_cache_invalidation(app_config) -> None:
+    """Invalidate the cached menus of a brand app whenever one of its models changes."""
+    for model in app_config.get_models():
+        uid = f'menu-cache-{model._meta.label_lower}'
+        post_save.connect(_on_menu_change, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_on_menu_change, sender=model, dispatch_uid=f'{uid}-delete')
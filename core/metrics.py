@@ -0,0 +1,344 @@
+"""Prometheus-style request metrics aggregated across worker processes.
+
+Every gunicorn worker keeps its counters in memory and periodically dumps
+them to ``<METRICS_DIR>/metrics-<pid>.json``. The metrics endpoint merges all
+worker files, so a scrape sees the whole container regardless of which
+worker answers it.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+POOL_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+METRIC_HELP = {
+    'http_requests_total': ('counter', 'Total HTTP requests by view, action, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency in seconds by view and action.'),
+    'http_request_db_queries': ('histogram', 'Database queries issued per request by view and action.'),
+    'http_requests_in_flight': ('gauge', 'Requests currently being processed.'),
+    'db_queries_total': ('counter', 'Total database queries by view and action.'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result.'),
+    'cache_hit_ratio': ('gauge', 'Share of cache lookups that were hits.'),
+    'db_connections_total': ('counter', 'Database connections handed to requests by alias, new or reused.'),
+    'db_pool_checkout_wait_seconds': ('histogram', 'Time spent waiting for a pooled database connection.'),
+    'db_pool_timeouts_total': ('counter', 'Pool checkouts that gave up waiting for a connection.'),
+    'db_pool_connections': ('gauge', 'Pooled database connections by alias and state.'),
+}
+
+
+def _labels_key(labels: dict[str, str] | None) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((labels or {}).items()))
+
+
+class MetricsRegistry:
+    """Thread-safe in-process metric store with a file-backed snapshot."""
+
+    def __init__(self, directory: str | os.PathLike, flush_interval: float = 1.0):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._last_flush = 0.0
+        self._counters: dict[tuple, float] = defaultdict(float)
+        self._gauges: dict[tuple, float] = defaultdict(float)
+        self._histograms: dict[tuple, dict] = {}
+        self._flushed_gauges: dict[tuple, float] = {}
+
+    def _check_fork(self):
+        # A registry created before gunicorn forks must not leak the parent's
+        # numbers into every child.
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    # Recording ------------------------------------------------------------
+    def inc(self, name: str, labels: dict[str, str] | None = None, value: float = 1.0):
+        with self._lock:
+            self._check_fork()
+            self._counters[(name, _labels_key(labels))] += value
+
+    def add_gauge(self, name: str, value: float, labels: dict[str, str] | None = None):
+        with self._lock:
+            self._check_fork()
+            self._gauges[(name, _labels_key(labels))] += value
+
+    def set_gauge(self, name: str, value: float, labels: dict[str, str] | None = None):
+        with self._lock:
+            self._check_fork()
+            self._gauges[(name, _labels_key(labels))] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: dict[str, str] | None = None,
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        with self._lock:
+            self._check_fork()
+            key = (name, _labels_key(labels))
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                bounds = list(buckets)
+                histogram = {'buckets': bounds, 'counts': [0] * (len(bounds) + 1), 'sum': 0.0}
+                self._histograms[key] = histogram
+            index = len(histogram['buckets'])
+            for position, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    index = position
+                    break
+            histogram['counts'][index] += 1
+            histogram['sum'] += value
+
+    # Persistence ----------------------------------------------------------
+    @property
+    def path(self) -> Path:
+        return self.directory / f'metrics-{os.getpid()}.json'
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._check_fork()
+            return {
+                'pid': self._pid,
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self._gauges.items()],
+                'histograms': [
+                    [name, list(labels), data['buckets'], list(data['counts']), data['sum']]
+                    for (name, labels), data in self._histograms.items()
+                ],
+            }
+
+    def _has_stale_idle_gauges(self) -> bool:
+        # An idle worker must not leave e.g. "1 request in flight" on disk
+        # until its next request happens to trigger a flush.
+        with self._lock:
+            return any(value and not self._gauges.get(key) for key, value in self._flushed_gauges.items())
+
+    def flush(self, force: bool = False):
+        now = time.monotonic()
+        if (
+            not force
+            and now - self._last_flush < self.flush_interval
+            and not self._has_stale_idle_gauges()
+        ):
+            return
+        self._last_flush = now
+        snapshot = self.snapshot()
+        with self._lock:
+            self._flushed_gauges = dict(self._gauges)
+        payload = json.dumps(snapshot)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(payload)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Metrics must never take a request down with them.
+            pass
+
+    def collect(self) -> dict:
+        """Merge the snapshots of every worker that shares the directory."""
+        self.flush(force=True)
+        counters: dict[tuple, float] = defaultdict(float)
+        gauges: dict[tuple, float] = defaultdict(float)
+        histograms: dict[tuple, dict] = {}
+
+        for snapshot in _read_snapshots(self.directory):
+            for name, labels, value in snapshot.get('counters', []):
+                counters[(name, tuple(map(tuple, labels)))] += value
+            # Gauges describe live state, so dead workers must not contribute.
+            if _pid_alive(snapshot.get('pid')):
+                for name, labels, value in snapshot.get('gauges', []):
+                    gauges[(name, tuple(map(tuple, labels)))] += value
+            for name, labels, buckets, counts, total in snapshot.get('histograms', []):
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.get(key)
+                if merged is None or merged['buckets'] != buckets:
+                    histograms[key] = {'buckets': buckets, 'counts': list(counts), 'sum': total}
+                    continue
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], counts)]
+                merged['sum'] += total
+
+        return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+
+def _read_snapshots(directory: Path):
+    if not directory.exists():
+        return
+    for path in sorted(directory.glob('metrics-*.json')):
+        try:
+            yield json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Module-level registry -----------------------------------------------------
+_registry: MetricsRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def get_registry() -> MetricsRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(
+                    settings.METRICS_DIR,
+                    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0),
+                )
+    return _registry
+
+
+def reset_registry():
+    """Drop the process registry (used by tests and after settings changes)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+def record_request(
+    *,
+    view: str,
+    action: str,
+    method: str,
+    status: int,
+    duration: float,
+    queries: int,
+):
+    registry = get_registry()
+    labels = {'view': view, 'action': action}
+    registry.inc('http_requests_total', {**labels, 'method': method, 'status': str(status)})
+    registry.observe('http_request_duration_seconds', duration, labels)
+    registry.observe('http_request_db_queries', queries, labels, buckets=QUERY_COUNT_BUCKETS)
+    if queries:
+        registry.inc('db_queries_total', labels, queries)
+    registry.flush()
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    if not is_enabled():
+        return
+    get_registry().inc('cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+
+def record_db_connection(alias: str, reused: bool):
+    if not is_enabled():
+        return
+    get_registry().inc('db_connections_total', {'alias': alias, 'source': 'reused' if reused else 'new'})
+
+
+def record_db_pool_checkout(alias: str, wait: float):
+    if not is_enabled():
+        return
+    get_registry().observe('db_pool_checkout_wait_seconds', wait, {'alias': alias}, buckets=POOL_WAIT_BUCKETS)
+
+
+def record_db_pool_timeout(alias: str):
+    if not is_enabled():
+        return
+    registry = get_registry()
+    registry.inc('db_pool_timeouts_total', {'alias': alias})
+    registry.flush()
+
+
+def record_db_pool_state(alias: str, *, idle: int, in_use: int):
+    if not is_enabled():
+        return
+    registry = get_registry()
+    registry.set_gauge('db_pool_connections', idle, {'alias': alias, 'state': 'idle'})
+    registry.set_gauge('db_pool_connections', in_use, {'alias': alias, 'state': 'in_use'})
+
+
+# Exposition ----------------------------------------------------------------
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _cache_ratios(counters: dict[tuple, float]) -> dict[tuple, float]:
+    totals: dict[str, list[float]] = defaultdict(lambda: [0.0, 0.0])
+    for (name, labels), value in counters.items():
+        if name != 'cache_requests_total':
+            continue
+        label_map = dict(labels)
+        totals[label_map.get('cache', 'default')][0 if label_map.get('result') == 'hit' else 1] += value
+    return {
+        ('cache_hit_ratio', (('cache', cache),)): hits / (hits + misses)
+        for cache, (hits, misses) in totals.items()
+        if hits + misses
+    }
+
+
+def render_prometheus(collected: dict) -> str:
+    """Render merged metrics in the Prometheus text exposition format."""
+    families: dict[str, list[str]] = defaultdict(list)
+    gauges = dict(collected['gauges'])
+    gauges.update(_cache_ratios(collected['counters']))
+
+    for (name, labels), value in sorted(collected['counters'].items()):
+        families[name].append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), value in sorted(gauges.items()):
+        families[name].append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), data in sorted(collected['histograms'].items()):
+        cumulative = 0
+        for bound, count in zip(list(data['buckets']) + [math.inf], data['counts']):
+            cumulative += count
+            bucket_labels = list(labels) + [('le', _format_value(float(bound)))]
+            families[name].append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+        families[name].append(f'{name}_sum{_format_labels(labels)} {_format_value(data["sum"])}')
+        families[name].append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+    lines: list[str] = []
+    for name in sorted(families):
+        metric_type, help_text = METRIC_HELP.get(name, ('untyped', ''))
+        if help_text:
+            lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.extend(families[name])
+    return '\n'.join(lines) + '\n'
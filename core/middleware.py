@@ -0,0 +1,159 @@
+"""Project-wide middleware."""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics, replicas
+
+
+class QueryCounter:
+    """Per-request query tally filled in by :func:`count_query`."""
+
+    def __init__(self):
+        self.count = 0
+
+
+# Context variables follow the request into ``sync_to_async`` threads, so
+# queries issued by the async ORM are attributed to the right request too.
+_active_counter: ContextVar[QueryCounter | None] = ContextVar('metrics_query_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """``connection.execute_wrappers`` hook installed on every connection."""
+    counter = _active_counter.get()
+    if counter is not None:
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+connection_created.connect(install_query_counter, dispatch_uid='metrics-query-counter')
+
+
+def resolve_view_labels(request) -> tuple[str, str]:
+    """Return (view, action) labels for the resolved route of ``request``."""
+    match = getattr(request, 'resolver_match', None)
+    method = request.method.lower()
+    if match is None:
+        return 'unresolved', method
+
+    view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    if view_class is None:
+        return match.view_name or match.func.__name__, method
+
+    actions = getattr(match.func, 'actions', None) or {}
+    return view_class.__name__, actions.get(method, method)
+
+
+class MetricsMiddleware:
+    """Record latency, status and query counts for every request (WSGI or ASGI)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not metrics.is_enabled():
+            return self.get_response(request)
+
+        # Connections opened before this module was imported missed the signal.
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+        token, start = self._start()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._finish(request, token, start, status)
+
+    async def __acall__(self, request):
+        if not metrics.is_enabled():
+            return await self.get_response(request)
+
+        token, start = self._start()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._finish(request, token, start, status)
+
+    def _start(self):
+        metrics.get_registry().add_gauge('http_requests_in_flight', 1)
+        return _active_counter.set(QueryCounter()), time.perf_counter()
+
+    def _finish(self, request, token, start, status):
+        duration = time.perf_counter() - start
+        counter = _active_counter.get()
+        _active_counter.reset(token)
+        metrics.get_registry().add_gauge('http_requests_in_flight', -1)
+        view, action = resolve_view_labels(request)
+        metrics.record_request(
+            view=view,
+            action=action,
+            method=request.method,
+            status=status,
+            duration=duration,
+            queries=counter.count,
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Bind replica routing state to the request and pin clients that wrote.
+
+    Installed only when a read replica is configured (``DATABASE_REPLICA_URL``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = replicas.RequestState()
+        token = replicas.bind(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.unbind(token)
+        if state.wrote:
+            replicas.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        state = replicas.RequestState()
+        token = replicas.bind(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replicas.unbind(token)
+        if state.wrote:
+            # Writes the pin row (and may load the session user).
+            await sync_to_async(replicas.pin)(request, response)
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0002_cache_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaPin',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pinned_until', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Replica Pin',
+                'verbose_name_plural': 'Replica Pins',
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import FileExtensionValidator
 from django.db import models
 
@@ -12,6 +14,111 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+class VersionConflict(Exception):
+    """A conditional save found the row at a different version."""
+
+
+class VersionedModel(models.Model):
+    """Optimistic concurrency: every save bumps ``version`` and is conditional on it.
+
+    ``save()`` on an existing row updates it only if the stored version still
+    equals the instance's, and raises :class:`VersionConflict` otherwise.
+    Bulk writes (``QuerySet.update``, ``bulk_update``) must bump the column
+    themselves.
+    """
+
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if self._state.adding:
+            return super().save(*args, update_fields=update_fields, **kwargs)
+        self._expected_version = self.version
+        self.version += 1
+        if update_fields is not None:
+            update_fields = {*update_fields, 'version'}
+        try:
+            super().save(*args, update_fields=update_fields, **kwargs)
+        except BaseException:
+            self.version = self._expected_version
+            raise
+        finally:
+            del self._expected_version
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(f'{self._meta.label} {pk_val} is no longer at version {expected}.')
+        return False
+
+
+class IdempotencyKey(models.Model):
+    """A client's ``Idempotency-Key`` for one write and the response it produced.
+
+    The row is inserted in the same transaction as the write, so the unique
+    constraint makes a concurrent duplicate wait for the first request and
+    then replay its response (see ``core.idempotency``).
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='core_idempotency_key_unique')]
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+    def __str__(self) -> str:
+        return f"{self.user_id}:{self.key}"
+
+
+class ReplicaPin(models.Model):
+    """Keeps an API client on the primary until ``pinned_until`` (see ``core.replicas``).
+
+    Token clients send no cookies, and the default cache is local to each
+    worker, so the marker lives where every worker can read it.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    pinned_until = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Replica Pin"
+        verbose_name_plural = "Replica Pins"
+
+    def __str__(self) -> str:
+        return f"{self.user_id} until {self.pinned_until}"
+
+
+class CacheVersion(models.Model):
+    """A named counter that versions per-process caches (see ``core.cache_versions``).
+
+    The default cache is local to each worker, so a version kept there only
+    reaches the worker that bumped it. The database is shared by all of them.
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Cache Version"
+        verbose_name_plural = "Cache Versions"
+
+    def __str__(self) -> str:
+        return f"{self.name}@{self.version}"
+
+
 class BaseMenu(TimeStampedModel):
     """Base model for menus"""
     
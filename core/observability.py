@@ -0,0 +1,77 @@
+"""Deferred error-tracking setup.
+
+``config.settings`` only records the Sentry options. The SDK and its
+transport (urllib3) are imported when a worker serves its first request, so
+cold starts don't pay for them. Management commands other than the
+development servers never serve a request, so they initialise it right away.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import request_started
+
+SERVING_COMMANDS = {'runserver', 'testserver'}
+
+_lock = threading.Lock()
+_initialized = False
+
+
+def init_sentry() -> bool:
+    """Initialise Sentry once per process; return whether it is active."""
+    global _initialized
+    if _initialized or not settings.SENTRY_DSN:
+        return _initialized
+    with _lock:
+        if _initialized:
+            return True
+        import sentry_sdk
+        from sentry_sdk.integrations.django import DjangoIntegration
+        from sentry_sdk.integrations.logging import LoggingIntegration
+
+        sentry_sdk.init(
+            dsn=settings.SENTRY_DSN,
+            environment=settings.SENTRY_ENVIRONMENT,
+            release=settings.APP_VERSION,
+            integrations=[
+                DjangoIntegration(),
+                LoggingIntegration(level=logging.INFO, event_level=logging.ERROR),
+            ],
+            traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+            profiles_sample_rate=settings.SENTRY_PROFILES_SAMPLE_RATE,
+            send_default_pii=True,
+        )
+        _initialized = True
+    return True
+
+
+def _init_on_first_request(sender, **kwargs):
+    request_started.disconnect(dispatch_uid='core-sentry-lazy-init')
+    init_sentry()
+
+
+def running_management_command(argv: list[str] | None = None) -> bool:
+    """Whether this process runs a ``manage.py``/``django-admin`` command that serves no requests."""
+    argv = sys.argv if argv is None else argv
+    if not argv:
+        return False
+    program = Path(argv[0])
+    is_django_cli = program.name in {'manage.py', 'django-admin'} or (
+        program.name == '__main__.py' and program.parent.name == 'django'
+    )
+    return is_django_cli and (len(argv) < 2 or argv[1] not in SERVING_COMMANDS)
+
+
+def install() -> None:
+    """Called from ``CoreConfig.ready``: schedule or run Sentry initialisation."""
+    if not settings.SENTRY_DSN:
+        return
+    if settings.SENTRY_EAGER_INIT or running_management_command():
+        init_sentry()
+    else:
+        request_started.connect(_init_on_first_request, dispatch_uid='core-sentry-lazy-init')
@@ -0,0 +1,164 @@
+"""Optional read replica with read-your-writes stickiness.
+
+With ``DATABASE_REPLICA_URL`` set, ``ReplicaRoutingMiddleware`` gives each
+request a :class:`RequestState` and ``ReplicaReadMixin`` opts safe-method
+requests of the public menu and catalog viewsets into reading from the
+replica. Everything else, and every write, uses ``default``.
+
+A request that writes pins its client to the primary for
+``REPLICA_PIN_SECONDS``: browsers through a cookie, authenticated API
+clients (token auth sends no cookies) through a :class:`~core.models.ReplicaPin`
+row on the primary. The default cache is per process, so a pin kept there
+would not follow the client to another worker.
+The replica is also skipped while its lag exceeds ``REPLICA_MAX_LAG_SECONDS``;
+lag is measured at most every ``REPLICA_LAG_CHECK_SECONDS`` per process.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextvars import ContextVar, Token
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+
+from .models import ReplicaPin
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+
+# Postgres standby: seconds behind the primary, 0 once everything received is
+# replayed (an idle primary would otherwise look like growing lag).
+LAG_SQL = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class RequestState:
+    """Per-request routing state; shared by reference with worker threads."""
+
+    __slots__ = ('read_alias', 'wrote')
+
+    def __init__(self):
+        self.read_alias = DEFAULT_DB_ALIAS
+        self.wrote = False
+
+
+_state: ContextVar[RequestState | None] = ContextVar('replica_request_state', default=None)
+
+
+def bind(state: RequestState) -> Token:
+    return _state.set(state)
+
+
+def unbind(token: Token) -> None:
+    _state.reset(token)
+
+
+def replica_configured() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+# Replica health ---------------------------------------------------------------
+_health = {'checked_at': float('-inf'), 'available': False}
+
+
+def replica_lag() -> float:
+    """Seconds the replica is behind; 0 where lag cannot be measured (SQLite)."""
+    connection = connections[REPLICA_ALIAS]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        (lag,) = cursor.fetchone()
+    return float(lag or 0)
+
+
+def replica_available() -> bool:
+    """Whether the replica answers and is within the lag budget (cached briefly)."""
+    now = time.monotonic()
+    if now - _health['checked_at'] < settings.REPLICA_LAG_CHECK_SECONDS:
+        return _health['available']
+    try:
+        lag = replica_lag()
+        available = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not available:
+            logger.warning('Read replica is %.1fs behind; reading from the primary.', lag)
+    except DatabaseError:
+        logger.warning('Read replica is unreachable; reading from the primary.', exc_info=True)
+        available = False
+    _health.update(checked_at=now, available=available)
+    return available
+
+
+# Pinning ----------------------------------------------------------------------
+def _authenticated_user_id(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def is_pinned(request) -> bool:
+    if settings.REPLICA_PIN_COOKIE in request.COOKIES:
+        return True
+    user_id = _authenticated_user_id(request)
+    if user_id is None:
+        return False
+    pins = ReplicaPin.objects.using(DEFAULT_DB_ALIAS)
+    return pins.filter(user_id=user_id, pinned_until__gt=timezone.now()).exists()
+
+
+def pin(request, response) -> None:
+    """Keep this client on the primary until the replica has caught up."""
+    seconds = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(
+        settings.REPLICA_PIN_COOKIE,
+        '1',
+        max_age=seconds,
+        httponly=True,
+        samesite='Lax',
+        secure=request.is_secure(),
+    )
+    user_id = _authenticated_user_id(request)
+    if user_id is not None:
+        ReplicaPin.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+            [ReplicaPin(user_id=user_id, pinned_until=timezone.now() + timedelta(seconds=seconds))],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['pinned_until'],
+        )
+
+
+def use_replica_for_reads(request) -> bool:
+    """Route the rest of this request's reads to the replica when that is safe."""
+    state = _state.get()
+    if state is None or not replica_configured() or is_pinned(request) or not replica_available():
+        return False
+    state.read_alias = REPLICA_ALIAS
+    return True
+
+
+class ReplicaRouter:
+    """Reads follow the request's state; writes always go to ``default``."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        return state.read_alias if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication.
+        return False if db == REPLICA_ALIAS else None
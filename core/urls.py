@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
-from .views import HealthcheckView
+
+from .async_views import healthcheck
+from .views import HealthcheckView, MetricsView
 
 urlpatterns = [
-    path('health/', HealthcheckView.as_view(), name='core-health'),
+    path('health/', healthcheck if settings.ASYNC_PUBLIC_VIEWS else HealthcheckView.as_view(), name='core-health'),
+    path('metrics/', MetricsView.as_view(), name='core-metrics'),
 ]
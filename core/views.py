@@ -1,9 +1,13 @@
 from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from . import metrics
+
 
 class HealthcheckView(APIView):
     """Lightweight endpoint for load balancers and uptime monitors."""
@@ -21,3 +25,30 @@ class HealthcheckView(APIView):
                 'revision': settings.APP_COMMIT_SHA,
             }
         )
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint aggregating every worker in the container.
+
+    Closed by default: scrapers send ``Authorization: Bearer <METRICS_TOKEN>``,
+    and staff users signed in through the usual authentication may read it too.
+    """
+
+    permission_classes = [AllowAny]
+    throttle_classes = []
+
+    def _authorized(self, request) -> bool:
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        provided = request.headers.get('Authorization', '')
+        if token and provided.startswith('Bearer '):
+            return constant_time_compare(provided.removeprefix('Bearer ').strip(), token)
+        return bool(request.user and request.user.is_staff)
+
+    def get(self, request):
+        if not self._authorized(request):
+            return Response({'detail': 'Forbidden'}, status=403)
+        if not metrics.is_enabled():
+            return Response({'detail': 'Metrics are disabled.'}, status=404)
+
+        body = metrics.render_prometheus(metrics.get_registry().collect())
+        return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -3,14 +3,20 @@
 from __future__ import annotations
 
 import logging
+from typing import NamedTuple
 
 from django.db.models import QuerySet
 from django.db.utils import ProgrammingError
 from django.core.exceptions import FieldError
+from django.utils.http import parse_etags
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.response import Response
 
+from . import replicas
+from .models import VersionConflict
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +36,19 @@ class AdminWritePermissionMixin:
         return [permission() for permission in permission_classes]
 
 
+class ReplicaReadMixin:
+    """Serve safe-method requests from the read replica when one is configured.
+
+    Decided after authentication so a client that just wrote, by cookie or by
+    user, keeps reading its own writes from the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            replicas.use_replica_for_reads(request)
+
+
 class PublicQuerysetMixin:
     """Filter read-only actions to public records while keeping admin access."""
 
@@ -67,6 +86,62 @@ class PublicQuerysetMixin:
         return self.filter_queryset_for_public(queryset)
 
 
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource was changed since it was read; reload it and retry.'
+    default_code = 'precondition_failed'
+
+
+class VersionedUpdateMixin:
+    """Optimistic concurrency for viewsets over ``core.models.VersionedModel``.
+
+    Updates are conditional on the version the client read, sent as
+    ``If-Match: "<version>"`` or a ``version`` field in the body; a mismatch
+    is a 412 instead of a lost update. Without either the row is still
+    updated conditionally on the version just loaded. Single-object
+    responses carry the version as their ETag.
+    """
+
+    def get_expected_version(self) -> int | None:
+        header = self.request.headers.get('If-Match')
+        if header:
+            tags = parse_etags(header)
+            if tags == ['*']:
+                return None
+            if len(tags) != 1:
+                raise ValidationError({'If-Match': 'Send the single version that was read.'})
+            raw = tags[0].removeprefix('W/').strip('"')
+        else:
+            data = self.request.data
+            raw = data.get('version') if hasattr(data, 'get') else None
+            if raw is None:
+                return None
+        try:
+            return int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({'version': 'Must be an integer.'})
+
+    def perform_update(self, serializer):
+        expected = self.get_expected_version()
+        if expected is not None:
+            if expected != serializer.instance.version:
+                raise PreconditionFailed()
+            # The UPDATE is conditional on this; it catches writes since get_object().
+            serializer.instance.version = expected
+        try:
+            super().perform_update(serializer)
+        except VersionConflict:
+            raise PreconditionFailed()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'detail', False) or self.action == 'create':
+            version = response.data.get('version') if isinstance(response.data, dict) else None
+            if version is not None:
+                response['ETag'] = f'"{version}"'
+        return response
+
+
 class SafeQuerysetMixin:
     """Wrap database access so missing tables don't crash the API."""
 
@@ -115,7 +190,16 @@ class MenuTypeActionMixin:
         return Response(serializer.data)
 
 
+class PublicMenuAction(NamedTuple):
+    """How a public menu action picks its menu (mirrored by core.async_views)."""
+
+    menu_type: str | None
+    fallback_first: bool = False
+    not_found_attr: str = 'menu_not_found_message'
+
+
 class BaseMenuViewSet(
+    ReplicaReadMixin,
     AdminWritePermissionMixin,
     SafeQuerysetMixin,
     PublicQuerysetMixin,
@@ -127,6 +211,13 @@ class BaseMenuViewSet(
     public_filter_field = 'is_active'
     main_menu_not_found_message = 'No active menu found'
     todays_not_found_message = "No today's special menu found"
+    # Actions served by the async fast path when ASYNC_PUBLIC_VIEWS is on;
+    # ``menu_type=None`` lists every active menu.
+    public_menu_actions = {
+        'main': PublicMenuAction('main', fallback_first=True, not_found_attr='main_menu_not_found_message'),
+        'today': PublicMenuAction('today', not_found_attr='todays_not_found_message'),
+        'all': PublicMenuAction(None),
+    }
 
     @action(detail=False, methods=['get'])
     def main(self, request):
@@ -152,6 +243,7 @@ class BaseMenuViewSet(
 
 
 class BaseMenuItemViewSet(
+    ReplicaReadMixin,
     AdminWritePermissionMixin,
     SafeQuerysetMixin,
     PublicQuerysetMixin,
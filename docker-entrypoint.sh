@@ -26,49 +26,17 @@ prepare_directories() {
     fi
 }
 
-wait_for_db() {
-    run_as_app python <<'PY'
-import os
-import time
-import django
-from django.db import connections
-from django.db.utils import OperationalError
-
-django.setup()
-timeout = int(os.environ.get('DB_WAIT_TIMEOUT', '60'))
-interval = max(1, int(os.environ.get('DB_WAIT_INTERVAL', '2')))
-deadline = time.monotonic() + timeout
-conn = connections['default']
-while True:
-    try:
-        conn.ensure_connection()
-        conn.close()
-        break
-    except OperationalError as exc:
-        if time.monotonic() >= deadline:
-            raise RuntimeError('Database is unavailable') from exc
-        time.sleep(interval)
-PY
-}
-
 log "Preparing static and media directories..."
 prepare_directories
 
-log "Waiting for database..."
-wait_for_db
-
-log "Generating migrations..."
-run_as_app python manage.py makemigrations miyanGroup miyanMadi miyanBeresht core inventory || true
-
-log "Applying database migrations..."
-run_as_app python manage.py migrate --noinput
-
-log "Seeding curated menu and inventory data..."
-run_as_app python manage.py seed_items --with-inventory || true
-run_as_app python manage.py seed_inventory_items || true
+# One Django process waits for the database, migrates, seeds and collects
+# static files; phases with nothing to do are skipped. See core/management/
+# commands/bootstrap.py for flags.
+log "Bootstrapping application..."
+run_as_app python manage.py bootstrap ${BOOTSTRAP_ARGS:-}
 
-log "Collecting static assets..."
-run_as_app python manage.py collectstatic --noinput
+# bootstrap already collected static files; don't repeat it in every worker.
+export DJANGO_AUTO_COLLECTSTATIC=0
 
 log "Starting Gunicorn..."
 if [ "$(id -u)" = "0" ]; then
@@ -1,6 +1,9 @@
+from decimal import Decimal
+
 from django.contrib import admin
 
-from . import models
+from core.admin import LargeTableAdminMixin
+from . import costing, ledger, models
 
 
 @admin.register(models.BasicItem)
@@ -11,37 +14,124 @@ class BasicItemAdmin(admin.ModelAdmin):
 
 class RecipeIngredientInline(admin.TabularInline):
     model = models.RecipeIngredient
+    fk_name = 'recipe'
     extra = 0
-    autocomplete_fields = ('basic_item',)
+    autocomplete_fields = ('basic_item', 'sub_recipe')
+
+    def get_queryset(self, request):
+        # __str__ of each row reads the recipe, item and unit.
+        return super().get_queryset(request).select_related('recipe', 'basic_item', 'sub_recipe')
 
 
 @admin.register(models.Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'price', 'created_at', 'updated_at')
+    list_display = ('id', 'name', 'price', 'cost', 'margin', 'created_at', 'updated_at')
     search_fields = ('name',)
+    readonly_fields = ('cost',)
     inlines = [RecipeIngredientInline]
 
+    def delete_model(self, request, obj):
+        costing.delete_recipes(models.Recipe.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        costing.delete_recipes(queryset)
+
+
+class LedgerStockAdminMixin:
+    """Write a SET adjustment for every quantity edited through the admin."""
+
+    def save_model(self, request, obj, form, change):
+        stock_before = form.initial.get('quantity', Decimal('0')) if change else Decimal('0')
+        # changeform_view already runs in a transaction.
+        super().save_model(request, obj, form, change)
+        ledger.record_direct_edit(obj, Decimal(stock_before), note='Stock edited in admin')
+
 
 @admin.register(models.BranchBasicItemStock)
-class BranchBasicItemStockAdmin(admin.ModelAdmin):
+class BranchBasicItemStockAdmin(LedgerStockAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'branch', 'item', 'quantity', 'updated_at')
+    list_select_related = ('branch', 'item')
     list_filter = ('branch',)
     search_fields = ('item__name',)
     autocomplete_fields = ('branch', 'item')
 
 
 @admin.register(models.BranchRecipeStock)
-class BranchRecipeStockAdmin(admin.ModelAdmin):
+class BranchRecipeStockAdmin(LedgerStockAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'branch', 'recipe', 'quantity', 'updated_at')
+    list_select_related = ('branch', 'recipe')
     list_filter = ('branch',)
     search_fields = ('recipe__name',)
     autocomplete_fields = ('branch', 'recipe')
 
 
 @admin.register(models.InventoryAdjustment)
-class InventoryAdjustmentAdmin(admin.ModelAdmin):
+class InventoryAdjustmentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'branch', 'item_type', 'mode', 'quantity', 'stock_before', 'stock_after', 'created_at', 'recorded_by')
+    list_select_related = ('branch', 'recorded_by__user')
     list_filter = ('branch', 'item_type', 'mode')
-    search_fields = ('basic_item__name', 'recipe__name', 'note')
+    date_hierarchy = 'created_at'
+    ordering = ('-id',)
+    search_fields = ('basic_item__name', 'recipe__name', 'note', '=batch_id')
     autocomplete_fields = ('branch', 'basic_item', 'recipe', 'recorded_by')
+    readonly_fields = ('batch_id', 'consumption')
+
+
+class RecipeConsumptionLineInline(admin.TabularInline):
+    model = models.RecipeConsumptionLine
+    extra = 0
+    can_delete = False
+    readonly_fields = ('recipe', 'quantity')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('recipe')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(models.RecipeConsumption)
+class RecipeConsumptionAdmin(admin.ModelAdmin):
+    # Stock is only deducted through the consumption endpoint; the admin is read-only.
+    list_display = ('id', 'branch', 'note', 'recorded_by', 'created_at')
+    list_select_related = ('branch', 'recorded_by__user')
+    list_filter = ('branch',)
+    ordering = ('-id',)
+    search_fields = ('note', 'lines__recipe__name')
+    readonly_fields = ('branch', 'note', 'recorded_by')
+    inlines = [RecipeConsumptionLineInline]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(models.InventoryCheckpoint)
+class InventoryCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('id', 'branch', 'item_type', 'basic_item', 'recipe', 'quantity', 'taken_at')
+    list_select_related = ('branch', 'basic_item', 'recipe')
+    list_filter = ('branch', 'item_type')
+    search_fields = ('basic_item__name', 'recipe__name')
+    date_hierarchy = 'taken_at'
+
+
+@admin.register(models.DailyStockRollup)
+class DailyStockRollupAdmin(admin.ModelAdmin):
+    list_display = ('id', 'branch', 'day', 'item_type', 'basic_item', 'recipe', 'inbound', 'outbound', 'corrections', 'entries')
+    list_select_related = ('branch', 'basic_item', 'recipe')
+    list_filter = ('branch', 'item_type')
+    search_fields = ('basic_item__name', 'recipe__name')
+    date_hierarchy = 'day'
+
+
+@admin.register(models.DailyInputRollup)
+class DailyInputRollupAdmin(admin.ModelAdmin):
+    list_display = ('id', 'branch', 'day', 'item', 'quantity', 'entries')
+    list_select_related = ('branch', 'item__branch')
+    list_filter = ('branch',)
+    search_fields = ('item__name',)
+    date_hierarchy = 'day'
+
 
+@admin.register(models.RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_id', 'updated_at')
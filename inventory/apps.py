@@ -5,3 +5,7 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
 
+    def ready(self):
+        from .costing import connect_cost_rollup
+
+        connect_cost_rollup()
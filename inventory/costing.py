@@ -0,0 +1,116 @@
+"""Stored recipe costs, kept current from ingredient and unit-price changes.
+
+``Recipe.cost`` is the sum of ``amount * unit_price`` over basic-item
+ingredients plus ``amount * cost`` over sub-recipes. It is written, not
+computed on read, so listing recipes needs no aggregation. The recipe graph
+(``inventory.recipe_graph``) is the reverse index: a unit-price change
+recomputes only the recipes that use that item and the recipes built on
+them, one UPDATE per dependency layer.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+
+from sync import changelog
+from .recipe_graph import get_recipe_graph, invalidate_recipe_graph
+
+COST_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+_rollup_deferred: ContextVar[bool] = ContextVar('recipe_cost_rollup_deferred', default=False)
+
+
+def cost_expression(ingredient_model):
+    """Per-recipe ingredient cost as a correlated subquery on ``OuterRef('pk')``."""
+    unit_cost = Coalesce(F('basic_item__unit_price'), F('sub_recipe__cost'))
+    total = (
+        ingredient_model.objects.filter(recipe=OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(total=Sum(F('amount') * unit_cost, output_field=COST_FIELD))
+        .values('total')[:1]
+    )
+    return Coalesce(Subquery(total), Value(Decimal('0')), output_field=COST_FIELD)
+
+
+def recompute_recipe_costs(recipe_ids=None) -> int:
+    """Recompute ``recipe_ids`` (all recipes when None) and every recipe using them.
+
+    Sub-recipes are updated before the recipes that contain them.
+    """
+    from .models import Recipe, RecipeIngredient
+
+    graph = get_recipe_graph()
+    if recipe_ids is None:
+        affected = set(Recipe.objects.values_list('pk', flat=True))
+    else:
+        affected = set(recipe_ids) | graph.ancestors(recipe_ids)
+    expression = cost_expression(RecipeIngredient)
+    updated = sum(
+        Recipe.objects.filter(pk__in=layer).update(cost=expression) for layer in graph.layers(affected)
+    )
+    if updated:
+        changelog.record_queryset(Recipe.objects.filter(pk__in=affected), changelog.Action.UPDATE)
+    return updated
+
+
+def recompute_costs_for_basic_items(basic_item_ids) -> int:
+    """Recompute every recipe that uses one of ``basic_item_ids``, at any depth."""
+    graph = get_recipe_graph()
+    return recompute_recipe_costs(
+        {recipe_id for item_id in basic_item_ids for recipe_id in graph.used_by_item.get(item_id, ())}
+    )
+
+
+def _on_basic_item_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A new item is not used by any recipe yet.
+    if created or (update_fields is not None and 'unit_price' not in update_fields):
+        return
+    recompute_costs_for_basic_items([instance.pk])
+
+
+def ingredients_changed(recipe_ids) -> int:
+    """Rebuild the graph and costs after the ingredients of ``recipe_ids`` changed."""
+    invalidate_recipe_graph()
+    return recompute_recipe_costs(recipe_ids)
+
+
+@contextmanager
+def deferred_cost_rollup():
+    """Ignore ingredient signals inside the block; the caller calls :func:`ingredients_changed` once."""
+    token = _rollup_deferred.set(True)
+    try:
+        yield
+    finally:
+        _rollup_deferred.reset(token)
+
+
+def delete_recipes(recipes) -> None:
+    """Delete a ``Recipe`` queryset, rebuilding the graph once for all cascaded ingredients.
+
+    Sub-recipes are protected from deletion, so no remaining recipe's cost
+    depends on the deleted ones and nothing is recomputed.
+    """
+    with transaction.atomic(), deferred_cost_rollup():
+        recipes.delete()
+        invalidate_recipe_graph()
+
+
+def _on_ingredient_changed(sender, instance, **kwargs):
+    if not _rollup_deferred.get():
+        ingredients_changed([instance.recipe_id])
+
+
+def connect_cost_rollup() -> None:
+    from .models import BasicItem, RecipeIngredient
+
+    post_save.connect(_on_basic_item_saved, sender=BasicItem, dispatch_uid='recipe-cost-basic-item')
+    post_save.connect(_on_ingredient_changed, sender=RecipeIngredient, dispatch_uid='recipe-cost-ingredient-save')
+    post_delete.connect(_on_ingredient_changed, sender=RecipeIngredient, dispatch_uid='recipe-cost-ingredient-delete')
@@ -0,0 +1,142 @@
+"""Point-in-time stock balances from the adjustment ledger.
+
+``InventoryAdjustment`` is the authoritative history: every change to a stock
+row goes through it, and ``stock_after - stock_before`` is the movement of
+each entry. ``InventoryCheckpoint`` rows store the balance at regular
+intervals so a historical balance only has to sum the movements since the
+nearest checkpoint.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import (
+    Count,
+    DateTimeField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import models
+
+ItemType = models.InventoryAdjustment.ItemType
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+QUANTITY_FIELD = DecimalField(max_digits=14, decimal_places=3)
+
+# item type -> (stock model, stock FK name, ledger FK name)
+STOCK_MODELS = {
+    ItemType.BASIC: (models.BranchBasicItemStock, 'item', 'basic_item'),
+    ItemType.RECIPE: (models.BranchRecipeStock, 'recipe', 'recipe'),
+}
+
+
+def parse_as_of(value: str) -> datetime:
+    """Accept an ISO datetime or a date (meaning the end of that day)."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError('Use an ISO date or datetime.')
+        moment = datetime.combine(day, time.max)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def annotate_balance_as_of(queryset, item_type: str, as_of: datetime):
+    """Annotate stock rows with ``balance_as_of``, computed in the same query.
+
+    balance = latest checkpoint at or before ``as_of`` (or 0) + the sum of
+    ledger movements after that checkpoint up to ``as_of``. Rows created
+    after ``as_of`` are excluded.
+    """
+    _, stock_fk, ledger_fk = STOCK_MODELS[item_type]
+    checkpoints = models.InventoryCheckpoint.objects.filter(
+        branch=OuterRef('branch'),
+        item_type=item_type,
+        **{ledger_fk: OuterRef(stock_fk)},
+        taken_at__lte=as_of,
+    ).order_by('-taken_at')
+    movements = (
+        models.InventoryAdjustment.objects.filter(
+            branch=OuterRef('branch'),
+            **{ledger_fk: OuterRef(stock_fk)},
+            created_at__lte=as_of,
+            created_at__gt=Coalesce(OuterRef('checkpoint_at'), Value(EPOCH, output_field=DateTimeField())),
+        )
+        .order_by()
+        .values(ledger_fk)
+    )
+    zero = Value(Decimal('0'), output_field=QUANTITY_FIELD)
+    return (
+        queryset.filter(created_at__lte=as_of)
+        .annotate(
+            checkpoint_at=Subquery(checkpoints.values('taken_at')[:1]),
+            checkpoint_quantity=Coalesce(Subquery(checkpoints.values('quantity')[:1]), zero),
+            movement_total=Coalesce(
+                Subquery(
+                    movements.annotate(
+                        total=Sum(F('stock_after') - F('stock_before'), output_field=QUANTITY_FIELD)
+                    ).values('total')[:1]
+                ),
+                zero,
+            ),
+            movement_count=Coalesce(
+                Subquery(movements.annotate(count=Count('id')).values('count')[:1]), Value(0)
+            ),
+        )
+        .annotate(
+            balance_as_of=ExpressionWrapper(
+                F('checkpoint_quantity') + F('movement_total'), output_field=QUANTITY_FIELD
+            )
+        )
+    )
+
+
+def create_checkpoints(at: datetime | None = None) -> int:
+    """Store balances at ``at`` for every row that moved since its last checkpoint."""
+    at = at or timezone.now()
+    created = 0
+    for item_type, (stock_model, stock_fk, ledger_fk) in STOCK_MODELS.items():
+        rows = annotate_balance_as_of(stock_model.objects.all(), item_type, at).filter(movement_count__gt=0)
+        checkpoints = [
+            models.InventoryCheckpoint(
+                branch_id=row.branch_id,
+                item_type=item_type,
+                quantity=row.balance_as_of,
+                taken_at=at,
+                **{f'{ledger_fk}_id': getattr(row, f'{stock_fk}_id')},
+            )
+            for row in rows
+        ]
+        created += len(models.InventoryCheckpoint.objects.bulk_create(checkpoints, ignore_conflicts=True))
+    return created
+
+
+def record_direct_edit(row, stock_before: Decimal, *, recorded_by=None, note: str = 'Stock edited directly'):
+    """Keep the ledger authoritative when a stock row is edited outside adjustments."""
+    if row.quantity == stock_before:
+        return None
+    item_type = ItemType.BASIC if isinstance(row, models.BranchBasicItemStock) else ItemType.RECIPE
+    _, stock_fk, ledger_fk = STOCK_MODELS[item_type]
+    return models.InventoryAdjustment.objects.create(
+        branch_id=row.branch_id,
+        item_type=item_type,
+        mode=models.InventoryAdjustment.Mode.SET,
+        quantity=row.quantity,
+        stock_before=stock_before,
+        stock_after=row.quantity,
+        note=note,
+        recorded_by=recorded_by,
+        **{f'{ledger_fk}_id': getattr(row, f'{stock_fk}_id')},
+    )
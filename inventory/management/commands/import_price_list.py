@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import pricelist
+
+
+class Command(BaseCommand):
+    help = "Preview or apply a supplier CSV price list (name, unit, price) against BasicItem."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file; UTF-8 or Windows-1256.')
+        parser.add_argument('--apply', action='store_true', help='Write the changes (default: preview only).')
+        parser.add_argument(
+            '--prune-missing',
+            action='store_true',
+            help='With --apply, delete BasicItem rows not present in the price list unless still in use.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rows = pricelist.parse_price_list(pricelist.decode_upload(Path(options['path']).read_bytes()))
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except pricelist.PriceListError as exc:
+            raise CommandError('\n'.join(f'line {line}: {message}' for line, message in exc.errors.items()))
+
+        diff = pricelist.diff_price_list(rows)
+        for row in diff.created:
+            self.stdout.write(f'    new: {row.name} ({row.unit}) {row.unit_price}')
+        for item, row in diff.updated:
+            self.stdout.write(f'changed: {item.name} {item.unit} {item.unit_price} -> {row.unit} {row.unit_price}')
+        for item in diff.missing:
+            self.stdout.write(f'missing: {item.name}')
+        self.stdout.write(
+            f'{len(diff.created)} new, {len(diff.updated)} changed, {diff.unchanged} unchanged, {len(diff.missing)} missing.'
+        )
+
+        if not options['apply']:
+            self.stdout.write(self.style.WARNING('Preview only; re-run with --apply to write the changes.'))
+            return
+        recosted = pricelist.apply_price_list(diff, prune_missing=options['prune_missing'])
+        for item in diff.protected:
+            self.stdout.write(self.style.WARNING(f'kept: {item.name} (still used by recipes or stock history)'))
+        self.stdout.write(self.style.SUCCESS(f'Price list applied; {recosted} recipe cost(s) recomputed.'))
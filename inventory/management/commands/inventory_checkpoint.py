@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import ledger
+
+
+class Command(BaseCommand):
+    help = "Store ledger balances for every stock row that moved since its last checkpoint (run daily)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at', help='Checkpoint time (ISO date or datetime); defaults to now.')
+
+    def handle(self, *args, **options):
+        try:
+            at = ledger.parse_as_of(options['at']) if options['at'] else None
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        created = ledger.create_checkpoints(at)
+        self.stdout.write(self.style.SUCCESS(f'Created {created} inventory checkpoint(s).'))
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from inventory import rollups
+
+
+class Command(BaseCommand):
+    help = "Fold new inventory adjustments and inputs into the daily rollup tables (run every few minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settle-seconds',
+            type=int,
+            help='Skip rows younger than this (default: INVENTORY_ROLLUP_SETTLE_SECONDS).',
+        )
+        parser.add_argument('--rebuild', action='store_true', help='Drop the rollups and rebuild them from scratch.')
+
+    def handle(self, *args, **options):
+        refresh = rollups.rebuild_all if options['rebuild'] else rollups.refresh_all
+        counts = refresh(settle_seconds=options['settle_seconds'])
+        for name, count in counts.items():
+            self.stdout.write(f'{name:<12} {count} new row(s)')
+        self.stdout.write(self.style.SUCCESS('Inventory rollups refreshed.'))
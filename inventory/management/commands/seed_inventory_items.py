@@ -5,7 +5,7 @@ from typing import Sequence
 
 from django.core.management.base import BaseCommand
 
-from inventory.models import BasicItem
+from inventory import pricelist
 
 INVENTORY_ITEMS: Sequence[tuple[str, str, str]] = [
     ('آبلیمو', '1 لیتری', '305000'),
@@ -106,24 +106,21 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         prune_missing: bool = options['prune_missing']
-        keep_ids: list[int] = []
+        rows = [
+            pricelist.PriceRow(name=pricelist.normalize_name(name), unit=unit, unit_price=Decimal(price))
+            for name, unit, price in INVENTORY_ITEMS
+        ]
+        diff = pricelist.diff_price_list(rows)
+        pricelist.apply_price_list(diff, prune_missing=prune_missing)
 
-        for name, unit, price in INVENTORY_ITEMS:
-            unit_price = Decimal(price)
-            obj, created = BasicItem.objects.update_or_create(
-                name=name,
-                defaults={'unit': unit, 'unit_price': unit_price},
+        for row in diff.created:
+            self.stdout.write(f"created: {row.name}")
+        for item, _ in diff.updated:
+            self.stdout.write(f"updated: {item.name}")
+        if prune_missing and diff.missing:
+            self.stdout.write(
+                self.style.WARNING(f"pruned: {len(diff.missing)} item(s) not in curated list")
             )
-            keep_ids.append(obj.id)
-            action = 'created' if created else 'updated'
-            self.stdout.write(f"{action:>7}: {obj.name}")
-
-        if prune_missing:
-            deleted, _ = BasicItem.objects.exclude(id__in=keep_ids).delete()
-            if deleted:
-                self.stdout.write(
-                    self.style.WARNING(f"pruned: {deleted} item(s) not in curated list")
-                )
 
         self.stdout.write(
             self.style.SUCCESS(
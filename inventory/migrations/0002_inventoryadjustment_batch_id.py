@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryadjustment',
+            name='batch_id',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, help_text='Shared by adjustments recorded together through the batch endpoint.', null=True),
+        ),
+    ]
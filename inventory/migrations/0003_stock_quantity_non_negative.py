@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_inventoryadjustment_batch_id'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='branchbasicitemstock',
+            constraint=models.CheckConstraint(check=models.Q(('quantity__gte', 0)), name='branch_basic_item_stock_quantity_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='branchrecipestock',
+            constraint=models.CheckConstraint(check=models.Q(('quantity__gte', 0)), name='branch_recipe_stock_quantity_non_negative'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_opening_checkpoints(apps, schema_editor):
+    """Anchor the ledger at the current quantities, whatever happened before."""
+    from django.utils import timezone
+
+    Checkpoint = apps.get_model('inventory', 'InventoryCheckpoint')
+    now = timezone.now()
+    for model_name, item_type, stock_fk, ledger_fk in (
+        ('BranchBasicItemStock', 'basic', 'item_id', 'basic_item_id'),
+        ('BranchRecipeStock', 'recipe', 'recipe_id', 'recipe_id'),
+    ):
+        Stock = apps.get_model('inventory', model_name)
+        Checkpoint.objects.bulk_create(
+            [
+                Checkpoint(
+                    branch_id=row.branch_id,
+                    item_type=item_type,
+                    quantity=row.quantity,
+                    taken_at=now,
+                    **{ledger_fk: getattr(row, stock_fk)},
+                )
+                for row in Stock.objects.all().iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miyanGroup', '0002_seed_branches'),
+        ('inventory', '0003_stock_quantity_non_negative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item_type', models.CharField(choices=[('basic', 'Basic Item'), ('recipe', 'Recipe')], max_length=16)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('taken_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Inventory Checkpoint',
+                'verbose_name_plural': 'Inventory Checkpoints',
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['branch', 'basic_item', 'created_at'], name='inv_adj_basic_ledger_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['branch', 'recipe', 'created_at'], name='inv_adj_recipe_ledger_idx'),
+        ),
+        migrations.AddField(
+            model_name='inventorycheckpoint',
+            name='basic_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inventory_checkpoints', to='inventory.basicitem'),
+        ),
+        migrations.AddField(
+            model_name='inventorycheckpoint',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_checkpoints', to='miyanGroup.branch'),
+        ),
+        migrations.AddField(
+            model_name='inventorycheckpoint',
+            name='recipe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inventory_checkpoints', to='inventory.recipe'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorycheckpoint',
+            index=models.Index(fields=['branch', 'basic_item', 'taken_at'], name='inv_ckpt_basic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorycheckpoint',
+            index=models.Index(fields=['branch', 'recipe', 'taken_at'], name='inv_ckpt_recipe_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorycheckpoint',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('basic_item__isnull', False), ('item_type', 'basic'), ('recipe__isnull', True)), models.Q(('basic_item__isnull', True), ('item_type', 'recipe'), ('recipe__isnull', False)), _connector='OR'), name='inventory_checkpoint_item_matches_type'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorycheckpoint',
+            constraint=models.UniqueConstraint(condition=models.Q(('item_type', 'basic')), fields=('branch', 'basic_item', 'taken_at'), name='inventory_checkpoint_basic_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorycheckpoint',
+            constraint=models.UniqueConstraint(condition=models.Q(('item_type', 'recipe')), fields=('branch', 'recipe', 'taken_at'), name='inventory_checkpoint_recipe_unique'),
+        ),
+        migrations.RunPython(create_opening_checkpoints, migrations.RunPython.noop),
+    ]
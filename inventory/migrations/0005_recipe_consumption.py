@@ -0,0 +1,54 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:29
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miyanGroup', '0002_seed_branches'),
+        ('inventory', '0004_inventory_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_consumptions', to='miyanGroup.branch')),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recipe_consumptions', to='miyanGroup.staff')),
+            ],
+            options={
+                'verbose_name': 'Recipe Consumption',
+                'verbose_name_plural': 'Recipe Consumptions',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeConsumptionLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.001'))])),
+                ('consumption', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.recipeconsumption')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='consumption_lines', to='inventory.recipe')),
+            ],
+            options={
+                'verbose_name': 'Recipe Consumption Line',
+                'verbose_name_plural': 'Recipe Consumption Lines',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='inventoryadjustment',
+            name='consumption',
+            field=models.ForeignKey(blank=True, help_text='Recipe consumption that produced this ingredient movement.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='adjustments', to='inventory.recipeconsumption'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:30
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_recipe_costs(apps, schema_editor):
+    Recipe = apps.get_model('inventory', 'Recipe')
+    RecipeIngredient = apps.get_model('inventory', 'RecipeIngredient')
+    cost = models.DecimalField(max_digits=14, decimal_places=2)
+    total = (
+        RecipeIngredient.objects.filter(recipe=models.OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(total=models.Sum(models.F('amount') * models.F('basic_item__unit_price'), output_field=cost))
+        .values('total')[:1]
+    )
+    Recipe.objects.update(cost=Coalesce(models.Subquery(total), models.Value(Decimal('0')), output_field=cost))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_recipe_consumption'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='cost',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, help_text='Sum of ingredient amount x unit price; maintained by inventory.costing.', max_digits=14),
+        ),
+        migrations.RunPython(backfill_recipe_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:32
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_recipe_cost'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipeingredient',
+            options={'ordering': ['recipe__name', 'basic_item__name', 'sub_recipe__name'], 'verbose_name': 'Recipe Ingredient', 'verbose_name_plural': 'Recipe Ingredients'},
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='sub_recipe',
+            field=models.ForeignKey(blank=True, help_text='A prepared recipe (syrup, base, cold brew) used as an ingredient.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='used_in', to='inventory.recipe'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.DecimalField(decimal_places=3, help_text='Amount used per recipe unit (in the unit of the basic item, or units of the sub-recipe).', max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.0001'))]),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='basic_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='recipe_ingredients', to='inventory.basicitem'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('basic_item__isnull', False), ('sub_recipe__isnull', True)), models.Q(('basic_item__isnull', True), ('sub_recipe__isnull', False)), _connector='OR'), name='recipe_ingredient_single_component'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.CheckConstraint(check=models.Q(('sub_recipe', models.F('recipe')), _negated=True), name='recipe_ingredient_not_self'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(condition=models.Q(('sub_recipe__isnull', False)), fields=('recipe', 'sub_recipe'), name='recipe_ingredient_sub_recipe_unique'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:35
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miyanGroup', '0002_seed_branches'),
+        ('inventory', '0007_recipe_sub_recipes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+                'verbose_name_plural': 'Rollup Watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyInputRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField(help_text='Local day in INVENTORY_REPORT_TIME_ZONE.')),
+                ('quantity', models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=14)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='input_rollups', to='miyanGroup.branch')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='miyanGroup.inventoryitem')),
+            ],
+            options={
+                'verbose_name': 'Daily Input Rollup',
+                'verbose_name_plural': 'Daily Input Rollups',
+                'ordering': ['-day', 'branch__name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStockRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item_type', models.CharField(choices=[('basic', 'Basic Item'), ('recipe', 'Recipe')], max_length=16)),
+                ('day', models.DateField(help_text='Local day in INVENTORY_REPORT_TIME_ZONE.')),
+                ('inbound', models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=14)),
+                ('outbound', models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=14)),
+                ('corrections', models.DecimalField(decimal_places=3, default=Decimal('0'), help_text='Net change from set-mode adjustments.', max_digits=14)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('basic_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.basicitem')),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_rollups', to='miyanGroup.branch')),
+                ('recipe', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.recipe')),
+            ],
+            options={
+                'verbose_name': 'Daily Stock Rollup',
+                'verbose_name_plural': 'Daily Stock Rollups',
+                'ordering': ['-day', 'branch__name'],
+                'indexes': [models.Index(fields=['branch', 'day'], name='inv_stock_rollup_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailystockrollup',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('basic_item__isnull', False), ('item_type', 'basic'), ('recipe__isnull', True)), models.Q(('basic_item__isnull', True), ('item_type', 'recipe'), ('recipe__isnull', False)), _connector='OR'), name='daily_stock_rollup_item_matches_type'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystockrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('item_type', 'basic')), fields=('branch', 'basic_item', 'day'), name='daily_stock_rollup_basic_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystockrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('item_type', 'recipe')), fields=('branch', 'recipe', 'day'), name='daily_stock_rollup_recipe_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyinputrollup',
+            index=models.Index(fields=['branch', 'day'], name='inv_input_rollup_day_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyinputrollup',
+            unique_together={('branch', 'item', 'day')},
+        ),
+    ]
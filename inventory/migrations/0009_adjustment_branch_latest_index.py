@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['branch', '-id'], name='inv_adj_branch_latest_idx'),
+        ),
+    ]
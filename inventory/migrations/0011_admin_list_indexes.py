@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_versions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['created_at'], name='inv_adj_created_idx'),
+        ),
+    ]
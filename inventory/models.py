@@ -2,13 +2,14 @@ from __future__ import annotations
 
 from decimal import Decimal
 
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
 
-from core.models import TimeStampedModel
+from core.models import TimeStampedModel, VersionedModel
 
 
-class BasicItem(TimeStampedModel):
+class BasicItem(VersionedModel, TimeStampedModel):
     name = models.CharField(max_length=200, unique=True)
     unit = models.CharField(max_length=32)
     unit_price = models.DecimalField(
@@ -26,13 +27,20 @@ class BasicItem(TimeStampedModel):
         return self.name
 
 
-class Recipe(TimeStampedModel):
+class Recipe(VersionedModel, TimeStampedModel):
     name = models.CharField(max_length=200, unique=True)
     price = models.DecimalField(
         max_digits=14,
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0'))],
     )
+    cost = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0'),
+        editable=False,
+        help_text='Sum of ingredient amount x unit price; maintained by inventory.costing.',
+    )
 
     class Meta:
         ordering = ['name']
@@ -42,32 +50,79 @@ class Recipe(TimeStampedModel):
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def margin(self) -> Decimal:
+        return self.price - self.cost
+
 
 class RecipeIngredient(TimeStampedModel):
+    """One component of a recipe: either a basic item or another recipe."""
+
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredients')
     basic_item = models.ForeignKey(
         BasicItem,
         on_delete=models.PROTECT,
         related_name='recipe_ingredients',
+        null=True,
+        blank=True,
+    )
+    sub_recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.PROTECT,
+        related_name='used_in',
+        null=True,
+        blank=True,
+        help_text='A prepared recipe (syrup, base, cold brew) used as an ingredient.',
     )
     amount = models.DecimalField(
         max_digits=12,
         decimal_places=3,
         validators=[MinValueValidator(Decimal('0.0001'))],
-        help_text='Amount of the basic item used per recipe unit (in the same unit as the BasicItem).',
+        help_text='Amount used per recipe unit (in the unit of the basic item, or units of the sub-recipe).',
     )
 
     class Meta:
         unique_together = [('recipe', 'basic_item')]
-        ordering = ['recipe__name', 'basic_item__name']
+        constraints = [
+            models.CheckConstraint(
+                name='recipe_ingredient_single_component',
+                check=(
+                    models.Q(basic_item__isnull=False, sub_recipe__isnull=True)
+                    | models.Q(basic_item__isnull=True, sub_recipe__isnull=False)
+                ),
+            ),
+            models.CheckConstraint(
+                name='recipe_ingredient_not_self',
+                check=~models.Q(sub_recipe=models.F('recipe')),
+            ),
+            models.UniqueConstraint(
+                fields=['recipe', 'sub_recipe'],
+                condition=models.Q(sub_recipe__isnull=False),
+                name='recipe_ingredient_sub_recipe_unique',
+            ),
+        ]
+        ordering = ['recipe__name', 'basic_item__name', 'sub_recipe__name']
         verbose_name = 'Recipe Ingredient'
         verbose_name_plural = 'Recipe Ingredients'
 
     def __str__(self) -> str:
+        if self.sub_recipe_id:
+            return f'{self.recipe} -> {self.sub_recipe} ({self.amount})'
         return f'{self.recipe} -> {self.basic_item} ({self.amount} {self.basic_item.unit})'
 
+    def clean(self):
+        from .recipe_graph import RecipeCycleError, check_no_cycle
+
+        if bool(self.basic_item_id) == bool(self.sub_recipe_id):
+            raise ValidationError('Choose either a basic item or a sub-recipe.')
+        if self.sub_recipe_id and self.recipe_id:
+            try:
+                check_no_cycle(self.recipe_id, [self.sub_recipe_id])
+            except RecipeCycleError as exc:
+                raise ValidationError({'sub_recipe': str(exc)})
 
-class BranchBasicItemStock(TimeStampedModel):
+
+class BranchBasicItemStock(VersionedModel, TimeStampedModel):
     branch = models.ForeignKey(
         'miyanGroup.Branch',
         on_delete=models.CASCADE,
@@ -87,6 +142,10 @@ class BranchBasicItemStock(TimeStampedModel):
 
     class Meta:
         unique_together = [('branch', 'item')]
+        constraints = [
+            # Enforced by the database so atomic delta updates can't go below zero.
+            models.CheckConstraint(name='branch_basic_item_stock_quantity_non_negative', check=models.Q(quantity__gte=0)),
+        ]
         ordering = ['branch__name', 'item__name']
         verbose_name = 'Branch Basic Item Stock'
         verbose_name_plural = 'Branch Basic Item Stock'
@@ -95,7 +154,7 @@ class BranchBasicItemStock(TimeStampedModel):
         return f'{self.branch.code}: {self.item} = {self.quantity}'
 
 
-class BranchRecipeStock(TimeStampedModel):
+class BranchRecipeStock(VersionedModel, TimeStampedModel):
     branch = models.ForeignKey(
         'miyanGroup.Branch',
         on_delete=models.CASCADE,
@@ -115,6 +174,9 @@ class BranchRecipeStock(TimeStampedModel):
 
     class Meta:
         unique_together = [('branch', 'recipe')]
+        constraints = [
+            models.CheckConstraint(name='branch_recipe_stock_quantity_non_negative', check=models.Q(quantity__gte=0)),
+        ]
         ordering = ['branch__name', 'recipe__name']
         verbose_name = 'Branch Recipe Stock'
         verbose_name_plural = 'Branch Recipe Stock'
@@ -172,11 +234,35 @@ class InventoryAdjustment(TimeStampedModel):
         blank=True,
         related_name='inventory_adjustments',
     )
+    batch_id = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text='Shared by adjustments recorded together through the batch endpoint.',
+    )
+    consumption = models.ForeignKey(
+        'RecipeConsumption',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='adjustments',
+        help_text='Recipe consumption that produced this ingredient movement.',
+    )
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Inventory Adjustment'
         verbose_name_plural = 'Inventory Adjustments'
+        indexes = [
+            # Ledger scans for point-in-time balances (see inventory.ledger).
+            models.Index(fields=['branch', 'basic_item', 'created_at'], name='inv_adj_basic_ledger_idx'),
+            models.Index(fields=['branch', 'recipe', 'created_at'], name='inv_adj_recipe_ledger_idx'),
+            # Latest adjustment per branch (snapshot ETag).
+            models.Index(fields=['branch', '-id'], name='inv_adj_branch_latest_idx'),
+            # Admin date_hierarchy (MIN/MAX and the date drill-down).
+            models.Index(fields=['created_at'], name='inv_adj_created_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 name='inventory_adjustment_basic_item_matches_type',
@@ -190,3 +276,212 @@ class InventoryAdjustment(TimeStampedModel):
     def __str__(self) -> str:
         item = self.basic_item if self.item_type == self.ItemType.BASIC else self.recipe
         return f'{self.branch.code}: {self.mode} {item} ({self.quantity})'
+
+
+class RecipeConsumption(TimeStampedModel):
+    """Recipes sold or produced in a branch; ingredients are deducted as one batch."""
+
+    branch = models.ForeignKey(
+        'miyanGroup.Branch',
+        on_delete=models.CASCADE,
+        related_name='recipe_consumptions',
+    )
+    note = models.CharField(max_length=255, blank=True)
+    recorded_by = models.ForeignKey(
+        'miyanGroup.Staff',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='recipe_consumptions',
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Recipe Consumption'
+        verbose_name_plural = 'Recipe Consumptions'
+
+    def __str__(self) -> str:
+        return f'{self.branch.code}: consumption #{self.pk}'
+
+
+class RecipeConsumptionLine(TimeStampedModel):
+    consumption = models.ForeignKey(RecipeConsumption, on_delete=models.CASCADE, related_name='lines')
+    recipe = models.ForeignKey(Recipe, on_delete=models.PROTECT, related_name='consumption_lines')
+    quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        validators=[MinValueValidator(Decimal('0.001'))],
+    )
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Recipe Consumption Line'
+        verbose_name_plural = 'Recipe Consumption Lines'
+
+    def __str__(self) -> str:
+        return f'{self.recipe} x {self.quantity}'
+
+
+class InventoryCheckpoint(TimeStampedModel):
+    """Balance of one item in one branch at ``taken_at``, derived from the ledger."""
+
+    branch = models.ForeignKey(
+        'miyanGroup.Branch',
+        on_delete=models.CASCADE,
+        related_name='inventory_checkpoints',
+    )
+    item_type = models.CharField(max_length=16, choices=InventoryAdjustment.ItemType.choices)
+    basic_item = models.ForeignKey(
+        BasicItem,
+        on_delete=models.CASCADE,
+        related_name='inventory_checkpoints',
+        null=True,
+        blank=True,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='inventory_checkpoints',
+        null=True,
+        blank=True,
+    )
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-taken_at']
+        verbose_name = 'Inventory Checkpoint'
+        verbose_name_plural = 'Inventory Checkpoints'
+        indexes = [
+            models.Index(fields=['branch', 'basic_item', 'taken_at'], name='inv_ckpt_basic_idx'),
+            models.Index(fields=['branch', 'recipe', 'taken_at'], name='inv_ckpt_recipe_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                name='inventory_checkpoint_item_matches_type',
+                check=(
+                    models.Q(item_type='basic', basic_item__isnull=False, recipe__isnull=True)
+                    | models.Q(item_type='recipe', basic_item__isnull=True, recipe__isnull=False)
+                ),
+            ),
+            models.UniqueConstraint(
+                fields=['branch', 'basic_item', 'taken_at'],
+                condition=models.Q(item_type='basic'),
+                name='inventory_checkpoint_basic_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['branch', 'recipe', 'taken_at'],
+                condition=models.Q(item_type='recipe'),
+                name='inventory_checkpoint_recipe_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        item = self.basic_item if self.item_type == InventoryAdjustment.ItemType.BASIC else self.recipe
+        return f'{self.branch.code}: {item} = {self.quantity} @ {self.taken_at:%Y-%m-%d %H:%M}'
+
+
+class DailyStockRollup(TimeStampedModel):
+    """Ledger movements of one item in one branch on one local day."""
+
+    branch = models.ForeignKey(
+        'miyanGroup.Branch',
+        on_delete=models.CASCADE,
+        related_name='stock_rollups',
+    )
+    item_type = models.CharField(max_length=16, choices=InventoryAdjustment.ItemType.choices)
+    basic_item = models.ForeignKey(
+        BasicItem,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+        null=True,
+        blank=True,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+        null=True,
+        blank=True,
+    )
+    day = models.DateField(help_text='Local day in INVENTORY_REPORT_TIME_ZONE.')
+    inbound = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0'))
+    outbound = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0'))
+    corrections = models.DecimalField(
+        max_digits=14,
+        decimal_places=3,
+        default=Decimal('0'),
+        help_text='Net change from set-mode adjustments.',
+    )
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'branch__name']
+        verbose_name = 'Daily Stock Rollup'
+        verbose_name_plural = 'Daily Stock Rollups'
+        indexes = [models.Index(fields=['branch', 'day'], name='inv_stock_rollup_day_idx')]
+        constraints = [
+            models.CheckConstraint(
+                name='daily_stock_rollup_item_matches_type',
+                check=(
+                    models.Q(item_type='basic', basic_item__isnull=False, recipe__isnull=True)
+                    | models.Q(item_type='recipe', basic_item__isnull=True, recipe__isnull=False)
+                ),
+            ),
+            models.UniqueConstraint(
+                fields=['branch', 'basic_item', 'day'],
+                condition=models.Q(item_type='basic'),
+                name='daily_stock_rollup_basic_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['branch', 'recipe', 'day'],
+                condition=models.Q(item_type='recipe'),
+                name='daily_stock_rollup_recipe_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        item = self.basic_item if self.item_type == InventoryAdjustment.ItemType.BASIC else self.recipe
+        return f'{self.branch.code}: {item} on {self.day}'
+
+
+class DailyInputRollup(TimeStampedModel):
+    """Inventory inputs of one branch item on one local day."""
+
+    branch = models.ForeignKey(
+        'miyanGroup.Branch',
+        on_delete=models.CASCADE,
+        related_name='input_rollups',
+    )
+    item = models.ForeignKey(
+        'miyanGroup.InventoryItem',
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+    )
+    day = models.DateField(help_text='Local day in INVENTORY_REPORT_TIME_ZONE.')
+    quantity = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0'))
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('branch', 'item', 'day')]
+        ordering = ['-day', 'branch__name']
+        verbose_name = 'Daily Input Rollup'
+        verbose_name_plural = 'Daily Input Rollups'
+        indexes = [models.Index(fields=['branch', 'day'], name='inv_input_rollup_day_idx')]
+
+    def __str__(self) -> str:
+        return f'{self.branch.code}: {self.item} on {self.day}'
+
+
+class RollupWatermark(TimeStampedModel):
+    """Highest source row id already folded into a rollup table."""
+
+    name = models.CharField(max_length=64, unique=True)
+    last_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Rollup Watermark'
+        verbose_name_plural = 'Rollup Watermarks'
+
+    def __str__(self) -> str:
+        return f'{self.name} @ {self.last_id}'
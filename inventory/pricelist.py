@@ -0,0 +1,216 @@
+"""Supplier price lists: parse, diff against ``BasicItem`` and apply in bulk.
+
+A price list is CSV with ``name, unit, price`` columns (a header row is
+optional). Names are normalized so Arabic/Persian spelling variants of the
+same item match the existing row. Applying a diff is one UPDATE for the
+changed items, one INSERT for the new ones and a single recipe-cost
+recompute for the items whose price changed.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import PROTECT, RESTRICT, Case, CharField, F, Value, When
+from django.utils import timezone
+
+from sync import changelog
+from . import costing, models
+
+_CHAR_MAP = str.maketrans(
+    {
+        'ي': 'ی',  # Arabic yeh
+        'ى': 'ی',  # alef maksura
+        'ك': 'ک',  # Arabic kaf
+        'ة': 'ه',
+        'ـ': None,  # tatweel
+        **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian digits
+        **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+    }
+)
+_ZWNJ = '\u200c'
+_SPACES = re.compile(r'\s+')
+_ZWNJ_RUNS = re.compile(rf'\s*{_ZWNJ}+\s*')
+_PRICE_SEPARATORS = re.compile(r'[,\s٬،]')
+HEADER_NAMES = {'name', 'نام', 'item', 'کالا'}
+
+
+def normalize_name(value: str) -> str:
+    """Canonical spelling used to match price-list rows to items."""
+    value = unicodedata.normalize('NFC', value).translate(_CHAR_MAP)
+    value = _ZWNJ_RUNS.sub(_ZWNJ, value)
+    return _SPACES.sub(' ', value).strip(f' {_ZWNJ}')
+
+
+def parse_price(value: str) -> Decimal:
+    cleaned = _PRICE_SEPARATORS.sub('', value.translate(_CHAR_MAP))
+    try:
+        price = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f'Invalid price "{value}".')
+    if price < 0 or not price.is_finite():
+        raise ValueError(f'Invalid price "{value}".')
+    return price
+
+
+@dataclass
+class PriceRow:
+    name: str
+    unit: str
+    unit_price: Decimal
+    line: int = 0
+
+
+class PriceListError(ValueError):
+    """Raised with per-line messages when a price list cannot be parsed."""
+
+    def __init__(self, errors: dict[int, str]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def decode_upload(data: bytes) -> str:
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        # Excel on Persian Windows saves CSV as Windows-1256.
+        return data.decode('cp1256')
+
+
+def parse_price_list(text: str) -> list[PriceRow]:
+    rows: list[PriceRow] = []
+    errors: dict[int, str] = {}
+    seen: dict[str, int] = {}
+    for line, record in enumerate(csv.reader(io.StringIO(text)), start=1):
+        if not any(cell.strip() for cell in record):
+            continue
+        if line == 1 and record[0].strip().lower() in HEADER_NAMES:
+            continue
+        if len(record) < 3:
+            errors[line] = 'Expected name, unit and price.'
+            continue
+        name, unit = normalize_name(record[0]), normalize_name(record[1])
+        if not name:
+            errors[line] = 'Name is required.'
+            continue
+        if name in seen:
+            errors[line] = f'Duplicate of line {seen[name]}.'
+            continue
+        try:
+            price = parse_price(record[2])
+        except ValueError as exc:
+            errors[line] = str(exc)
+            continue
+        seen[name] = line
+        rows.append(PriceRow(name=name, unit=unit, unit_price=price, line=line))
+    if errors:
+        raise PriceListError(errors)
+    return rows
+
+
+@dataclass
+class PriceListDiff:
+    created: list[PriceRow] = field(default_factory=list)
+    updated: list[tuple[models.BasicItem, PriceRow]] = field(default_factory=list)
+    unchanged: int = 0
+    missing: list[models.BasicItem] = field(default_factory=list)
+    # Missing items that pruning kept because other rows still reference them.
+    protected: list[models.BasicItem] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            'created': [{'name': row.name, 'unit': row.unit, 'unit_price': str(row.unit_price)} for row in self.created],
+            'updated': [
+                {
+                    'id': item.pk,
+                    'name': item.name,
+                    'changes': {
+                        name: [str(old), str(new)]
+                        for name, old, new in (('unit', item.unit, row.unit), ('unit_price', item.unit_price, row.unit_price))
+                        if old != new
+                    },
+                }
+                for item, row in self.updated
+            ],
+            'unchanged': self.unchanged,
+            'missing': [{'id': item.pk, 'name': item.name} for item in self.missing],
+            'protected': [{'id': item.pk, 'name': item.name} for item in self.protected],
+        }
+
+
+def diff_price_list(rows: list[PriceRow]) -> PriceListDiff:
+    """Compare ``rows`` with every BasicItem, fetched in one query."""
+    existing = {normalize_name(item.name): item for item in models.BasicItem.objects.only('id', 'name', 'unit', 'unit_price', 'version')}
+    diff = PriceListDiff()
+    for row in rows:
+        item = existing.pop(row.name, None)
+        if item is None:
+            diff.created.append(row)
+        elif (item.unit, item.unit_price) != (row.unit, row.unit_price):
+            diff.updated.append((item, row))
+        else:
+            diff.unchanged += 1
+    diff.missing = sorted(existing.values(), key=lambda item: item.name)
+    return diff
+
+
+def protected_item_ids(item_ids) -> set[int]:
+    """Those of ``item_ids`` that a PROTECT/RESTRICT foreign key keeps from being deleted."""
+    item_ids = list(item_ids)
+    protected: set[int] = set()
+    for relation in models.BasicItem._meta.related_objects:
+        if relation.on_delete in (PROTECT, RESTRICT):
+            protected.update(
+                relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': item_ids})
+                .values_list(relation.field.attname, flat=True)
+                .distinct()
+            )
+    return protected
+
+
+def apply_price_list(diff: PriceListDiff, *, prune_missing: bool = False) -> int:
+    """Write the diff in bulk; returns the number of recipes re-costed.
+
+    Changed items are locked and re-read first, and their ``version`` is
+    bumped in SQL, so an edit that landed after the diff was taken still
+    moves the version forward. Pruning skips missing items still used by
+    recipes or adjustments and lists them in ``diff.protected``.
+    """
+    targets = {item.pk: row for item, row in diff.updated}
+    with transaction.atomic():
+        current = models.BasicItem.objects.select_for_update().filter(pk__in=targets).only('id', 'unit', 'unit_price')
+        changed = [
+            item for item in current if (item.unit, item.unit_price) != (targets[item.pk].unit, targets[item.pk].unit_price)
+        ]
+        if changed:
+            models.BasicItem.objects.filter(pk__in=[item.pk for item in changed]).update(
+                unit=Case(*(When(pk=item.pk, then=Value(targets[item.pk].unit)) for item in changed), output_field=CharField()),
+                unit_price=Case(
+                    *(When(pk=item.pk, then=Value(targets[item.pk].unit_price)) for item in changed),
+                    output_field=models.BasicItem._meta.get_field('unit_price'),
+                ),
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+            )
+            # Bulk writes send no signals; log them for the sync feed.
+            changelog.record_queryset(
+                models.BasicItem.objects.filter(pk__in=[item.pk for item in changed]), changelog.Action.UPDATE
+            )
+        if diff.created:
+            created = models.BasicItem.objects.bulk_create(
+                models.BasicItem(name=row.name, unit=row.unit, unit_price=row.unit_price) for row in diff.created
+            )
+            changelog.record(created, changelog.Action.CREATE)
+        if prune_missing and diff.missing:
+            kept = protected_item_ids(item.pk for item in diff.missing)
+            diff.protected = [item for item in diff.missing if item.pk in kept]
+            models.BasicItem.objects.filter(pk__in=[item.pk for item in diff.missing if item.pk not in kept]).delete()
+        # Re-cost the affected recipes once rather than per item.
+        repriced = [item.pk for item in changed if item.unit_price != targets[item.pk].unit_price]
+        return costing.recompute_costs_for_basic_items(repriced) if repriced else 0
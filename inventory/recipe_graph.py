@@ -0,0 +1,168 @@
+"""The recipe dependency graph: recipes made from basic items and other recipes.
+
+The whole graph is loaded with one query and memoized per process. Every
+ingredient change bumps a database version (``core.cache_versions``) in its
+own transaction, and each use re-reads that version with one primary-key
+lookup, so every worker rebuilds the graph once per committed change instead
+of walking sub-recipes per request. The writing transaction sees its pending
+version and reads the graph from the database; a rollback discards the bump
+along with the change.
+Raw-material requirements are memoized per recipe on the graph itself, so a
+chain such as latte -> syrup -> sugar is resolved once.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection
+
+from core import cache_versions
+
+VERSION_NAME = 'recipe-graph'
+
+_cached: tuple[int, RecipeGraph] | None = None
+
+
+class RecipeCycleError(ValueError):
+    pass
+
+
+class RecipeGraph:
+    def __init__(self, edges):
+        """``edges``: (recipe_id, basic_item_id, sub_recipe_id, amount) rows."""
+        self.basic_items: dict[int, list[tuple[int, Decimal]]] = defaultdict(list)
+        self.sub_recipes: dict[int, list[tuple[int, Decimal]]] = defaultdict(list)
+        self.used_in: dict[int, set[int]] = defaultdict(set)
+        self.used_by_item: dict[int, set[int]] = defaultdict(set)
+        for recipe_id, basic_item_id, sub_recipe_id, amount in edges:
+            if sub_recipe_id is not None:
+                self.sub_recipes[recipe_id].append((sub_recipe_id, amount))
+                self.used_in[sub_recipe_id].add(recipe_id)
+            else:
+                self.basic_items[recipe_id].append((basic_item_id, amount))
+                self.used_by_item[basic_item_id].add(recipe_id)
+        self._requirements: dict[int, dict[int, Decimal]] = {}
+
+    @classmethod
+    def load(cls) -> RecipeGraph:
+        from .models import RecipeIngredient
+
+        return cls(
+            RecipeIngredient.objects.order_by().values_list('recipe_id', 'basic_item_id', 'sub_recipe_id', 'amount')
+        )
+
+    def reaches(self, start: int, target: int) -> bool:
+        """True if ``start`` uses ``target``, directly or through sub-recipes."""
+        stack, seen = [start], set()
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            if node not in seen:
+                seen.add(node)
+                stack.extend(child for child, _ in self.sub_recipes.get(node, ()))
+        return False
+
+    def ancestors(self, recipe_ids) -> set[int]:
+        """Every recipe that uses one of ``recipe_ids``, at any depth."""
+        found: set[int] = set()
+        stack = list(recipe_ids)
+        while stack:
+            for parent in self.used_in.get(stack.pop(), ()):
+                if parent not in found:
+                    found.add(parent)
+                    stack.append(parent)
+        return found
+
+    def descendants(self, recipe_ids) -> set[int]:
+        """Every sub-recipe used by one of ``recipe_ids``, at any depth."""
+        found: set[int] = set()
+        stack = list(recipe_ids)
+        while stack:
+            for child, _ in self.sub_recipes.get(stack.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    stack.append(child)
+        return found
+
+    def layers(self, recipe_ids) -> list[list[int]]:
+        """Split ``recipe_ids`` into layers where each only depends on earlier ones."""
+        recipe_ids = set(recipe_ids)
+        depth: dict[int, int] = {}
+        visiting: set[int] = set()
+
+        def visit(node: int) -> int:
+            if node not in depth:
+                if node in visiting:
+                    raise RecipeCycleError(f'Recipe {node} uses itself through its sub-recipes.')
+                visiting.add(node)
+                children = [child for child, _ in self.sub_recipes.get(node, ()) if child in recipe_ids]
+                depth[node] = 1 + max(map(visit, children), default=-1)
+                visiting.discard(node)
+            return depth[node]
+
+        grouped: dict[int, list[int]] = defaultdict(list)
+        for node in recipe_ids:
+            grouped[visit(node)].append(node)
+        return [sorted(grouped[level]) for level in sorted(grouped)]
+
+    def requirements(self, recipe_id: int, _visiting: frozenset[int] = frozenset()) -> dict[int, Decimal]:
+        """Basic item id -> amount needed for one unit of ``recipe_id``."""
+        if recipe_id in _visiting:
+            raise RecipeCycleError(f'Recipe {recipe_id} uses itself through its sub-recipes.')
+        if recipe_id not in self._requirements:
+            totals: dict[int, Decimal] = defaultdict(Decimal)
+            for item_id, amount in self.basic_items.get(recipe_id, ()):
+                totals[item_id] += amount
+            for child, amount in self.sub_recipes.get(recipe_id, ()):
+                for item_id, child_amount in self.requirements(child, _visiting | {recipe_id}).items():
+                    totals[item_id] += amount * child_amount
+            self._requirements[recipe_id] = dict(totals)
+        return self._requirements[recipe_id]
+
+
+def get_recipe_graph() -> RecipeGraph:
+    """The memoized graph; rebuilt once after each committed ingredient change."""
+    global _cached
+    # Read the version first: a change committed between the two queries
+    # then only costs an extra rebuild, never a stale graph.
+    version = cache_versions.current(VERSION_NAME)
+    cached = _cached
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    graph = RecipeGraph.load()
+    if not connection.in_atomic_block:
+        # Rows read inside a transaction may still be rolled back.
+        _cached = version, graph
+    return graph
+
+
+def invalidate_recipe_graph() -> None:
+    cache_versions.bump(VERSION_NAME)
+
+
+def check_no_cycle(recipe_id: int, sub_recipe_ids, graph: RecipeGraph | None = None) -> None:
+    """Raise :class:`RecipeCycleError` if using ``sub_recipe_ids`` in ``recipe_id`` loops."""
+    if graph is None:
+        graph = get_recipe_graph()
+    for sub_recipe_id in sub_recipe_ids:
+        if sub_recipe_id == recipe_id or graph.reaches(sub_recipe_id, recipe_id):
+            raise RecipeCycleError(f'Recipe {sub_recipe_id} already uses this recipe; sub-recipes cannot form a cycle.')
+
+
+def lock_and_check_no_cycle(recipe_id: int, sub_recipe_ids) -> None:
+    """:func:`check_no_cycle` for a write in the current transaction.
+
+    Locks ``recipe_id`` and every recipe the new sub-recipes reach, in id
+    order, then checks against the committed graph. Two edits that would
+    close a cycle between them share a locked recipe, so the second one
+    waits and then sees the first one's edge.
+    """
+    from .models import Recipe
+
+    sub_recipe_ids = set(sub_recipe_ids)
+    involved = {recipe_id, *sub_recipe_ids} | get_recipe_graph().descendants(sub_recipe_ids)
+    list(Recipe.objects.select_for_update().filter(pk__in=involved).order_by('pk').values_list('pk', flat=True))
+    check_no_cycle(recipe_id, sub_recipe_ids, RecipeGraph.load())
@@ -0,0 +1,142 @@
+"""Incremental daily rollups of the inventory ledger and inventory inputs.
+
+Each source keeps a :class:`~inventory.models.RollupWatermark` with the
+highest row id already counted. A refresh aggregates only newer rows, grouped
+by branch, item and local day (``INVENTORY_REPORT_TIME_ZONE``), and adds the
+sums onto the existing rollup rows. Reports read the rollups and never scan
+the raw tables.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from miyanGroup.models import InventoryInput
+from . import models
+
+Mode = models.InventoryAdjustment.Mode
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=3)
+ZERO = Value(Decimal('0'), output_field=AMOUNT_FIELD)
+
+STOCK_WATERMARK = 'daily-stock'
+INPUT_WATERMARK = 'daily-input'
+
+
+def report_zone() -> ZoneInfo:
+    return ZoneInfo(settings.INVENTORY_REPORT_TIME_ZONE)
+
+
+def _sum_when(condition, value):
+    return Sum(Case(When(condition, then=value), default=ZERO, output_field=AMOUNT_FIELD))
+
+
+def _merge(model, key_fields: tuple[str, ...], sum_fields: tuple[str, ...], rows: list[dict]) -> None:
+    """Add aggregated ``rows`` onto existing rollup rows, creating missing ones."""
+    existing = {
+        tuple(getattr(rollup, field) for field in key_fields): rollup
+        for rollup in model.objects.filter(
+            branch_id__in={row['branch_id'] for row in rows},
+            day__in={row['day'] for row in rows},
+        )
+    }
+    now = timezone.now()
+    created, updated = [], []
+    for row in rows:
+        rollup = existing.get(tuple(row[field] for field in key_fields))
+        if rollup is None:
+            created.append(model(**{field: row[field] for field in key_fields + sum_fields}))
+            continue
+        for field in sum_fields:
+            setattr(rollup, field, getattr(rollup, field) + row[field])
+        rollup.updated_at = now
+        updated.append(rollup)
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, [*sum_fields, 'updated_at'])
+
+
+def _refresh(name: str, source, timestamp: str, model, key_fields, sums: dict, cutoff) -> int:
+    """Fold source rows newer than the watermark into ``model``; returns rows counted."""
+    with transaction.atomic():
+        models.RollupWatermark.objects.get_or_create(name=name)
+        # Locking the watermark serializes concurrent refreshes of one source.
+        mark = models.RollupWatermark.objects.select_for_update().get(name=name)
+        pending = source.filter(pk__gt=mark.last_id)
+        # Stop before the first unsettled row so the watermark never passes it.
+        unsettled = pending.filter(**{f'{timestamp}__gt': cutoff}).aggregate(first=Min('pk'))['first']
+        if unsettled is not None:
+            pending = pending.filter(pk__lt=unsettled)
+        last_id = pending.aggregate(last=Max('pk'))['last']
+        if last_id is None:
+            return 0
+        rows = list(
+            pending.filter(pk__lte=last_id)
+            .annotate(day=TruncDate(timestamp, tzinfo=report_zone()))
+            .order_by()
+            .values(*key_fields)
+            .annotate(**sums)
+        )
+        _merge(model, key_fields, tuple(sums), rows)
+        counted = sum(row['entries'] for row in rows)
+        mark.last_id = last_id
+        mark.save(update_fields=['last_id', 'updated_at'])
+    return counted
+
+
+def refresh_stock_rollups(cutoff) -> int:
+    return _refresh(
+        STOCK_WATERMARK,
+        models.InventoryAdjustment.objects.all(),
+        'created_at',
+        models.DailyStockRollup,
+        ('branch_id', 'item_type', 'basic_item_id', 'recipe_id', 'day'),
+        {
+            'inbound': _sum_when(Q(mode=Mode.DELTA, quantity__gt=0), F('quantity')),
+            'outbound': _sum_when(Q(mode=Mode.DELTA, quantity__lt=0), -F('quantity')),
+            'corrections': _sum_when(Q(mode=Mode.SET), F('stock_after') - F('stock_before')),
+            'entries': Count('pk'),
+        },
+        cutoff,
+    )
+
+
+def refresh_input_rollups(cutoff) -> int:
+    return _refresh(
+        INPUT_WATERMARK,
+        InventoryInput.objects.all(),
+        'recorded_at',
+        models.DailyInputRollup,
+        ('branch_id', 'item_id', 'day'),
+        {
+            'quantity': Sum('quantity', output_field=AMOUNT_FIELD),
+            'entries': Count('pk'),
+        },
+        cutoff,
+    )
+
+
+def refresh_all(*, settle_seconds: int | None = None) -> dict[str, int]:
+    """Refresh every rollup up to now minus the settle window."""
+    if settle_seconds is None:
+        settle_seconds = settings.INVENTORY_ROLLUP_SETTLE_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    return {
+        STOCK_WATERMARK: refresh_stock_rollups(cutoff),
+        INPUT_WATERMARK: refresh_input_rollups(cutoff),
+    }
+
+
+def rebuild_all(*, settle_seconds: int | None = None) -> dict[str, int]:
+    """Drop every rollup and watermark, then refresh from the first row."""
+    with transaction.atomic():
+        models.DailyStockRollup.objects.all().delete()
+        models.DailyInputRollup.objects.all().delete()
+        models.RollupWatermark.objects.filter(name__in=[STOCK_WATERMARK, INPUT_WATERMARK]).delete()
+    return refresh_all(settle_seconds=settle_seconds)
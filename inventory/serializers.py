@@ -1,54 +1,108 @@
 from __future__ import annotations
 
+import uuid
 from decimal import Decimal
 
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from miyanGroup.models import Branch
 from miyanGroup.serializers import BranchSerializer
-from . import models
+from . import costing, ledger, models, pricelist, recipe_graph, services
 
 
 class BasicItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.BasicItem
-        fields = ['id', 'name', 'unit', 'unit_price', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'unit', 'unit_price', 'version', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
 
+class PriceListUploadSerializer(serializers.Serializer):
+    """A CSV price list as an uploaded ``file`` or pasted ``csv`` text."""
+
+    file = serializers.FileField(required=False)
+    csv = serializers.CharField(required=False, trim_whitespace=False)
+    apply = serializers.BooleanField(default=False)
+    prune_missing = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        upload = attrs.get('file')
+        if upload is None and not attrs.get('csv'):
+            raise serializers.ValidationError({'file': 'Upload a CSV file or send csv text.'})
+        text = pricelist.decode_upload(upload.read()) if upload is not None else attrs['csv']
+        try:
+            attrs['rows'] = pricelist.parse_price_list(text)
+        except pricelist.PriceListError as exc:
+            raise serializers.ValidationError({'lines': {str(line): [message] for line, message in exc.errors.items()}})
+        return attrs
+
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.RecipeIngredient
-        fields = ['id', 'basic_item', 'amount', 'created_at', 'updated_at']
+        fields = ['id', 'basic_item', 'sub_recipe', 'amount', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
+    def validate(self, attrs):
+        if bool(attrs.get('basic_item')) == bool(attrs.get('sub_recipe')):
+            raise serializers.ValidationError('Choose either a basic item or a sub-recipe.')
+        return attrs
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientSerializer(many=True, required=False)
+    cost = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    margin = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
 
     class Meta:
         model = models.Recipe
-        fields = ['id', 'name', 'price', 'ingredients', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'price', 'cost', 'margin', 'ingredients', 'version', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
+    def validate_ingredients(self, ingredients):
+        sub_recipes = [ingredient['sub_recipe'].pk for ingredient in ingredients if ingredient.get('sub_recipe')]
+        if self.instance is not None and sub_recipes:
+            try:
+                recipe_graph.check_no_cycle(self.instance.pk, sub_recipes)
+            except recipe_graph.RecipeCycleError as exc:
+                raise serializers.ValidationError(str(exc))
+        return ingredients
+
     def _sync_ingredients(self, recipe: models.Recipe, ingredients_data):
-        """Create/update ingredient rows and remove ones omitted in the payload."""
-        keep_ids = []
+        """Create/update ingredient rows, remove ones omitted in the payload, then roll costs up once."""
+        wanted = {}
         for ingredient in ingredients_data:
-            basic_item = ingredient['basic_item']
-            amount = ingredient['amount']
-            obj, _ = models.RecipeIngredient.objects.update_or_create(
-                recipe=recipe,
-                basic_item=basic_item,
-                defaults={'amount': amount},
-            )
-            keep_ids.append(obj.id)
-
-        prune_qs = models.RecipeIngredient.objects.filter(recipe=recipe)
-        if keep_ids:
-            prune_qs = prune_qs.exclude(id__in=keep_ids)
-        prune_qs.delete()
+            basic_item, sub_recipe = ingredient.get('basic_item'), ingredient.get('sub_recipe')
+            wanted[(basic_item and basic_item.pk, sub_recipe and sub_recipe.pk)] = ingredient
+        existing = {(row.basic_item_id, row.sub_recipe_id): row for row in recipe.ingredients.all()}
+
+        now = timezone.now()
+        created, changed = [], []
+        for key, ingredient in wanted.items():
+            row = existing.pop(key, None)
+            if row is None:
+                created.append(
+                    models.RecipeIngredient(
+                        recipe=recipe,
+                        basic_item=ingredient.get('basic_item'),
+                        sub_recipe=ingredient.get('sub_recipe'),
+                        amount=ingredient['amount'],
+                    )
+                )
+            elif row.amount != ingredient['amount']:
+                row.amount, row.updated_at = ingredient['amount'], now
+                changed.append(row)
+        if not (existing or created or changed):
+            return
+
+        with costing.deferred_cost_rollup():
+            # Removed rows go first so a re-added item cannot hit the unique constraints.
+            models.RecipeIngredient.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+            models.RecipeIngredient.objects.bulk_update(changed, ['amount', 'updated_at'])
+            models.RecipeIngredient.objects.bulk_create(created)
+        costing.ingredients_changed([recipe.pk])
 
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients', [])
@@ -56,18 +110,51 @@ class RecipeSerializer(serializers.ModelSerializer):
             recipe = super().create(validated_data)
             if ingredients_data:
                 self._sync_ingredients(recipe, ingredients_data)
+                recipe.refresh_from_db(fields=['cost'])
         return recipe
 
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients', None)
         with transaction.atomic():
+            sub_recipes = [ingredient['sub_recipe'].pk for ingredient in ingredients_data or () if ingredient.get('sub_recipe')]
+            if sub_recipes:
+                # Re-checked under row locks: validation ran outside this transaction.
+                try:
+                    recipe_graph.lock_and_check_no_cycle(instance.pk, sub_recipes)
+                except recipe_graph.RecipeCycleError as exc:
+                    raise serializers.ValidationError({'ingredients': [str(exc)]})
             recipe = super().update(instance, validated_data)
             if ingredients_data is not None:
                 self._sync_ingredients(recipe, ingredients_data)
+                recipe.refresh_from_db(fields=['cost'])
         return recipe
 
 
-class BranchBasicItemStockSerializer(serializers.ModelSerializer):
+class LedgerStockSerializerMixin:
+    """Record direct stock edits in the ledger and report ``?as_of=`` balances."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, 'balance_as_of'):
+            data['quantity'] = self.fields['quantity'].to_representation(instance.balance_as_of)
+            data['as_of'] = self.context['as_of'].isoformat()
+        return data
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            row = super().create(validated_data)
+            ledger.record_direct_edit(row, Decimal('0'))
+        return row
+
+    def update(self, instance, validated_data):
+        stock_before = instance.quantity
+        with transaction.atomic():
+            row = super().update(instance, validated_data)
+            ledger.record_direct_edit(row, stock_before)
+        return row
+
+
+class BranchBasicItemStockSerializer(LedgerStockSerializerMixin, serializers.ModelSerializer):
     branch = BranchSerializer(read_only=True)
     branch_id = serializers.PrimaryKeyRelatedField(
         source='branch',
@@ -84,13 +171,14 @@ class BranchBasicItemStockSerializer(serializers.ModelSerializer):
             'branch_id',
             'item',
             'quantity',
+            'version',
             'created_at',
             'updated_at',
         ]
         read_only_fields = ['created_at', 'updated_at']
 
 
-class BranchRecipeStockSerializer(serializers.ModelSerializer):
+class BranchRecipeStockSerializer(LedgerStockSerializerMixin, serializers.ModelSerializer):
     branch = BranchSerializer(read_only=True)
     branch_id = serializers.PrimaryKeyRelatedField(
         source='branch',
@@ -107,6 +195,7 @@ class BranchRecipeStockSerializer(serializers.ModelSerializer):
             'branch_id',
             'recipe',
             'quantity',
+            'version',
             'created_at',
             'updated_at',
         ]
@@ -139,72 +228,215 @@ class InventoryAdjustmentSerializer(serializers.ModelSerializer):
             'stock_after',
             'note',
             'recorded_by',
+            'batch_id',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['recorded_by', 'stock_before', 'stock_after', 'created_at', 'updated_at']
+        read_only_fields = ['recorded_by', 'stock_before', 'stock_after', 'batch_id', 'created_at', 'updated_at']
 
     def validate(self, attrs):
-        item_type = attrs.get('item_type')
-        basic_item = attrs.get('basic_item')
-        recipe = attrs.get('recipe')
-        mode = attrs.get('mode')
-        quantity = attrs.get('quantity')
-
-        if item_type == models.InventoryAdjustment.ItemType.BASIC:
-            if not basic_item:
-                raise serializers.ValidationError({'basic_item': 'Select a basic item.'})
-            attrs['recipe'] = None
-        elif item_type == models.InventoryAdjustment.ItemType.RECIPE:
-            if not recipe:
-                raise serializers.ValidationError({'recipe': 'Select a recipe.'})
-            attrs['basic_item'] = None
-        else:
-            raise serializers.ValidationError({'item_type': 'Unknown item type.'})
-
-        if quantity is None:
-            raise serializers.ValidationError({'quantity': 'Quantity is required.'})
-        if mode == models.InventoryAdjustment.Mode.SET and Decimal(quantity) < 0:
-            raise serializers.ValidationError({'quantity': 'Quantity cannot be negative for set mode.'})
-        return attrs
+        return validate_adjustment_line(attrs)
 
     def create(self, validated_data):
         branch = validated_data.get('branch')
         if not branch:
             raise serializers.ValidationError({'branch': 'Branch is required.'})
 
-        item_type = validated_data['item_type']
-        mode = validated_data['mode']
-        quantity = validated_data['quantity']
-        basic_item = validated_data.get('basic_item')
-        recipe = validated_data.get('recipe')
+        line = services.AdjustmentLine(
+            item_type=validated_data['item_type'],
+            mode=validated_data['mode'],
+            quantity=validated_data['quantity'],
+            basic_item=validated_data.get('basic_item'),
+            recipe=validated_data.get('recipe'),
+            note=validated_data.get('note', ''),
+        )
+        try:
+            return services.apply_adjustment(branch, line, recorded_by=validated_data.get('recorded_by'))
+        except services.StockError as exc:
+            raise serializers.ValidationError(exc.line_errors[0])
+
+
+class InventoryAdjustmentLineSerializer(serializers.Serializer):
+    """One line of a batch; items are plain ids resolved in bulk by the parent."""
+
+    item_type = serializers.ChoiceField(choices=models.InventoryAdjustment.ItemType.choices)
+    basic_item = serializers.IntegerField(required=False, allow_null=True)
+    recipe = serializers.IntegerField(required=False, allow_null=True)
+    mode = serializers.ChoiceField(choices=models.InventoryAdjustment.Mode.choices)
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=3)
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        return validate_adjustment_line(attrs)
 
-        with transaction.atomic():
-            if item_type == models.InventoryAdjustment.ItemType.BASIC:
-                stock_obj, _ = models.BranchBasicItemStock.objects.select_for_update().get_or_create(
-                    branch=branch,
-                    item=basic_item,
-                    defaults={'quantity': Decimal('0')},
-                )
-            else:
-                stock_obj, _ = models.BranchRecipeStock.objects.select_for_update().get_or_create(
-                    branch=branch,
-                    recipe=recipe,
-                    defaults={'quantity': Decimal('0')},
-                )
 
-            stock_before = stock_obj.quantity
-            if mode == models.InventoryAdjustment.Mode.SET:
-                new_quantity = quantity
+class InventoryAdjustmentBatchSerializer(serializers.Serializer):
+    branch_id = serializers.PrimaryKeyRelatedField(
+        source='branch',
+        queryset=Branch.objects.filter(is_active=True),
+        write_only=True,
+        required=False,
+    )
+    lines = InventoryAdjustmentLineSerializer(many=True, allow_empty=False, max_length=500)
+
+    def validate_lines(self, lines):
+        basic_items = models.BasicItem.objects.in_bulk(
+            {line['basic_item'] for line in lines if line['item_type'] == models.InventoryAdjustment.ItemType.BASIC}
+        )
+        recipes = models.Recipe.objects.in_bulk(
+            {line['recipe'] for line in lines if line['item_type'] == models.InventoryAdjustment.ItemType.RECIPE}
+        )
+        errors, resolved = [], []
+        for line in lines:
+            error = {}
+            if line['item_type'] == models.InventoryAdjustment.ItemType.BASIC:
+                line['basic_item'] = basic_items.get(line['basic_item'])
+                if line['basic_item'] is None:
+                    error['basic_item'] = ['Unknown basic item.']
             else:
-                new_quantity = stock_before + quantity
+                line['recipe'] = recipes.get(line['recipe'])
+                if line['recipe'] is None:
+                    error['recipe'] = ['Unknown recipe.']
+            errors.append(error)
+            resolved.append(services.AdjustmentLine(**line))
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return resolved
+
+    def create(self, validated_data):
+        branch = validated_data.get('branch')
+        if not branch:
+            raise serializers.ValidationError({'branch': 'Branch is required.'})
+        lines = validated_data['lines']
+        try:
+            return services.apply_adjustments(
+                branch,
+                lines,
+                recorded_by=validated_data.get('recorded_by'),
+                batch_id=uuid.uuid4(),
+            )
+        except services.StockError as exc:
+            raise serializers.ValidationError(
+                {
+                    'lines': [
+                        {field: [message] for field, message in exc.line_errors.get(index, {}).items()}
+                        for index in range(len(lines))
+                    ]
+                }
+            )
+
+
+class RecipeConsumptionLineSerializer(serializers.ModelSerializer):
+    # Plain id so a long list is resolved with one ``in_bulk`` by the parent.
+    recipe = serializers.IntegerField(source='recipe_id')
+
+    class Meta:
+        model = models.RecipeConsumptionLine
+        fields = ['recipe', 'quantity']
+
+
+class RecipeConsumptionSerializer(serializers.ModelSerializer):
+    branch = BranchSerializer(read_only=True)
+    branch_id = serializers.PrimaryKeyRelatedField(
+        source='branch',
+        queryset=Branch.objects.filter(is_active=True),
+        write_only=True,
+        required=False,
+    )
+    lines = RecipeConsumptionLineSerializer(many=True, allow_empty=False, max_length=500)
+    adjustments = InventoryAdjustmentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = models.RecipeConsumption
+        fields = ['id', 'branch', 'branch_id', 'note', 'recorded_by', 'lines', 'adjustments', 'created_at', 'updated_at']
+        read_only_fields = ['recorded_by', 'created_at', 'updated_at']
 
-            if new_quantity < 0:
-                raise serializers.ValidationError({'quantity': 'Resulting stock cannot be negative.'})
+    def validate_lines(self, lines):
+        recipes = models.Recipe.objects.in_bulk({line['recipe_id'] for line in lines})
+        errors = [{} if line['recipe_id'] in recipes else {'recipe': ['Unknown recipe.']} for line in lines]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return [(recipes[line['recipe_id']], line['quantity']) for line in lines]
+
+    def create(self, validated_data):
+        branch = validated_data.get('branch')
+        if not branch:
+            raise serializers.ValidationError({'branch': 'Branch is required.'})
+        try:
+            return services.consume_recipes(
+                branch,
+                validated_data['lines'],
+                recorded_by=validated_data.get('recorded_by'),
+                note=validated_data.get('note', ''),
+            )
+        except services.StockError as exc:
+            raise serializers.ValidationError(
+                {
+                    'ingredients': {
+                        str(item_id): list(errors.values()) for item_id, errors in exc.line_errors.items()
+                    }
+                }
+            )
 
-            stock_obj.quantity = new_quantity
-            stock_obj.save(update_fields=['quantity', 'updated_at'])
 
-            validated_data['stock_before'] = stock_before
-            validated_data['stock_after'] = new_quantity
-            return super().create(validated_data)
+class DailyStockRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.DailyStockRollup
+        fields = [
+            'id',
+            'branch',
+            'item_type',
+            'basic_item',
+            'recipe',
+            'day',
+            'inbound',
+            'outbound',
+            'corrections',
+            'entries',
+            'updated_at',
+        ]
+
+
+class DailyInputRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.DailyInputRollup
+        fields = ['id', 'branch', 'item', 'day', 'quantity', 'entries', 'updated_at']
+
+
+class StockUsageSerializer(serializers.Serializer):
+    """Rollups summed over a date range for one item in one branch."""
+
+    branch = serializers.IntegerField(source='branch_id')
+    item_type = serializers.CharField()
+    basic_item = serializers.IntegerField(source='basic_item_id', allow_null=True)
+    recipe = serializers.IntegerField(source='recipe_id', allow_null=True)
+    inbound = serializers.DecimalField(max_digits=16, decimal_places=3)
+    outbound = serializers.DecimalField(max_digits=16, decimal_places=3)
+    corrections = serializers.DecimalField(max_digits=16, decimal_places=3)
+    entries = serializers.IntegerField()
+
+
+def validate_adjustment_line(attrs):
+    """Check the item matches ``item_type`` and set-mode quantities are not negative."""
+    item_type = attrs.get('item_type')
+    basic_item = attrs.get('basic_item')
+    recipe = attrs.get('recipe')
+    mode = attrs.get('mode')
+    quantity = attrs.get('quantity')
+
+    if item_type == models.InventoryAdjustment.ItemType.BASIC:
+        if not basic_item:
+            raise serializers.ValidationError({'basic_item': 'Select a basic item.'})
+        attrs['recipe'] = None
+    elif item_type == models.InventoryAdjustment.ItemType.RECIPE:
+        if not recipe:
+            raise serializers.ValidationError({'recipe': 'Select a recipe.'})
+        attrs['basic_item'] = None
+    else:
+        raise serializers.ValidationError({'item_type': 'Unknown item type.'})
+
+    if quantity is None:
+        raise serializers.ValidationError({'quantity': 'Quantity is required.'})
+    if mode == models.InventoryAdjustment.Mode.SET and Decimal(quantity) < 0:
+        raise serializers.ValidationError({'quantity': 'Quantity cannot be negative for set mode.'})
+    return attrs
@@ -0,0 +1,249 @@
+"""Stock mutation helpers shared by the adjustment serializers."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sync import changelog
+from . import models
+from .recipe_graph import get_recipe_graph
+
+ItemType = models.InventoryAdjustment.ItemType
+Mode = models.InventoryAdjustment.Mode
+
+
+@dataclass
+class AdjustmentLine:
+    item_type: str
+    mode: str
+    quantity: Decimal
+    basic_item: models.BasicItem | None = None
+    recipe: models.Recipe | None = None
+    note: str = ''
+
+    @property
+    def stock_key(self) -> tuple[str, int]:
+        if self.item_type == ItemType.BASIC:
+            return ItemType.BASIC, self.basic_item.pk
+        return ItemType.RECIPE, self.recipe.pk
+
+    @property
+    def stock_target(self) -> tuple[type[models.Model], str, int]:
+        """(stock model, item foreign key name, item pk) of the row this line changes."""
+        if self.item_type == ItemType.BASIC:
+            return models.BranchBasicItemStock, 'item', self.basic_item.pk
+        return models.BranchRecipeStock, 'recipe', self.recipe.pk
+
+
+class StockError(Exception):
+    """Raised when lines would leave stock negative; maps line index to errors."""
+
+    def __init__(self, line_errors: dict[int, dict[str, str]]):
+        super().__init__(line_errors)
+        self.line_errors = line_errors
+
+
+def _increment_returning(model, branch, fk_name: str, pk: int, delta: Decimal) -> Decimal | None:
+    """Postgres: guarded increment in one statement; None if nothing matched."""
+    opts = model._meta
+    qn = connection.ops.quote_name
+    quantity = qn(opts.get_field('quantity').column)
+    version = qn(opts.get_field('version').column)
+    sql = (
+        f'UPDATE {qn(opts.db_table)} SET {quantity} = {quantity} + %s, {version} = {version} + 1, '
+        f'{qn(opts.get_field("updated_at").column)} = %s '
+        f'WHERE {qn(opts.get_field("branch").column)} = %s AND {qn(opts.get_field(fk_name).column)} = %s '
+        f'AND {quantity} + %s >= 0 RETURNING {quantity}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [delta, timezone.now(), branch.pk, pk, delta])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _increment_fallback(model, branch, fk_name: str, pk: int, delta: Decimal) -> Decimal | None:
+    """Portable F() increment; the read-back is consistent on sqlite's single writer."""
+    lookup = {'branch': branch, f'{fk_name}_id': pk}
+    if not model.objects.filter(**lookup, quantity__gte=-delta).update(
+        quantity=F('quantity') + delta, version=F('version') + 1, updated_at=timezone.now()
+    ):
+        return None
+    return model.objects.values_list('quantity', flat=True).get(**lookup)
+
+
+def increment_stock(model, branch, fk_name: str, pk: int, delta: Decimal) -> Decimal | None:
+    """Add ``delta`` unless the result would go negative; return the new quantity.
+
+    No row lock is held across Python code: the database applies the change
+    and the non-negative guard in the same statement.
+    """
+    if connection.vendor == 'postgresql':
+        return _increment_returning(model, branch, fk_name, pk, delta)
+    return _increment_fallback(model, branch, fk_name, pk, delta)
+
+
+def apply_delta(branch, line: AdjustmentLine, *, recorded_by=None, batch_id=None) -> models.InventoryAdjustment:
+    """Apply one delta-mode line with an atomic increment instead of a row lock."""
+    model, fk_name, pk = line.stock_target
+    lookup = {'branch': branch, f'{fk_name}_id': pk}
+    with transaction.atomic():
+        stock_after = increment_stock(model, branch, fk_name, pk, line.quantity)
+        if stock_after is None and not model.objects.filter(**lookup).exists():
+            # First movement for this item in the branch: create the row, then retry.
+            model.objects.bulk_create([model(**lookup, quantity=Decimal('0'))], ignore_conflicts=True)
+            stock_after = increment_stock(model, branch, fk_name, pk, line.quantity)
+        if stock_after is None:
+            raise StockError({0: {'quantity': 'Resulting stock cannot be negative.'}})
+        changelog.record_queryset(model.objects.filter(**lookup), changelog.Action.UPDATE)
+        return models.InventoryAdjustment.objects.create(
+            branch=branch,
+            item_type=line.item_type,
+            basic_item=line.basic_item,
+            recipe=line.recipe,
+            mode=line.mode,
+            quantity=line.quantity,
+            stock_before=stock_after - line.quantity,
+            stock_after=stock_after,
+            note=line.note,
+            recorded_by=recorded_by,
+            batch_id=batch_id,
+        )
+
+
+def apply_adjustment(branch, line: AdjustmentLine, *, recorded_by=None) -> models.InventoryAdjustment:
+    """Record a single line: deltas take the lock-free path, set mode locks the row."""
+    if line.mode == Mode.DELTA:
+        return apply_delta(branch, line, recorded_by=recorded_by)
+    (adjustment,) = apply_adjustments(branch, [line], recorded_by=recorded_by)
+    return adjustment
+
+
+def lock_stock_rows(branch, basic_ids, recipe_ids) -> dict[tuple[str, int], models.Model]:
+    """Create missing stock rows, then lock all of them in a fixed order.
+
+    Basic rows are locked before recipe rows and each table in primary-key
+    order of the item, so two batches touching overlapping items always
+    acquire their locks in the same sequence and cannot deadlock.
+    """
+    basic_ids, recipe_ids = sorted(set(basic_ids)), sorted(set(recipe_ids))
+    rows = {}
+    for item_type, model, field, ids in (
+        (ItemType.BASIC, models.BranchBasicItemStock, 'item_id', basic_ids),
+        (ItemType.RECIPE, models.BranchRecipeStock, 'recipe_id', recipe_ids),
+    ):
+        if not ids:
+            continue
+        model.objects.bulk_create(
+            [model(branch=branch, **{field: pk}, quantity=Decimal('0')) for pk in ids],
+            ignore_conflicts=True,
+        )
+        locked = model.objects.select_for_update().filter(branch=branch, **{f'{field}__in': ids}).order_by(field)
+        for row in locked:
+            rows[item_type, getattr(row, field)] = row
+    return rows
+
+
+def apply_adjustments(branch, lines: list[AdjustmentLine], *, recorded_by=None, batch_id=None, consumption=None):
+    """Apply ``lines`` in order inside one transaction; all succeed or none do.
+
+    Lines touching the same item see each other's results, so a delivery
+    followed by a correction behaves like two sequential requests.
+    """
+    with transaction.atomic():
+        rows = lock_stock_rows(
+            branch,
+            [line.basic_item.pk for line in lines if line.item_type == ItemType.BASIC],
+            [line.recipe.pk for line in lines if line.item_type == ItemType.RECIPE],
+        )
+        errors = {}
+        adjustments = []
+        for index, line in enumerate(lines):
+            row = rows[line.stock_key]
+            stock_before = row.quantity
+            stock_after = line.quantity if line.mode == Mode.SET else stock_before + line.quantity
+            if stock_after < 0:
+                errors[index] = {'quantity': 'Resulting stock cannot be negative.'}
+                continue
+            row.quantity = stock_after
+            adjustments.append(
+                models.InventoryAdjustment(
+                    branch=branch,
+                    item_type=line.item_type,
+                    basic_item=line.basic_item,
+                    recipe=line.recipe,
+                    mode=line.mode,
+                    quantity=line.quantity,
+                    stock_before=stock_before,
+                    stock_after=stock_after,
+                    note=line.note,
+                    recorded_by=recorded_by,
+                    batch_id=batch_id,
+                    consumption=consumption,
+                )
+            )
+        if errors:
+            raise StockError(errors)
+
+        now = timezone.now()
+        for item_type, model in (
+            (ItemType.BASIC, models.BranchBasicItemStock),
+            (ItemType.RECIPE, models.BranchRecipeStock),
+        ):
+            changed = [row for (kind, _), row in rows.items() if kind == item_type]
+            for row in changed:
+                row.updated_at = now
+                # Rows are locked, so the in-memory version is current.
+                row.version += 1
+            model.objects.bulk_update(changed, ['quantity', 'version', 'updated_at'])
+        changelog.record(rows.values(), changelog.Action.UPDATE)
+        return models.InventoryAdjustment.objects.bulk_create(adjustments)
+
+
+def explode_recipes(quantities: dict[int, Decimal]) -> dict[int, tuple[models.BasicItem, Decimal]]:
+    """Basic items required by ``{recipe_id: quantity}``, through sub-recipes, summed per item."""
+    graph = get_recipe_graph()
+    totals: dict[int, Decimal] = {}
+    for recipe_id, quantity in quantities.items():
+        for item_id, amount in graph.requirements(recipe_id).items():
+            totals[item_id] = totals.get(item_id, Decimal('0')) + amount * quantity
+    items = models.BasicItem.objects.in_bulk(totals)
+    return {item_id: (items[item_id], total) for item_id, total in totals.items()}
+
+
+def consume_recipes(branch, recipe_lines, *, recorded_by=None, note: str = '') -> models.RecipeConsumption:
+    """Record ``(recipe, quantity)`` lines and deduct their ingredients as one locked batch.
+
+    Raises :class:`StockError` keyed by basic item id when an ingredient
+    would go negative; nothing is written in that case.
+    """
+    quantities: dict[int, Decimal] = {}
+    for recipe, quantity in recipe_lines:
+        quantities[recipe.pk] = quantities.get(recipe.pk, Decimal('0')) + quantity
+    required = explode_recipes(quantities)
+    item_ids = sorted(required)
+    lines = [
+        AdjustmentLine(
+            item_type=ItemType.BASIC,
+            mode=Mode.DELTA,
+            quantity=-required[item_id][1],
+            basic_item=required[item_id][0],
+            note=note or 'Recipe consumption',
+        )
+        for item_id in item_ids
+    ]
+    with transaction.atomic():
+        consumption = models.RecipeConsumption.objects.create(branch=branch, recorded_by=recorded_by, note=note)
+        models.RecipeConsumptionLine.objects.bulk_create(
+            models.RecipeConsumptionLine(consumption=consumption, recipe=recipe, quantity=quantity)
+            for recipe, quantity in recipe_lines
+        )
+        try:
+            apply_adjustments(branch, lines, recorded_by=recorded_by, consumption=consumption)
+        except StockError as exc:
+            raise StockError({item_ids[index]: errors for index, errors in exc.line_errors.items()})
+    return consumption
@@ -0,0 +1,95 @@
+"""Compact, columnar stock snapshot of one branch.
+
+The snapshot replaces paging through ``branch-basic-stock`` and
+``branch-recipe-stock``: the branch is sent once and each stock list is a set
+of parallel arrays. Everything, including the version used for the ETag, is
+read inside one transaction so the arrays and the ETag agree.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from . import models
+
+
+@contextmanager
+def consistent_read():
+    """A transaction in which every query sees the same snapshot.
+
+    PostgreSQL's default READ COMMITTED takes a new snapshot per statement, so
+    the transaction is switched to REPEATABLE READ. SQLite transactions are
+    already serializable.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        # The isolation level can only be set before the first query.
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+def _latest(queryset, field: str):
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1])
+
+
+def annotate_snapshot_version(queryset):
+    """Annotate branches with what the snapshot ETag is derived from.
+
+    The latest adjustment id covers every ledger write. Stock rows edited
+    directly by admins and renamed items or recipes do not add adjustments,
+    so their latest ``updated_at`` is part of the version as well.
+    """
+    branch = OuterRef('pk')
+    return queryset.annotate(
+        last_adjustment_id=_latest(models.InventoryAdjustment.objects.filter(branch=branch), 'id'),
+        basic_stock_changed=_latest(models.BranchBasicItemStock.objects.filter(branch=branch), 'updated_at'),
+        recipe_stock_changed=_latest(models.BranchRecipeStock.objects.filter(branch=branch), 'updated_at'),
+        basic_items_changed=_latest(models.BasicItem.objects.all(), 'updated_at'),
+        recipes_changed=_latest(models.Recipe.objects.all(), 'updated_at'),
+    )
+
+
+def snapshot_etag(branch) -> str:
+    """Strong ETag for a branch annotated by :func:`annotate_snapshot_version`."""
+    parts = (
+        branch.pk,
+        branch.last_adjustment_id,
+        branch.basic_stock_changed,
+        branch.recipe_stock_changed,
+        branch.basic_items_changed,
+        branch.recipes_changed,
+        branch.updated_at,
+    )
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f'"{branch.pk}-{branch.last_adjustment_id or 0}-{digest}"'
+
+
+def branch_stock_columns(branch) -> dict:
+    basic = list(
+        models.BranchBasicItemStock.objects.filter(branch=branch)
+        .order_by('item__name')
+        .values_list('item_id', 'item__name', 'item__unit', 'quantity')
+    )
+    recipes = list(
+        models.BranchRecipeStock.objects.filter(branch=branch)
+        .order_by('recipe__name')
+        .values_list('recipe_id', 'recipe__name', 'quantity')
+    )
+    return {
+        'basic_items': _columns(('id', 'name', 'unit', 'quantity'), basic),
+        'recipes': _columns(('id', 'name', 'quantity'), recipes),
+    }
+
+
+def _columns(names: tuple[str, ...], rows: list[tuple]) -> dict[str, list]:
+    columns = list(zip(*rows)) or [()] * len(names)
+    return {
+        name: [str(value) for value in column] if name == 'quantity' else list(column)
+        for name, column in zip(names, columns)
+    }
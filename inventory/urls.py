@@ -7,6 +7,10 @@ router.register(r'basic-items', views.BasicItemViewSet, basename='basic-item')
 router.register(r'recipes', views.RecipeViewSet, basename='recipe')
 router.register(r'branch-basic-stock', views.BranchBasicItemStockViewSet, basename='branch-basic-stock')
 router.register(r'branch-recipe-stock', views.BranchRecipeStockViewSet, basename='branch-recipe-stock')
+router.register(r'branches', views.BranchSnapshotViewSet, basename='inventory-branch')
 router.register(r'adjustments', views.InventoryAdjustmentViewSet, basename='inventory-adjustment')
+router.register(r'consumptions', views.RecipeConsumptionViewSet, basename='recipe-consumption')
+router.register(r'reports/stock-daily', views.DailyStockRollupViewSet, basename='stock-rollup')
+router.register(r'reports/inputs-daily', views.DailyInputRollupViewSet, basename='input-rollup')
 
 urlpatterns = router.urls
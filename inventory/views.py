@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from rest_framework import permissions, viewsets
-from rest_framework.exceptions import PermissionDenied
+from django.db.models import Prefetch, Sum
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
 
-from core.viewsets import AdminWritePermissionMixin
-from miyanGroup.models import Staff
-from . import models, serializers
+from core.exports import ExportMixin
+from core.idempotency import IdempotencyMixin
+from core.viewsets import AdminWritePermissionMixin, ReplicaReadMixin, VersionedUpdateMixin
+from miyanGroup.models import Branch, Staff
+from miyanGroup.serializers import BranchSerializer
+from . import costing, ledger, models, pricelist, serializers, snapshot
 
 
 class StaffBranchMixin:
@@ -24,24 +33,84 @@ class StaffBranchMixin:
             raise PermissionDenied('Active shift required.')
         return active_shift.branch, staff
 
+    def _resolve_adjustment_branch(self, requested_branch):
+        """Admins pick the branch; staff always write to their active shift's branch."""
+        if self.request.user.is_staff:
+            if not requested_branch:
+                raise PermissionDenied('Branch is required for adjustments.')
+            return requested_branch, None
+
+        branch, staff = self._get_active_branch_or_error()
+        if requested_branch and requested_branch != branch:
+            raise PermissionDenied('Branch mismatch for active shift.')
+        return branch, staff
+
 
-class BasicItemViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
+class StockAsOfMixin:
+    """``?as_of=<date or datetime>`` swaps current quantities for ledger balances."""
+
+    stock_item_type: str
+
+    def get_as_of(self):
+        if not hasattr(self, '_as_of'):
+            raw = self.request.query_params.get('as_of')
+            try:
+                self._as_of = ledger.parse_as_of(raw) if raw else None
+            except ValueError as exc:
+                raise ValidationError({'as_of': str(exc)})
+        return self._as_of
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        as_of = self.get_as_of()
+        if as_of and self.request.method in permissions.SAFE_METHODS:
+            queryset = ledger.annotate_balance_as_of(queryset, self.stock_item_type, as_of)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['as_of'] = self.get_as_of()
+        return context
+
+
+class BasicItemViewSet(ReplicaReadMixin, VersionedUpdateMixin, AdminWritePermissionMixin, viewsets.ModelViewSet):
     queryset = models.BasicItem.objects.all()
     serializer_class = serializers.BasicItemSerializer
-    admin_write_actions = {'create', 'update', 'partial_update', 'destroy'}
+    admin_write_actions = {'create', 'update', 'partial_update', 'destroy', 'price_list'}
     read_permission_class = permissions.IsAuthenticated
     write_permission_class = permissions.IsAdminUser
 
+    @action(detail=False, methods=['post'], url_path='price-list', parser_classes=[MultiPartParser, FormParser, JSONParser])
+    def price_list(self, request):
+        """Diff a supplier CSV against current items; writes only when ``apply`` is true."""
+        serializer = serializers.PriceListUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        diff = pricelist.diff_price_list(serializer.validated_data['rows'])
+        if not serializer.validated_data['apply']:
+            return Response({**diff.as_dict(), 'applied': False})
+        recosted = pricelist.apply_price_list(diff, prune_missing=serializer.validated_data['prune_missing'])
+        return Response({**diff.as_dict(), 'applied': True, 'recipes_recosted': recosted})
+
 
-class RecipeViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, VersionedUpdateMixin, AdminWritePermissionMixin, viewsets.ModelViewSet):
     queryset = models.Recipe.objects.prefetch_related('ingredients__basic_item').all()
     serializer_class = serializers.RecipeSerializer
     admin_write_actions = {'create', 'update', 'partial_update', 'destroy'}
     read_permission_class = permissions.IsAuthenticated
     write_permission_class = permissions.IsAdminUser
 
+    def perform_destroy(self, instance):
+        costing.delete_recipes(models.Recipe.objects.filter(pk=instance.pk))
 
-class BranchBasicItemStockViewSet(StaffBranchMixin, AdminWritePermissionMixin, viewsets.ModelViewSet):
+
+class BranchBasicItemStockViewSet(
+    VersionedUpdateMixin,
+    StockAsOfMixin,
+    StaffBranchMixin,
+    AdminWritePermissionMixin,
+    viewsets.ModelViewSet,
+):
+    stock_item_type = models.InventoryAdjustment.ItemType.BASIC
     queryset = models.BranchBasicItemStock.objects.select_related('branch', 'item').all()
     serializer_class = serializers.BranchBasicItemStockSerializer
     admin_write_actions = {'create', 'update', 'partial_update', 'destroy'}
@@ -62,7 +131,14 @@ class BranchBasicItemStockViewSet(StaffBranchMixin, AdminWritePermissionMixin, v
         return queryset.filter(branch=active_branch)
 
 
-class BranchRecipeStockViewSet(StaffBranchMixin, AdminWritePermissionMixin, viewsets.ModelViewSet):
+class BranchRecipeStockViewSet(
+    VersionedUpdateMixin,
+    StockAsOfMixin,
+    StaffBranchMixin,
+    AdminWritePermissionMixin,
+    viewsets.ModelViewSet,
+):
+    stock_item_type = models.InventoryAdjustment.ItemType.RECIPE
     queryset = models.BranchRecipeStock.objects.select_related('branch', 'recipe').all()
     serializer_class = serializers.BranchRecipeStockSerializer
     admin_write_actions = {'create', 'update', 'partial_update', 'destroy'}
@@ -83,12 +159,64 @@ class BranchRecipeStockViewSet(StaffBranchMixin, AdminWritePermissionMixin, view
         return queryset.filter(branch=active_branch)
 
 
-class InventoryAdjustmentViewSet(StaffBranchMixin, viewsets.ModelViewSet):
+class BranchSnapshotViewSet(StaffBranchMixin, viewsets.GenericViewSet):
+    """``branches/<id>/snapshot/``: all stock of one branch in a single columnar payload."""
+
+    queryset = Branch.objects.all()
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=True, methods=['get'])
+    def snapshot(self, request, pk=None):
+        with snapshot.consistent_read():
+            branch = self.get_object()
+            etag = snapshot.snapshot_etag(branch)
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(
+                    {
+                        'branch': BranchSerializer(branch).data,
+                        'version': branch.last_adjustment_id or 0,
+                        **snapshot.branch_stock_columns(branch),
+                    }
+                )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def get_queryset(self):
+        queryset = snapshot.annotate_snapshot_version(super().get_queryset())
+        if self.request.user.is_staff:
+            return queryset
+        active_branch, _ = self._get_active_branch_or_error()
+        if str(self.kwargs.get('pk')) != str(active_branch.id):
+            raise PermissionDenied('Branch mismatch for active shift.')
+        return queryset.filter(pk=active_branch.pk)
+
+
+class InventoryAdjustmentViewSet(IdempotencyMixin, ExportMixin, StaffBranchMixin, viewsets.ModelViewSet):
     queryset = models.InventoryAdjustment.objects.select_related(
         'branch', 'basic_item', 'recipe', 'recorded_by'
     ).all()
     serializer_class = serializers.InventoryAdjustmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_filename = 'inventory-adjustments'
+    export_fields = (
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('branch', 'branch__code'),
+        ('item_type', 'item_type'),
+        ('basic_item', 'basic_item__name'),
+        ('recipe', 'recipe__name'),
+        ('mode', 'mode'),
+        ('quantity', 'quantity'),
+        ('stock_before', 'stock_before'),
+        ('stock_after', 'stock_after'),
+        ('note', 'note'),
+        ('recorded_by', 'recorded_by__user__username'),
+        ('batch_id', 'batch_id'),
+        ('consumption', 'consumption_id'),
+    )
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -107,15 +235,144 @@ class InventoryAdjustmentViewSet(StaffBranchMixin, viewsets.ModelViewSet):
         return queryset.filter(branch=active_branch)
 
     def perform_create(self, serializer):
-        staff = None
-        branch = serializer.validated_data.get('branch')
+        branch, staff = self._resolve_adjustment_branch(serializer.validated_data.get('branch'))
+        serializer.save(branch=branch, recorded_by=staff)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Apply many adjustment lines atomically; errors are reported per line."""
+        return self.idempotent(request, self._apply_batch)
+
+    def _apply_batch(self, request):
+        serializer = serializers.InventoryAdjustmentBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        branch, staff = self._resolve_adjustment_branch(serializer.validated_data.get('branch'))
+        adjustments = serializer.save(branch=branch, recorded_by=staff)
+        return Response(
+            {
+                'batch_id': adjustments[0].batch_id,
+                'adjustments': serializers.InventoryAdjustmentSerializer(adjustments, many=True).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class RecipeConsumptionViewSet(
+    IdempotencyMixin,
+    StaffBranchMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Post recipes sold or produced; their ingredients are deducted from branch stock."""
+
+    queryset = models.RecipeConsumption.objects.select_related('branch', 'recorded_by').prefetch_related(
+        'lines',
+        Prefetch(
+            'adjustments',
+            queryset=models.InventoryAdjustment.objects.select_related('branch', 'basic_item', 'recipe', 'recorded_by'),
+        ),
+    )
+    serializer_class = serializers.RecipeConsumptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        branch_param = self.request.query_params.get('branch')
 
         if self.request.user.is_staff:
-            if not branch:
-                raise PermissionDenied('Branch is required for adjustments.')
-        else:
-            branch, staff = self._get_active_branch_or_error()
-            if serializer.validated_data.get('branch') and serializer.validated_data['branch'] != branch:
-                raise PermissionDenied('Branch mismatch for active shift.')
+            if branch_param:
+                queryset = queryset.filter(branch_id=branch_param)
+            return queryset
 
+        try:
+            active_branch, _ = self._get_active_branch_or_error()
+        except PermissionDenied:
+            return queryset.none()
+
+        return queryset.filter(branch=active_branch)
+
+    def perform_create(self, serializer):
+        branch, staff = self._resolve_adjustment_branch(serializer.validated_data.get('branch'))
         serializer.save(branch=branch, recorded_by=staff)
+
+
+class RollupReportMixin:
+    """Filters shared by the rollup reports: ``branch``, ``from`` and ``to`` (local days)."""
+
+    permission_classes = [permissions.IsAdminUser]
+    item_filters: tuple[str, ...] = ()
+
+    def _param_date(self, name):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            day = parse_date(raw)
+        except ValueError:
+            # Well formed but not a real day, e.g. 2026-02-30.
+            day = None
+        if day is None:
+            raise ValidationError({name: 'Use an ISO date (YYYY-MM-DD).'})
+        return day
+
+    def _param_id(self, name):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({name: 'Must be an integer id.'}) from None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        for name in ('branch', *self.item_filters):
+            pk = self._param_id(name)
+            if pk is not None:
+                queryset = queryset.filter(**{f'{name}_id': pk})
+        if params.get('item_type'):
+            queryset = queryset.filter(item_type=params['item_type'])
+        start, end = self._param_date('from'), self._param_date('to')
+        if start:
+            queryset = queryset.filter(day__gte=start)
+        if end:
+            queryset = queryset.filter(day__lte=end)
+        return queryset
+
+
+class DailyStockRollupViewSet(RollupReportMixin, viewsets.ReadOnlyModelViewSet):
+    """Per-day ledger totals; refreshed by ``manage.py refresh_inventory_rollups``."""
+
+    queryset = models.DailyStockRollup.objects.all()
+    serializer_class = serializers.DailyStockRollupSerializer
+    item_filters = ('basic_item', 'recipe')
+
+    @action(detail=False, methods=['get'])
+    def usage(self, request):
+        """Totals per branch and item over ``from``..``to``, read from the rollups only."""
+        totals = (
+            self.get_queryset()
+            .order_by()
+            .values('branch_id', 'item_type', 'basic_item_id', 'recipe_id')
+            .annotate(
+                inbound=Sum('inbound'),
+                outbound=Sum('outbound'),
+                corrections=Sum('corrections'),
+                entries=Sum('entries'),
+            )
+            .order_by('branch_id', 'item_type', 'basic_item_id', 'recipe_id')
+        )
+        page = self.paginate_queryset(totals)
+        serializer = serializers.StockUsageSerializer(page if page is not None else totals, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
+class DailyInputRollupViewSet(RollupReportMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = models.DailyInputRollup.objects.all()
+    serializer_class = serializers.DailyInputRollupSerializer
+    item_filters = ('item',)
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import async_menu_urlpatterns
+
 from .views import FlameMonitorView, BereshtMenuViewSet, BereshtMenuItemViewSet
 
 router = DefaultRouter()
@@ -8,6 +10,7 @@ router.register(r'menu', BereshtMenuViewSet, basename='beresht-menu')
 router.register(r'items', BereshtMenuItemViewSet, basename='beresht-items')
 
 urlpatterns = [
+    *async_menu_urlpatterns(BereshtMenuViewSet, prefix='menu', basename='beresht-menu'),
     path('', include(router.urls)),
     path("flame/", FlameMonitorView.as_view(), name="flame-monitor"),
 ]
@@ -1,8 +1,17 @@
 from django.contrib import admin
 
+from core.admin import LargeTableAdminMixin
 from . import models
 
 
+class InventoryItemListFilter(admin.RelatedFieldListFilter):
+    """Item filter whose choices read each item's branch in the same query."""
+
+    def field_choices(self, field, request, model_admin):
+        items = field.related_model._default_manager.select_related('branch')
+        return [(item.pk, str(item)) for item in items]
+
+
 @admin.register(models.Branch)
 class BranchAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'code', 'is_active')
@@ -13,6 +22,7 @@ class BranchAdmin(admin.ModelAdmin):
 @admin.register(models.Staff)
 class StaffAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'telegram_token', 'telegram_id', 'language_preference', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'telegram_id', 'telegram_token')
     readonly_fields = ('telegram_token', 'created_at', 'updated_at')
 
@@ -20,42 +30,56 @@ class StaffAdmin(admin.ModelAdmin):
 @admin.register(models.StaffBranchAssignment)
 class StaffBranchAssignmentAdmin(admin.ModelAdmin):
     list_display = ('id', 'staff', 'branch', 'is_primary', 'is_active', 'created_at')
+    list_select_related = ('staff__user', 'branch')
     list_filter = ('is_primary', 'is_active', 'branch')
     search_fields = ('staff__user__username', 'branch__name')
 
 
 @admin.register(models.StaffShift)
-class StaffShiftAdmin(admin.ModelAdmin):
+class StaffShiftAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'staff', 'branch', 'started_at', 'ended_at')
+    list_select_related = ('staff__user', 'branch')
     list_filter = ('branch',)
+    date_hierarchy = 'started_at'
+    ordering = ('-id',)
     search_fields = ('staff__user__username',)
 
 
 @admin.register(models.InventoryItem)
 class InventoryItemAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'unit', 'branch', 'is_active')
+    list_select_related = ('branch',)
     list_filter = ('branch', 'is_active')
     search_fields = ('name',)
 
 
 @admin.register(models.InventoryMeasurement)
-class InventoryMeasurementAdmin(admin.ModelAdmin):
+class InventoryMeasurementAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'item', 'branch', 'quantity', 'measured_at', 'recorded_by')
-    list_filter = ('branch', 'item')
+    list_select_related = ('item__branch', 'branch', 'recorded_by__user')
+    list_filter = ('branch', ('item', InventoryItemListFilter))
+    date_hierarchy = 'measured_at'
+    ordering = ('-id',)
     readonly_fields = ('measured_at',)
 
 
 @admin.register(models.InventoryInput)
-class InventoryInputAdmin(admin.ModelAdmin):
+class InventoryInputAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'item', 'branch', 'quantity', 'recorded_at', 'recorded_by')
-    list_filter = ('branch', 'item')
+    list_select_related = ('item__branch', 'branch', 'recorded_by__user')
+    list_filter = ('branch', ('item', InventoryItemListFilter))
+    date_hierarchy = 'recorded_at'
+    ordering = ('-id',)
     readonly_fields = ('recorded_at',)
 
 
 @admin.register(models.InventoryTransaction)
-class InventoryTransactionAdmin(admin.ModelAdmin):
+class InventoryTransactionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'item', 'branch', 'created_at', 'created_by')
-    list_filter = ('branch', 'item')
+    list_select_related = ('item__branch', 'branch', 'created_by__user')
+    list_filter = ('branch', ('item', InventoryItemListFilter))
+    date_hierarchy = 'created_at'
+    ordering = ('-id',)
 
 
 @admin.register(models.MiyanGallery)
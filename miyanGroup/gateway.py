@@ -0,0 +1,247 @@
+"""Batched operations for the Telegram bot gateway.
+
+One request carries everything a chat interaction needs: start or end a
+shift, list the branch's items, record measurements, inputs and stock
+adjustments. References are resolved up front with one ``in_bulk`` per kind
+and the operations then run in order inside a single transaction, so a
+failing operation rolls back the ones before it. Consecutive adjustments
+are applied as one locked batch.
+"""
+
+from __future__ import annotations
+
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers as drf
+
+from inventory import services
+from inventory.models import BasicItem, InventoryAdjustment, Recipe
+from inventory.serializers import InventoryAdjustmentSerializer, validate_adjustment_line
+from . import models, serializers
+
+ItemType = InventoryAdjustment.ItemType
+
+SHIFT_START = 'shift_start'
+SHIFT_END = 'shift_end'
+ITEMS = 'items'
+MEASUREMENT = 'measurement'
+INPUT = 'input'
+ADJUSTMENT = 'adjustment'
+OPERATIONS = (SHIFT_START, SHIFT_END, ITEMS, MEASUREMENT, INPUT, ADJUSTMENT)
+
+REQUIRED_FIELDS = {
+    SHIFT_START: ('branch_id',),
+    SHIFT_END: (),
+    ITEMS: (),
+    MEASUREMENT: ('item', 'quantity'),
+    INPUT: ('item', 'quantity'),
+    ADJUSTMENT: ('item_type', 'mode', 'quantity'),
+}
+
+
+class BotOperationSerializer(drf.Serializer):
+    """One operation; ids are plain integers resolved in bulk by :func:`execute`."""
+
+    op = drf.ChoiceField(choices=OPERATIONS)
+    branch_id = drf.IntegerField(required=False)
+    item = drf.IntegerField(required=False)
+    item_type = drf.ChoiceField(choices=ItemType.choices, required=False)
+    basic_item = drf.IntegerField(required=False, allow_null=True)
+    recipe = drf.IntegerField(required=False, allow_null=True)
+    mode = drf.ChoiceField(choices=InventoryAdjustment.Mode.choices, required=False)
+    quantity = drf.DecimalField(max_digits=12, decimal_places=3, required=False)
+    note = drf.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        missing = {name: ['This field is required.'] for name in REQUIRED_FIELDS[attrs['op']] if name not in attrs}
+        if missing:
+            raise drf.ValidationError(missing)
+        if attrs['op'] in (MEASUREMENT, INPUT):
+            if attrs['quantity'] < 0:
+                raise drf.ValidationError({'quantity': 'Quantity must be non-negative.'})
+            if attrs['quantity'] > 1_000_000:
+                raise drf.ValidationError({'quantity': 'Quantity is out of expected range.'})
+        if attrs['op'] == ADJUSTMENT:
+            return validate_adjustment_line(attrs)
+        return attrs
+
+
+class BotGatewaySerializer(drf.Serializer):
+    telegram_id = drf.CharField(max_length=64)
+    operations = BotOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class GatewayError(Exception):
+    """Maps operation index to field errors; raised before or during execution."""
+
+    def __init__(self, errors: dict[int, dict]):
+        super().__init__(errors)
+        self.errors = errors
+
+    def as_list(self, count: int) -> list[dict]:
+        return [self.errors.get(index, {}) for index in range(count)]
+
+
+def _lookups(operations) -> dict[str, dict]:
+    """Everything the operations refer to, one query per model."""
+
+    def ids(op, name):
+        return {operation[name] for operation in operations if operation['op'] == op and operation.get(name)}
+
+    return {
+        'branches': models.Branch.objects.filter(is_active=True).in_bulk(ids(SHIFT_START, 'branch_id')),
+        'items': models.InventoryItem.objects.select_related('branch')
+        .filter(is_active=True, branch__is_active=True)
+        .in_bulk(ids(MEASUREMENT, 'item') | ids(INPUT, 'item')),
+        'basic_items': BasicItem.objects.in_bulk(ids(ADJUSTMENT, 'basic_item')),
+        'recipes': Recipe.objects.in_bulk(ids(ADJUSTMENT, 'recipe')),
+    }
+
+
+def _resolve(operations, lookups, branch_ids) -> dict[int, dict]:
+    """Swap ids for rows in place; returns the errors for unknown references."""
+    errors = {}
+    for index, operation in enumerate(operations):
+        op = operation['op']
+        if op == SHIFT_START:
+            operation['branch'] = lookups['branches'].get(operation['branch_id'])
+            if operation['branch'] is None:
+                errors[index] = {'branch_id': ['Branch not found or inactive.']}
+            elif operation['branch'].pk not in branch_ids:
+                errors[index] = {'branch_id': ['Staff is not assigned to this branch.']}
+        elif op in (MEASUREMENT, INPUT):
+            operation['item'] = lookups['items'].get(operation['item'])
+            if operation['item'] is None:
+                errors[index] = {'item': ['Unknown inventory item.']}
+            elif operation['item'].branch_id not in branch_ids:
+                errors[index] = {'item': ['Staff is not assigned to this branch.']}
+        elif op == ADJUSTMENT:
+            if operation['item_type'] == ItemType.BASIC:
+                operation['basic_item'] = lookups['basic_items'].get(operation['basic_item'])
+                if operation['basic_item'] is None:
+                    errors[index] = {'basic_item': ['Unknown basic item.']}
+            else:
+                operation['recipe'] = lookups['recipes'].get(operation['recipe'])
+                if operation['recipe'] is None:
+                    errors[index] = {'recipe': ['Unknown recipe.']}
+    return errors
+
+
+class _Session:
+    """State shared by the operations of one request."""
+
+    def __init__(self, staff):
+        self.staff = staff
+        self.shift = (
+            staff.shifts.select_related('branch').filter(ended_at__isnull=True).order_by('-started_at').first()
+        )
+        self.branch_ids = set(
+            staff.assignments.filter(is_active=True, branch__is_active=True).values_list('branch_id', flat=True)
+        )
+        self.results: list = []
+        self.pending: list[tuple[int, services.AdjustmentLine]] = []
+
+    def require_shift(self, index: int) -> models.StaffShift:
+        if self.shift is None:
+            raise GatewayError({index: {'op': ['No active shift.']}})
+        return self.shift
+
+    def shift_start(self, index, operation):
+        now = timezone.now()
+        models.StaffShift.objects.filter(staff=self.staff, ended_at__isnull=True).update(ended_at=now)
+        self.shift = models.StaffShift.objects.create(staff=self.staff, branch=operation['branch'])
+        return serializers.StaffShiftSerializer(self.shift).data
+
+    def shift_end(self, index, operation):
+        shift = self.require_shift(index)
+        shift.ended_at = timezone.now()
+        shift.save(update_fields=['ended_at', 'updated_at'])
+        self.shift = None
+        return serializers.StaffShiftSerializer(shift).data
+
+    def items(self, index, operation):
+        branch_id = operation.get('branch_id') or self.require_shift(index).branch_id
+        if branch_id not in self.branch_ids:
+            raise GatewayError({index: {'branch_id': ['Staff is not assigned to this branch.']}})
+        return list(
+            models.InventoryItem.objects.filter(branch_id=branch_id, is_active=True)
+            .order_by('name')
+            .values('id', 'name', 'unit')
+        )
+
+    def measurement(self, index, operation):
+        item = operation['item']
+        measurement = models.InventoryMeasurement.objects.create(
+            branch=item.branch, item=item, quantity=operation['quantity'], recorded_by=self.staff
+        )
+        return serializers.InventoryMeasurementSerializer(measurement).data
+
+    def input(self, index, operation):
+        item = operation['item']
+        recorded = models.InventoryInput.objects.create(
+            branch=item.branch, item=item, quantity=operation['quantity'], note=operation['note'], recorded_by=self.staff
+        )
+        return serializers.InventoryInputSerializer(recorded).data
+
+    def queue_adjustment(self, index, operation):
+        self.require_shift(index)
+        line = services.AdjustmentLine(
+            item_type=operation['item_type'],
+            mode=operation['mode'],
+            quantity=operation['quantity'],
+            basic_item=operation.get('basic_item'),
+            recipe=operation.get('recipe'),
+            note=operation['note'],
+        )
+        self.pending.append((index, line))
+
+    def flush_adjustments(self):
+        if not self.pending:
+            return
+        indexes, lines = zip(*self.pending)
+        self.pending = []
+        try:
+            adjustments = services.apply_adjustments(
+                self.shift.branch, list(lines), recorded_by=self.staff, batch_id=uuid.uuid4()
+            )
+        except services.StockError as exc:
+            raise GatewayError(
+                {
+                    indexes[line]: {field: [message] for field, message in errors.items()}
+                    for line, errors in exc.line_errors.items()
+                }
+            )
+        for index, adjustment in zip(indexes, adjustments):
+            self.results[index] = InventoryAdjustmentSerializer(adjustment).data
+
+
+def execute(staff, operations: list[dict]) -> dict:
+    """Run ``operations`` for ``staff`` in one transaction; all succeed or none do."""
+    with transaction.atomic():
+        session = _Session(staff)
+        errors = _resolve(operations, _lookups(operations), session.branch_ids)
+        if errors:
+            raise GatewayError(errors)
+        session.results = [None] * len(operations)
+        handlers = {
+            SHIFT_START: session.shift_start,
+            SHIFT_END: session.shift_end,
+            ITEMS: session.items,
+            MEASUREMENT: session.measurement,
+            INPUT: session.input,
+        }
+        for index, operation in enumerate(operations):
+            if operation['op'] == ADJUSTMENT:
+                session.queue_adjustment(index, operation)
+                continue
+            # Adjustments run against the shift they were queued under.
+            session.flush_adjustments()
+            session.results[index] = handlers[operation['op']](index, operation)
+        session.flush_adjustments()
+        return {
+            'staff': serializers.StaffSerializer(staff).data,
+            'active_shift': serializers.StaffShiftSerializer(session.shift).data if session.shift else None,
+            'results': session.results,
+        }
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from inventory.pricelist import decode_upload
+from miyanGroup.serializers import StaffBulkRegistrationSerializer
+
+
+class Command(BaseCommand):
+    help = "Register staff in bulk from a CSV (with a header row) or a JSON list of rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (username, password, email, ..., branch_id) or .json file.')
+        parser.add_argument('--branch-id', type=int, help='Primary branch for rows that do not name one.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        try:
+            raw = path.read_bytes()
+        except OSError as exc:
+            raise CommandError(str(exc))
+        if path.suffix.lower() == '.json':
+            try:
+                data = {'rows': json.loads(raw)}
+            except ValueError as exc:
+                raise CommandError(f'Invalid JSON: {exc}')
+        else:
+            data = {'csv': decode_upload(raw)}
+        if options['branch_id']:
+            data['branch_id'] = options['branch_id']
+
+        serializer = StaffBulkRegistrationSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(self._format_errors(serializer.errors))
+        try:
+            staff = serializer.save()
+        except ValidationError as exc:
+            raise CommandError(self._format_errors(exc.detail))
+        self.stdout.write(self.style.SUCCESS(f'Registered {len(staff)} staff.'))
+
+    @staticmethod
+    def _format_errors(errors) -> str:
+        lines = []
+        for key, value in errors.items():
+            if isinstance(value, dict):
+                for number, row_errors in value.items():
+                    for field, messages in row_errors.items():
+                        lines.append(f'row {number}: {field}: {" ".join(str(m) for m in messages)}')
+            else:
+                lines.append(f'{key}: {" ".join(str(m) for m in value)}')
+        return '\n'.join(lines)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miyanGroup', '0002_seed_branches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staff',
+            name='telegram_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
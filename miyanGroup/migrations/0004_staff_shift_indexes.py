@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miyanGroup', '0003_staff_telegram_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staffshift',
+            index=models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['branch', 'started_at'], name='shift_open_branch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffshift',
+            index=models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['staff', '-started_at'], name='shift_open_staff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffshift',
+            index=models.Index(fields=['started_at', 'ended_at'], name='shift_period_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miyanGroup', '0004_staff_shift_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryinput',
+            index=models.Index(fields=['recorded_at'], name='inv_input_recorded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorymeasurement',
+            index=models.Index(fields=['measured_at'], name='inv_measurement_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['created_at'], name='inv_transaction_created_idx'),
+        ),
+    ]
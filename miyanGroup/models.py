@@ -31,7 +31,7 @@ class Branch(TimeStampedModel):
 class Staff(TimeStampedModel):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='staff_profile')
     telegram_token = models.CharField(max_length=128, unique=True, default=generate_telegram_token)
-    telegram_id = models.CharField(max_length=64, blank=True, null=True)
+    telegram_id = models.CharField(max_length=64, blank=True, null=True, db_index=True)
     language_preference = models.CharField(
         max_length=8,
         choices=[('fa', 'Persian'), ('en', 'Finglish')],
@@ -74,6 +74,20 @@ class StaffShift(TimeStampedModel):
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # The roster and ``active_shift`` only ever read open shifts.
+            models.Index(
+                fields=['branch', 'started_at'],
+                condition=models.Q(ended_at__isnull=True),
+                name='shift_open_branch_idx',
+            ),
+            models.Index(
+                fields=['staff', '-started_at'],
+                condition=models.Q(ended_at__isnull=True),
+                name='shift_open_staff_idx',
+            ),
+            models.Index(fields=['started_at', 'ended_at'], name='shift_period_idx'),
+        ]
         verbose_name = "Staff Shift"
         verbose_name_plural = "Staff Shifts"
 
@@ -111,6 +125,7 @@ class InventoryMeasurement(TimeStampedModel):
 
     class Meta:
         ordering = ['-measured_at']
+        indexes = [models.Index(fields=['measured_at'], name='inv_measurement_at_idx')]
         verbose_name = "Inventory Measurement"
         verbose_name_plural = "Inventory Measurements"
 
@@ -128,6 +143,7 @@ class InventoryInput(TimeStampedModel):
 
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [models.Index(fields=['recorded_at'], name='inv_input_recorded_idx')]
         verbose_name = "Inventory Input"
         verbose_name_plural = "Inventory Inputs"
 
@@ -143,6 +159,7 @@ class InventoryTransaction(TimeStampedModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['created_at'], name='inv_transaction_created_idx')]
         verbose_name = "Inventory Transaction"
         verbose_name_plural = "Inventory Transactions"
 
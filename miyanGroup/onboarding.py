@@ -0,0 +1,117 @@
+"""Bulk staff registration.
+
+``create_user`` spends most of its time in the password hasher, so
+registering a branch's staff one by one keeps a worker busy for seconds.
+Here the passwords are hashed up front in a process pool, outside any
+transaction, and the ``User``, ``Staff`` and ``StaffBranchAssignment`` rows
+are then written with one ``bulk_create`` each.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from . import models
+
+CSV_FIELDS = ('username', 'password', 'email', 'first_name', 'last_name', 'language_preference', 'branch_id')
+
+
+class OnboardingError(ValueError):
+    """Maps row number (CSV line or 1-based list position) to field errors."""
+
+    def __init__(self, errors: dict[int, dict[str, list[str]]]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def parse_csv(text: str) -> list[tuple[int, dict]]:
+    """(line, row) pairs; the header names the columns, blank cells are left out."""
+    reader = csv.DictReader(io.StringIO(text))
+    header = [name.strip().lower() for name in reader.fieldnames or ()]
+    if not {'username', 'password'} <= set(header):
+        raise OnboardingError({1: {'header': [f'Expected a header row with {", ".join(CSV_FIELDS)}.']}})
+    reader.fieldnames = header
+    rows = []
+    for record in reader:
+        row = {name: value.strip() for name, value in record.items() if name in CSV_FIELDS and value and value.strip()}
+        if row:
+            rows.append((reader.line_num, row))
+    return rows
+
+
+def find_conflicts(rows: list[tuple[int, dict]]) -> dict[int, dict[str, list[str]]]:
+    """Taken usernames and unknown branches across the batch, one query each."""
+    User = get_user_model()
+    usernames = {row['username'] for _, row in rows}
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    branch_ids = {row['branch_id'] for _, row in rows if row.get('branch_id')}
+    branches = set(models.Branch.objects.filter(pk__in=branch_ids, is_active=True).values_list('pk', flat=True))
+    errors: dict[int, dict[str, list[str]]] = {}
+    seen: dict[str, int] = {}
+    for number, row in rows:
+        row_errors = {}
+        if row['username'] in taken:
+            row_errors['username'] = ['Username already exists.']
+        elif row['username'] in seen:
+            row_errors['username'] = [f'Duplicate of row {seen[row["username"]]}.']
+        seen.setdefault(row['username'], number)
+        if row.get('branch_id') and row['branch_id'] not in branches:
+            row_errors['branch_id'] = ['Branch not found or inactive.']
+        if row_errors:
+            errors[number] = row_errors
+    return errors
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """``make_password`` for each password, in parallel for larger batches."""
+    workers = min(settings.STAFF_HASH_WORKERS, len(passwords))
+    if workers <= 1 or len(passwords) < settings.STAFF_HASH_POOL_MIN_ROWS:
+        return [make_password(password) for password in passwords]
+    # Spawn rather than fork: this runs inside request threads, and a forked
+    # child would inherit held locks and the parent's open DB connections.
+    # Spawned workers set Django up from the inherited DJANGO_SETTINGS_MODULE;
+    # the initializer must not live in a module that imports models.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def register_staff(rows: list[tuple[int, dict]]) -> list[models.Staff]:
+    """Create users, staff profiles and primary assignments for validated rows."""
+    User = get_user_model()
+    hashes = hash_passwords([row['password'] for _, row in rows])
+    users = [
+        User(
+            username=row['username'],
+            email=User.objects.normalize_email(row.get('email', '')),
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            password=password_hash,
+        )
+        for (_, row), password_hash in zip(rows, hashes)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            staff = models.Staff.objects.bulk_create(
+                models.Staff(user=user, language_preference=row.get('language_preference', 'fa'))
+                for user, (_, row) in zip(users, rows)
+            )
+            models.StaffBranchAssignment.objects.bulk_create(
+                models.StaffBranchAssignment(staff=member, branch_id=row['branch_id'], is_primary=True)
+                for member, (_, row) in zip(staff, rows)
+                if row.get('branch_id')
+            )
+    except IntegrityError:
+        # A username was taken between validation and the insert.
+        raise OnboardingError(find_conflicts(rows) or {rows[0][0]: {'username': ['Username already exists.']}})
+    return staff
@@ -1,10 +1,12 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
-from . import models
+from inventory.pricelist import decode_upload
+from . import models, onboarding
 
 User = get_user_model()
 
@@ -71,6 +73,71 @@ class StaffRegistrationSerializer(serializers.Serializer):
         return staff
 
 
+class StaffRegistrationRowSerializer(StaffRegistrationSerializer):
+    """One row of a bulk registration; uniqueness and branches are checked per batch."""
+
+    def validate_username(self, value):
+        return User.normalize_username(value)
+
+    def validate_branch_id(self, value):
+        return value
+
+
+class StaffBulkRegistrationSerializer(serializers.Serializer):
+    """Staff rows as an uploaded CSV ``file``, pasted ``csv`` text or a JSON ``rows`` list.
+
+    ``branch_id`` is the primary branch for rows that do not name one. Errors
+    are keyed by row number: the CSV line, or the 1-based position in ``rows``.
+    """
+
+    file = serializers.FileField(required=False)
+    csv = serializers.CharField(required=False, trim_whitespace=False)
+    rows = serializers.ListField(child=serializers.DictField(), required=False, allow_empty=False)
+    branch_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        try:
+            if attrs.get('file') is not None:
+                numbered = onboarding.parse_csv(decode_upload(attrs['file'].read()))
+            elif attrs.get('csv'):
+                numbered = onboarding.parse_csv(attrs['csv'])
+            elif attrs.get('rows'):
+                numbered = list(enumerate(attrs['rows'], start=1))
+            else:
+                raise serializers.ValidationError({'file': 'Upload a CSV file or send csv text or rows.'})
+        except onboarding.OnboardingError as exc:
+            raise serializers.ValidationError({'rows': _row_errors(exc.errors)})
+        if not numbered:
+            raise serializers.ValidationError({'rows': 'No staff rows found.'})
+        if len(numbered) > settings.STAFF_BULK_MAX_ROWS:
+            raise serializers.ValidationError({'rows': f'At most {settings.STAFF_BULK_MAX_ROWS} rows per request.'})
+
+        errors, valid = {}, []
+        for number, row in numbered:
+            if attrs.get('branch_id') and not row.get('branch_id'):
+                row = {**row, 'branch_id': attrs['branch_id']}
+            row_serializer = StaffRegistrationRowSerializer(data=row)
+            if row_serializer.is_valid():
+                valid.append((number, row_serializer.validated_data))
+            else:
+                errors[number] = row_serializer.errors
+        errors.update(onboarding.find_conflicts(valid))
+        if errors:
+            raise serializers.ValidationError({'rows': _row_errors(errors)})
+        attrs['rows'] = valid
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return onboarding.register_staff(validated_data['rows'])
+        except onboarding.OnboardingError as exc:
+            raise serializers.ValidationError({'rows': _row_errors(exc.errors)})
+
+
+def _row_errors(errors) -> dict:
+    return {str(number): row_errors for number, row_errors in sorted(errors.items())}
+
+
 class StaffBranchAssignmentSerializer(serializers.ModelSerializer):
     branch = BranchSerializer(read_only=True)
     branch_id = serializers.PrimaryKeyRelatedField(
@@ -93,6 +160,32 @@ class StaffShiftSerializer(serializers.ModelSerializer):
         read_only_fields = ['started_at', 'ended_at', 'created_at', 'updated_at']
 
 
+class RosterShiftSerializer(serializers.ModelSerializer):
+    branch = BranchSerializer(read_only=True)
+    staff_id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(source='staff.user.username', read_only=True)
+
+    class Meta:
+        model = models.StaffShift
+        fields = ['id', 'staff_id', 'username', 'branch', 'started_at']
+
+
+class TimesheetRowSerializer(serializers.Serializer):
+    staff_id = serializers.IntegerField()
+    username = serializers.CharField()
+    branch_id = serializers.IntegerField()
+    branch_code = serializers.CharField()
+    shifts = serializers.IntegerField()
+    seconds = serializers.SerializerMethodField()
+    hours = serializers.SerializerMethodField()
+
+    def get_seconds(self, row) -> int:
+        return int(row['worked'].total_seconds()) if row['worked'] else 0
+
+    def get_hours(self, row) -> str:
+        return f"{self.get_seconds(row) / 3600:.2f}"
+
+
 class StartShiftSerializer(serializers.Serializer):
     branch_id = serializers.PrimaryKeyRelatedField(
         queryset=models.Branch.objects.filter(is_active=True), source='branch'
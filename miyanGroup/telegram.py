@@ -0,0 +1,24 @@
+"""``telegram_id`` -> staff lookup for the bot endpoints.
+
+This is a single indexed query joined to the user row, so it is not cached:
+a cache entry would still need that query to confirm the id has not moved
+and the account is still active.
+"""
+
+from __future__ import annotations
+
+from .models import Staff
+
+
+def resolve_staff(telegram_id) -> Staff | None:
+    """The active staff member linked to ``telegram_id``, or None.
+
+    The gateway skips token authentication, so deactivated users are
+    excluded here the way ``TokenAuthentication`` would reject them.
+    """
+    return (
+        Staff.objects.select_related('user')
+        .filter(telegram_id=str(telegram_id), user__is_active=True)
+        .order_by('pk')
+        .first()
+    )
@@ -0,0 +1,58 @@
+"""Roster and timesheet queries over ``StaffShift``.
+
+Both read the staff member, user and branch through joins in the same query
+instead of going through ``Staff.active_shift`` per person. Open shifts are
+served by the partial indexes on ``ended_at IS NULL``; timesheet durations
+are clipped to the period and summed by the database.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from inventory.rollups import report_zone
+from .models import StaffShift
+
+
+def open_shifts(branch_id=None):
+    """Shifts not yet ended, with staff, user and branch joined in."""
+    shifts = StaffShift.objects.filter(ended_at__isnull=True)
+    if branch_id:
+        shifts = shifts.filter(branch_id=branch_id)
+    return shifts.select_related('staff__user', 'branch').order_by('branch__name', 'started_at')
+
+
+def period_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    """``start``..``end`` as whole local days in the branches' time zone."""
+    zone = report_zone()
+    return datetime.combine(start, time.min, zone), datetime.combine(end + timedelta(days=1), time.min, zone)
+
+
+def timesheet(start_at: datetime, end_at: datetime, *, branch_id=None, staff_id=None):
+    """Worked time per staff member and branch between ``start_at`` and ``end_at``.
+
+    Shifts straddling a bound only count the part inside the period, and
+    shifts still open count up to now.
+    """
+    end_at = min(end_at, timezone.now())
+    shifts = StaffShift.objects.filter(started_at__lt=end_at).filter(Q(ended_at__isnull=True) | Q(ended_at__gt=start_at))
+    if start_at >= end_at:
+        shifts = shifts.none()
+    if branch_id:
+        shifts = shifts.filter(branch_id=branch_id)
+    if staff_id:
+        shifts = shifts.filter(staff_id=staff_id)
+    worked = ExpressionWrapper(
+        Least(Coalesce('ended_at', Value(end_at)), Value(end_at)) - Greatest('started_at', Value(start_at)),
+        output_field=DurationField(),
+    )
+    return (
+        shifts.order_by()
+        .values('staff_id', 'branch_id', username=F('staff__user__username'), branch_code=F('branch__code'))
+        .annotate(shifts=Count('id'), worked=Sum(worked))
+        .order_by('username', 'branch_code')
+    )
@@ -17,4 +17,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('telegram/link/', views.TelegramLinkView.as_view(), name='telegram-link'),
     path('telegram/token/', views.TelegramTokenExchangeView.as_view(), name='telegram-token'),
+    path('telegram/gateway/', views.TelegramGatewayView.as_view(), name='telegram-gateway'),
 ]
@@ -1,22 +1,28 @@
+import hmac
+
 from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import permissions, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.viewsets import AdminWritePermissionMixin
-from . import models, serializers
+from core.exports import ExportMixin
+from core.idempotency import IdempotencyMixin
+from core.viewsets import AdminWritePermissionMixin, ReplicaReadMixin
+from . import gateway, models, serializers, telegram, timesheets
 
 
-class MiyanGalleryViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
+class MiyanGalleryViewSet(ReplicaReadMixin, AdminWritePermissionMixin, viewsets.ModelViewSet):
     queryset = models.MiyanGallery.objects.all().order_by('order')
     serializer_class = serializers.MiyanGallerySerializer
 
 
-class BranchViewSet(viewsets.ReadOnlyModelViewSet):
+class BranchViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Branch.objects.filter(is_active=True)
     serializer_class = serializers.BranchSerializer
     permission_classes = [permissions.AllowAny]
@@ -25,7 +31,7 @@ class BranchViewSet(viewsets.ReadOnlyModelViewSet):
 class StaffViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
     queryset = models.Staff.objects.select_related('user').all()
     serializer_class = serializers.StaffSerializer
-    admin_write_actions = {'create', 'update', 'partial_update', 'destroy', 'register'}
+    admin_write_actions = {'create', 'update', 'partial_update', 'destroy', 'register', 'register_bulk'}
     read_permission_class = permissions.IsAdminUser
     write_permission_class = permissions.IsAdminUser
 
@@ -36,6 +42,23 @@ class StaffViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
         staff = serializer.save()
         return Response(serializers.StaffSerializer(staff).data, status=status.HTTP_201_CREATED)
 
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='register-bulk',
+        permission_classes=[permissions.IsAdminUser],
+        parser_classes=[MultiPartParser, FormParser, JSONParser],
+    )
+    def register_bulk(self, request):
+        """Register many staff from CSV or a JSON list; all rows are created or none."""
+        serializer = serializers.StaffBulkRegistrationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        staff = serializer.save()
+        return Response(
+            {'created': len(staff), 'staff': serializers.StaffSerializer(staff, many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=False, methods=['get'], url_path='me', permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
         try:
@@ -113,6 +136,57 @@ class StaffShiftViewSet(viewsets.GenericViewSet):
         shift = serializer.save()
         return Response(serializers.StaffShiftSerializer(shift).data)
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def roster(self, request):
+        """Who is on shift now, optionally for one ``branch``."""
+        shifts = timesheets.open_shifts(self._param_id('branch'))
+        page = self.paginate_queryset(shifts)
+        serializer = serializers.RosterShiftSerializer(page if page is not None else shifts, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def timesheet(self, request):
+        """Worked time per staff and branch over ``from``..``to`` (local days; default: this month)."""
+        today = timezone.localtime(timezone=timesheets.report_zone()).date()
+        start = self._param_date('from') or today.replace(day=1)
+        end = self._param_date('to') or today
+        if start > end:
+            raise ValidationError({'from': 'Must not be after "to".'})
+        rows = timesheets.timesheet(
+            *timesheets.period_bounds(start, end),
+            branch_id=self._param_id('branch'),
+            staff_id=self._param_id('staff'),
+        )
+        page = self.paginate_queryset(rows)
+        serializer = serializers.TimesheetRowSerializer(page if page is not None else rows, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def _param_date(self, name):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            day = parse_date(raw)
+        except ValueError:
+            # Well formed but not a real day, e.g. 2026-02-30.
+            day = None
+        if day is None:
+            raise ValidationError({name: 'Use an ISO date (YYYY-MM-DD).'})
+        return day
+
+    def _param_id(self, name):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({name: 'Must be an integer id.'}) from None
+
 
 class InventoryItemViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
     queryset = models.InventoryItem.objects.select_related('branch').all()
@@ -137,10 +211,20 @@ class InventoryItemViewSet(AdminWritePermissionMixin, viewsets.ModelViewSet):
         return queryset
 
 
-class InventoryMeasurementViewSet(viewsets.ModelViewSet):
+class InventoryMeasurementViewSet(IdempotencyMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = models.InventoryMeasurement.objects.select_related('branch', 'item').all()
     serializer_class = serializers.InventoryMeasurementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_filename = 'inventory-measurements'
+    export_fields = (
+        ('id', 'id'),
+        ('measured_at', 'measured_at'),
+        ('branch', 'branch__code'),
+        ('item', 'item__name'),
+        ('unit', 'item__unit'),
+        ('quantity', 'quantity'),
+        ('recorded_by', 'recorded_by__user__username'),
+    )
 
     def perform_create(self, serializer):
         staff = self._get_staff_or_error()
@@ -165,10 +249,21 @@ class InventoryMeasurementViewSet(viewsets.ModelViewSet):
             raise PermissionDenied('Staff profile required')
 
 
-class InventoryInputViewSet(viewsets.ModelViewSet):
+class InventoryInputViewSet(IdempotencyMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = models.InventoryInput.objects.select_related('branch', 'item').all()
     serializer_class = serializers.InventoryInputSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_filename = 'inventory-inputs'
+    export_fields = (
+        ('id', 'id'),
+        ('recorded_at', 'recorded_at'),
+        ('branch', 'branch__code'),
+        ('item', 'item__name'),
+        ('unit', 'item__unit'),
+        ('quantity', 'quantity'),
+        ('note', 'note'),
+        ('recorded_by', 'recorded_by__user__username'),
+    )
 
     def perform_create(self, serializer):
         staff = self._get_staff_or_error()
@@ -194,6 +289,12 @@ class InventoryInputViewSet(viewsets.ModelViewSet):
             raise PermissionDenied('Staff profile required')
 
 
+def has_bot_secret(request) -> bool:
+    expected = getattr(settings, 'BOT_SHARED_SECRET', '')
+    secret = request.headers.get('X-BOT-SECRET') or request.data.get('secret')
+    return bool(expected and secret) and hmac.compare_digest(str(secret), expected)
+
+
 class TelegramLinkView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -221,24 +322,50 @@ class TelegramTokenExchangeView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, *args, **kwargs):
-        secret = request.headers.get('X-BOT-SECRET') or request.data.get('secret')
-        if not secret or secret != getattr(settings, 'BOT_SHARED_SECRET', ''):
+        if not has_bot_secret(request):
             return Response({'detail': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = serializers.TelegramTokenExchangeSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         token_value = serializer.validated_data['telegram_token']
         try:
-            staff = models.Staff.objects.get(telegram_token=token_value)
+            staff = models.Staff.objects.select_related('user').get(telegram_token=token_value)
         except models.Staff.DoesNotExist:
             return Response({'detail': 'Invalid token'}, status=status.HTTP_404_NOT_FOUND)
 
         auth_token, _ = Token.objects.get_or_create(user=staff.user)
+        active_shift = staff.shifts.select_related('branch').filter(ended_at__isnull=True).order_by('-started_at').first()
         data = {
             'token': auth_token.key,
             'staff': serializers.StaffSerializer(staff).data,
-            'active_branch': serializers.BranchSerializer(staff.active_shift.branch).data
-            if staff.active_shift
-            else None,
+            'active_branch': serializers.BranchSerializer(active_shift.branch).data if active_shift else None,
         }
         return Response(data)
+
+
+class TelegramGatewayView(APIView):
+    """Run a batch of bot operations for the staff member linked to ``telegram_id``.
+
+    Authenticated with the bot's shared secret rather than a user token, so
+    one request replaces the token exchange plus the per-step calls.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        if not has_bot_secret(request):
+            return Response({'detail': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = gateway.BotGatewaySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        staff = telegram.resolve_staff(serializer.validated_data['telegram_id'])
+        if staff is None:
+            return Response({'detail': 'Staff not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        operations = serializer.validated_data['operations']
+        try:
+            payload = gateway.execute(staff, operations)
+        except gateway.GatewayError as exc:
+            return Response({'operations': exc.as_list(len(operations))}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(payload)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class MiyanmadiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'miyanMadi'
+
+    def ready(self):
+        from core.menu_cache import connect_menu_cache_invalidation
+
+        connect_menu_cache_invalidation(self)
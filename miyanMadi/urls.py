@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import async_menu_urlpatterns
+
 from .views import MadiMenuViewSet, MadiMenuItemViewSet
 
 router = DefaultRouter()
@@ -8,5 +10,6 @@ router.register(r'menu', MadiMenuViewSet, basename='madi-menu')
 router.register(r'items', MadiMenuItemViewSet, basename='madi-items')
 
 urlpatterns = [
+    *async_menu_urlpatterns(MadiMenuViewSet, prefix='menu', basename='madi-menu'),
     path('', include(router.urls)),
 ]
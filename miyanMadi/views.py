@@ -1,7 +1,7 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 
-from core.viewsets import BaseMenuItemViewSet, BaseMenuViewSet
+from core.viewsets import BaseMenuItemViewSet, BaseMenuViewSet, PublicMenuAction
 from .models import MadiMenu, MadiMenuItem
 from .serializers import MadiMenuSerializer, MadiMenuItemSerializer
 
@@ -12,6 +12,10 @@ class MadiMenuViewSet(BaseMenuViewSet):
     queryset = MadiMenu.objects.prefetch_related('sections__items')
     serializer_class = MadiMenuSerializer
     breakfast_not_found_message = 'No breakfast menu found'
+    public_menu_actions = {
+        **BaseMenuViewSet.public_menu_actions,
+        'breakfast': PublicMenuAction('breakfast', not_found_attr='breakfast_not_found_message'),
+    }
 
     @action(detail=False, methods=['get'])
     def breakfast(self, request):
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from core.admin import LargeTableAdminMixin
+from . import models
+
+
+@admin.register(models.ChangeLogEntry)
+class ChangeLogEntryAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    # Entries are written alongside the changes they describe; never by hand.
+    list_display = ('id', 'model', 'object_id', 'action', 'branch_id', 'created_at')
+    list_filter = ('model', 'action')
+    ordering = ('-id',)
+    search_fields = ('=object_id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,184 @@
+"""Append-only change log behind the ``/api/sync/changes/`` feed.
+
+Every create, update and delete of a synced model adds a
+:class:`~sync.models.ChangeLogEntry` in the same transaction as the change:
+``save()``/``delete()`` through signals, and bulk writes (``bulk_create``,
+``bulk_update``, ``QuerySet.update``) through :func:`record` or
+:func:`record_queryset` at the call site, since those send no signals.
+
+Entries only name the row. A page of changes is hydrated with the rows' data
+as it is when read, so repeated changes to one row collapse into one item
+and a row that no longer exists is sent as a tombstone.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import ChangeLogEntry
+
+Action = ChangeLogEntry.Action
+
+# Model -> fields sent to clients.
+SYNCED_MODELS: dict[str, tuple[str, ...]] = {
+    'inventory.BasicItem': ('id', 'name', 'unit', 'unit_price', 'version'),
+    'inventory.Recipe': ('id', 'name', 'price', 'cost', 'version'),
+    'inventory.BranchBasicItemStock': ('id', 'branch_id', 'item_id', 'quantity', 'version'),
+    'inventory.BranchRecipeStock': ('id', 'branch_id', 'recipe_id', 'quantity', 'version'),
+    'miyanGroup.InventoryItem': ('id', 'branch_id', 'name', 'unit', 'is_active'),
+}
+
+
+def synced_models() -> dict[str, tuple[type, tuple[str, ...]]]:
+    """Feed label (``label_lower``, as stored on entries) -> (model, fields)."""
+    return {
+        model._meta.label_lower: (model, fields)
+        for model, fields in ((apps.get_model(label), fields) for label, fields in SYNCED_MODELS.items())
+    }
+
+
+def _branch_column(model) -> str | None:
+    try:
+        return model._meta.get_field('branch').column
+    except FieldDoesNotExist:
+        return None
+
+
+def record(instances, action: str) -> None:
+    """Log ``action`` for already-loaded rows of one synced model."""
+    now = timezone.now()
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(
+            model=instance._meta.label_lower,
+            object_id=instance.pk,
+            action=action,
+            branch_id=getattr(instance, 'branch_id', None),
+            created_at=now,
+        )
+        for instance in instances
+    )
+
+
+def record_queryset(queryset, action: str) -> int:
+    """Log ``action`` for every row ``queryset`` matches with one INSERT ... SELECT."""
+    model = queryset.model
+    branch_column = _branch_column(model)
+    lookups = ['pk', 'branch_id'] if branch_column else ['pk']
+    select_sql, select_params = queryset.order_by().values(*lookups).query.sql_with_params()
+    qn = connection.ops.quote_name
+    opts = ChangeLogEntry._meta
+    columns = ', '.join(qn(opts.get_field(name).column) for name in ('model', 'object_id', 'action', 'branch_id', 'created_at'))
+    branch = f'changed.{qn(branch_column)}' if branch_column else 'NULL'
+    sql = (
+        f'INSERT INTO {qn(opts.db_table)} ({columns}) '
+        f'SELECT %s, changed.{qn(model._meta.pk.column)}, %s, {branch}, %s FROM ({select_sql}) changed'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [model._meta.label_lower, action, timezone.now(), *select_params])
+        return cursor.rowcount
+
+
+def _on_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record([instance], Action.CREATE if created else Action.UPDATE)
+
+
+def _on_deleted(sender, instance, **kwargs):
+    record([instance], Action.DELETE)
+
+
+def connect_change_log() -> None:
+    for label, (model, _) in synced_models().items():
+        post_save.connect(_on_saved, sender=model, dispatch_uid=f'change-log-save-{label}')
+        post_delete.connect(_on_deleted, sender=model, dispatch_uid=f'change-log-delete-{label}')
+
+
+# Reading ----------------------------------------------------------------------
+def encode_cursor(entry_id: int) -> str:
+    return base64.urlsafe_b64encode(f'v1:{entry_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str | None) -> int:
+    """The entry id a cursor points after; raises ``ValueError`` if malformed."""
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        version, _, entry_id = raw.partition(':')
+        if version != 'v1' or not entry_id.isdigit():
+            raise ValueError
+        return int(entry_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor.')
+
+
+def _hydrate(entries) -> list[dict]:
+    latest: dict[tuple[str, int], ChangeLogEntry] = {}
+    created: set[tuple[str, int]] = set()
+    for entry in entries:
+        key = entry.model, entry.object_id
+        latest.pop(key, None)
+        latest[key] = entry
+        if entry.action == Action.CREATE:
+            created.add(key)
+
+    wanted: dict[str, set[int]] = {}
+    for label, object_id in latest:
+        wanted.setdefault(label, set()).add(object_id)
+    models = synced_models()
+    rows = {
+        (label, row['id']): row
+        for label, ids in wanted.items()
+        for row in models[label][0].objects.filter(pk__in=ids).values(*models[label][1])
+    }
+
+    changes = []
+    for key, entry in latest.items():
+        row = rows.get(key)
+        if row is None:
+            changes.append({'model': entry.model, 'id': entry.object_id, 'action': Action.DELETE, 'data': None})
+            continue
+        # A row created in this page is new to the client whatever followed.
+        action = Action.CREATE if key in created else Action.UPDATE
+        data = {name: str(value) if isinstance(value, Decimal) else value for name, value in row.items()}
+        changes.append({'model': entry.model, 'id': entry.object_id, 'action': action, 'data': data})
+    return changes
+
+
+def read_changes(after: int, *, branch_ids=None, limit: int) -> dict:
+    """One page of changes after entry ``after``.
+
+    ``branch_ids`` limits branch-scoped rows to those branches (None: all);
+    rows without a branch, such as the catalog, are always included.
+
+    Entries younger than ``SYNC_SETTLE_SECONDS`` are sent but the returned
+    cursor stops before them: a transaction that took a lower id may still
+    be in flight, and the next request must not skip past it. Resending a
+    change is harmless because items carry current data.
+    """
+    entries = ChangeLogEntry.objects.filter(pk__gt=after)
+    if branch_ids is not None:
+        entries = entries.filter(Q(branch_id__isnull=True) | Q(branch_id__in=branch_ids))
+    page = list(entries.order_by('id')[: limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    cutoff = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    cursor = after
+    for entry in page:
+        if entry.created_at > cutoff:
+            has_more = False
+            break
+        cursor = entry.id
+    return {'cursor': encode_cursor(cursor), 'has_more': has_more, 'changes': _hydrate(page)}
@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.utils import timezone
+
+# Frozen copy of sync.changelog.SYNCED_MODELS keys at the time of this migration.
+SYNCED_MODELS = (
+    ('inventory', 'BasicItem', False),
+    ('inventory', 'Recipe', False),
+    ('inventory', 'BranchBasicItemStock', True),
+    ('inventory', 'BranchRecipeStock', True),
+    ('miyanGroup', 'InventoryItem', True),
+)
+
+
+def backfill_change_log(apps, schema_editor):
+    """Log existing rows as creates so a client without a cursor gets everything."""
+    ChangeLogEntry = apps.get_model('sync', 'ChangeLogEntry')
+    now = timezone.now()
+    for app_label, model_name, branch_scoped in SYNCED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        label = f'{app_label}.{model_name}'.lower()
+        fields = ('pk', 'branch_id') if branch_scoped else ('pk',)
+        ChangeLogEntry.objects.bulk_create(
+            (
+                ChangeLogEntry(
+                    model=label,
+                    object_id=row[0],
+                    action='create',
+                    branch_id=row[1] if branch_scoped else None,
+                    created_at=now,
+                )
+                for row in model.objects.order_by('pk').values_list(*fields).iterator(chunk_size=2000)
+            ),
+            batch_size=2000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+        ('inventory', '0009_adjustment_branch_latest_index'),
+        ('miyanGroup', '0002_seed_branches'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeLogEntry(models.Model):
+    """One create, update or delete of a synced row; the id is the sync cursor.
+
+    Append-only: entries are written in the same transaction as the change
+    and never edited. ``branch_id`` is a plain column rather than a foreign
+    key so tombstones survive the deletion of their branch.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = 'create', 'Create'
+        UPDATE = 'update', 'Update'
+        DELETE = 'delete', 'Delete'
+
+    model = models.CharField(max_length=100, help_text='Model label, e.g. inventory.basicitem.')
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=8, choices=Action.choices)
+    branch_id = models.BigIntegerField(null=True, blank=True, help_text='Branch of branch-scoped rows.')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Change Log Entry'
+        verbose_name_plural = 'Change Log Entries'
+        indexes = [
+            # Keyset paging for branch-scoped clients.
+            models.Index(fields=['branch_id', 'id'], name='sync_change_branch_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'#{self.pk} {self.action} {self.model}:{self.object_id}'
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from django.conf import settings
+from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from miyanGroup.models import Staff
+from . import changelog
+
+
+class ChangesView(APIView):
+    """Changes to synced models since ``?cursor=`` (omit it for a full sync).
+
+    Items carry the row's current data; ``create`` and ``update`` should both
+    be applied as upserts and ``delete`` items are tombstones. Keep polling
+    with the returned cursor while ``has_more`` is true.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            after = changelog.decode_cursor(params.get('cursor'))
+        except ValueError as exc:
+            raise ValidationError({'cursor': str(exc)})
+        try:
+            limit = min(int(params.get('limit', settings.SYNC_PAGE_SIZE)), settings.SYNC_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be at least 1.'})
+        return Response(changelog.read_changes(after, branch_ids=self.get_branch_ids(), limit=limit))
+
+    def get_branch_ids(self):
+        branch = self.request.query_params.get('branch')
+        if branch is not None:
+            if not branch.isdigit():
+                raise ValidationError({'branch': 'Must be an integer.'})
+            branch = int(branch)
+        if self.request.user.is_staff:
+            return None if branch is None else [branch]
+        try:
+            staff = self.request.user.staff_profile
+        except Staff.DoesNotExist:
+            raise PermissionDenied('Staff profile required.')
+        branch_ids = list(staff.assignments.filter(is_active=True).values_list('branch_id', flat=True))
+        if branch is not None:
+            if branch not in branch_ids:
+                raise PermissionDenied('Not assigned to this branch.')
+            return [branch]
+        return branch_ids
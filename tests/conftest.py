@@ -0,0 +1,28 @@
+import pytest
+from rest_framework.test import APIClient
+
+from miyanGroup.models import Branch
+
+
+@pytest.fixture
+def admin_client(admin_user):
+    """An ``APIClient`` for a superuser.
+
+    Replaces pytest-django's session-based fixture of the same name so API
+    query counts do not include the session and user lookups.
+    """
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    return client
+
+
+@pytest.fixture
+def admin_site_client(client, admin_user):
+    """A session-logged-in client for the Django admin pages."""
+    client.force_login(admin_user)
+    return client
+
+
+@pytest.fixture
+def branch(db):
+    return Branch.objects.create(name='Test Branch', code='test-branch')
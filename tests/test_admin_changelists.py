@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import admin as core_admin
+from inventory import models
+from miyanGroup.models import Branch, InventoryItem, InventoryMeasurement, Staff
+
+pytestmark = pytest.mark.django_db
+
+
+def _changelist_queries(client, url) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def _adjustments(branch, staff, count):
+    item = models.BasicItem.objects.create(name=f'Item {count}', unit='kg', unit_price=Decimal('1'))
+    models.InventoryAdjustment.objects.bulk_create(
+        models.InventoryAdjustment(
+            branch=branch,
+            item_type='basic',
+            basic_item=item,
+            mode='delta',
+            quantity=Decimal('1'),
+            stock_before=Decimal('0'),
+            stock_after=Decimal('1'),
+            recorded_by=staff,
+        )
+        for _ in range(count)
+    )
+
+
+def test_adjustment_changelist_queries_do_not_grow_with_rows(admin_site_client):
+    staff = Staff.objects.create(user=get_user_model().objects.create_user(username='clerk', password='pw'))
+    url = reverse('admin:inventory_inventoryadjustment_changelist')
+    branches = [Branch.objects.create(name=f'Admin Branch {i}', code=f'admin-{i}') for i in range(2)]
+
+    _adjustments(branches[0], staff, 3)
+    baseline = _changelist_queries(admin_site_client, url)
+    _adjustments(branches[1], staff, 20)
+
+    assert _changelist_queries(admin_site_client, url) == baseline
+
+
+def test_measurement_changelist_item_filter_is_one_query(admin_site_client):
+    url = reverse('admin:miyanGroup_inventorymeasurement_changelist')
+    branch = Branch.objects.create(name='Admin Items', code='admin-items')
+    InventoryMeasurement.objects.create(
+        branch=branch, item=InventoryItem.objects.create(branch=branch, name='Flour'), quantity=Decimal('1')
+    )
+    baseline = _changelist_queries(admin_site_client, url)
+    for index in range(10):
+        item = InventoryItem.objects.create(branch=branch, name=f'Item {index}')
+        InventoryMeasurement.objects.create(branch=branch, item=item, quantity=Decimal('1'))
+
+    assert _changelist_queries(admin_site_client, url) == baseline
+
+
+def test_estimated_count_only_for_large_unfiltered_lists(monkeypatch, settings):
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1000
+    monkeypatch.setattr(core_admin, 'estimated_row_count', lambda model, using: 5_000_000)
+    queryset = models.BasicItem.objects.order_by('id')
+
+    assert core_admin.EstimatedCountPaginator(queryset, 50).count == 5_000_000
+    assert core_admin.EstimatedCountPaginator(queryset.filter(name='x'), 50).count == 0
+
+    monkeypatch.setattr(core_admin, 'estimated_row_count', lambda model, using: 10)
+    assert core_admin.EstimatedCountPaginator(queryset, 50).count == 0
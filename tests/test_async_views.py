@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import cache_versions
+from core.async_views import healthcheck, menu_action_view
+from core.menu_cache import version_name
+from core.middleware import MetricsMiddleware
+from miyanBeresht.models import BereshtMenu
+from miyanBeresht.views import BereshtMenuViewSet
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _get(view, path='/api/beresht/menu/main/', **extra):
+    request = AsyncRequestFactory().get(path, **extra)
+    return async_to_sync(view)(request)
+
+
+def _create_menu(**overrides):
+    data = {'title_fa': 'منو', 'title_en': 'Menu', 'menu_type': 'main', 'is_active': True}
+    data.update(overrides)
+    return BereshtMenu.objects.create(**data)
+
+
+def test_async_main_menu_matches_drf_and_is_cached(client):
+    menu = _create_menu(title_en='Main')
+    _create_menu(title_en='Hidden', is_active=False, menu_type='today')
+    view = menu_action_view(BereshtMenuViewSet, 'main')
+
+    response = _get(view)
+    assert response.status_code == 200
+    assert json.loads(response.content) == client.get(reverse('beresht-menu-main')).json()
+
+    with CaptureQueriesContext(connection) as queries:
+        assert _get(view).content == response.content
+    assert len(queries) == 1  # the menu version only
+
+    menu.title_en = 'Renamed'
+    menu.save()
+    assert json.loads(_get(view).content)['title']['en'] == 'Renamed'
+
+
+def test_menu_edits_reach_workers_holding_an_old_payload():
+    menu = _create_menu(title_en='Main')
+    view = menu_action_view(BereshtMenuViewSet, 'main')
+    _get(view)
+
+    # The save leaves this worker's local cache untouched, as a save handled
+    # by another worker would; only the database version moves.
+    cached = dict(cache._cache)
+    menu.title_en = 'Elsewhere'
+    menu.save()
+    assert dict(cache._cache) == cached
+    assert cache_versions.current(version_name('miyanBeresht')) > 0
+
+    assert json.loads(_get(view).content)['title']['en'] == 'Elsewhere'
+
+
+def test_async_menu_returns_drf_not_found_message():
+    _create_menu(is_active=False, menu_type='today')
+
+    response = _get(menu_action_view(BereshtMenuViewSet, 'today'), path='/api/beresht/menu/today/')
+
+    assert response.status_code == 404
+    assert json.loads(response.content) == {'detail': BereshtMenuViewSet.todays_not_found_message}
+
+
+def test_async_menu_delegates_authenticated_requests_to_drf():
+    _create_menu(title_en='Inactive', is_active=False)
+    view = menu_action_view(BereshtMenuViewSet, 'main')
+
+    anonymous = _get(view)
+    with_token = _get(view, headers={'Authorization': 'Token missing'})
+
+    # Credentials are checked by DRF, which the fast path never does itself.
+    assert anonymous.status_code == 404
+    assert with_token.status_code == 403
+
+
+def test_async_healthcheck_and_metrics_middleware(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    middleware = MetricsMiddleware(healthcheck)
+
+    response = _get(middleware, path='/api/core/health/')
+
+    assert response.status_code == 200
+    assert json.loads(response.content)['status'] == 'ok'
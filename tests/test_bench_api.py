@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from core.management.commands.bench_api import compare_to_baseline, percentile
+from inventory.models import BasicItem
+
+pytestmark = pytest.mark.django_db
+
+
+def _bench(output):
+    call_command(
+        'bench_api',
+        use_current_db=True,
+        menus=1,
+        sections=2,
+        items=2,
+        branches=1,
+        basic_items=3,
+        recipes=1,
+        adjustments=5,
+        measurements=5,
+        shifts=2,
+        staff=1,
+        iterations=2,
+        warmup=0,
+        only=['health', 'beresht.menu.main', 'inventory.adjustments', 'group.staff.list'],
+        output=str(output),
+    )
+
+
+def test_bench_api_writes_results_for_every_role(tmp_path):
+    output = tmp_path / 'bench.json'
+
+    _bench(output)
+
+    results = json.loads(output.read_text())
+    endpoints = results['endpoints']
+    assert set(endpoints) == {
+        'health',
+        'beresht.menu.main',
+        'inventory.adjustments.list',
+        'inventory.adjustments.create',
+        'inventory.adjustments.batch',
+        'group.staff.list',
+    }
+    assert endpoints['inventory.adjustments.create']['status'] == 201
+    assert endpoints['inventory.adjustments.batch']['status'] == 201
+    assert all(entry['status'] in (200, 201) for entry in endpoints.values())
+    assert endpoints['inventory.adjustments.list']['queries'] > 0
+    assert results['meta']['dataset']['basic_items'] == 3
+
+
+def test_bench_api_rolls_back_what_it_seeds_into_the_current_db(tmp_path):
+    get_user_model().objects.create_user('bench-staff', password=None)
+
+    _bench(tmp_path / 'first.json')
+    _bench(tmp_path / 'second.json')
+
+    assert not BasicItem.objects.filter(name__startswith='Bench item').exists()
+    assert list(get_user_model().objects.values_list('username', flat=True)) == ['bench-staff']
+
+
+def test_percentile_and_baseline_comparison():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile([5, 1, 3, 2, 4], 99) == 5
+
+    baseline = {'endpoints': {'health': {'p95_ms': 1.0, 'queries': 0}}}
+    current = {'endpoints': {'health': {'p95_ms': 1.5, 'queries': 2}}}
+
+    regressions = compare_to_baseline(current, baseline, threshold=0.2)
+
+    assert len(regressions) == 2
@@ -0,0 +1,36 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from core.management.commands.bootstrap import STATIC_HASH_FILE, STATIC_SENTINEL, project_apps
+from miyanBeresht.models import BereshtMenu
+
+pytestmark = pytest.mark.django_db
+
+
+def _bootstrap(**options):
+    out = StringIO()
+    call_command('bootstrap', skip_makemigrations=True, stdout=out, **options)
+    return out.getvalue()
+
+
+def test_bootstrap_runs_all_phases_then_skips_unchanged_work(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path / 'static')
+
+    first = _bootstrap()
+
+    assert 'migrate' in first and 'skipped (up to date)' in first
+    assert BereshtMenu.objects.exists()
+    assert (tmp_path / 'static' / STATIC_HASH_FILE).exists()
+    assert (tmp_path / 'static' / STATIC_SENTINEL).exists()
+    assert 'collected' in first
+
+    second = _bootstrap(skip_seed=True)
+
+    assert 'skipped (manifest hash matches)' in second
+    assert 'seed_items' in second and 'skipped (flag)' in second
+
+
+def test_project_apps_cover_every_local_app():
+    assert set(project_apps()) == {'core', 'inventory', 'miyanBeresht', 'miyanMadi', 'miyanGroup', 'sync'}
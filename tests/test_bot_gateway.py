@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from inventory import models
+from miyanGroup import telegram
+from miyanGroup.models import Branch, InventoryInput, InventoryItem, InventoryMeasurement, Staff, StaffBranchAssignment
+
+pytestmark = pytest.mark.django_db
+
+SECRET = 'bot-secret'
+
+
+@pytest.fixture(autouse=True)
+def bot_secret(settings):
+    settings.BOT_SHARED_SECRET = SECRET
+
+
+@pytest.fixture
+def staff(branch):
+    user = get_user_model().objects.create_user(username='bot-staff', password='pw')
+    staff = Staff.objects.create(user=user, telegram_id='4242')
+    StaffBranchAssignment.objects.create(staff=staff, branch=branch, is_primary=True)
+    return staff
+
+
+@pytest.fixture
+def flour(branch):
+    return InventoryItem.objects.create(branch=branch, name='Flour', unit='kg')
+
+
+@pytest.fixture
+def milk():
+    return models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4'))
+
+
+def _gateway(operations, telegram_id='4242', secret=SECRET):
+    return APIClient().post(
+        reverse('telegram-gateway'),
+        {'telegram_id': telegram_id, 'operations': operations},
+        format='json',
+        HTTP_X_BOT_SECRET=secret,
+    )
+
+
+def test_gateway_runs_a_chat_interaction_in_one_request(staff, branch, flour, milk):
+    response = _gateway(
+        [
+            {'op': 'shift_start', 'branch_id': branch.id},
+            {'op': 'items'},
+            {'op': 'measurement', 'item': flour.id, 'quantity': '3.5'},
+            {'op': 'input', 'item': flour.id, 'quantity': '10', 'note': 'delivery'},
+            {'op': 'adjustment', 'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '6'},
+            {'op': 'adjustment', 'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '-2'},
+        ]
+    )
+
+    assert response.status_code == 200, response.data
+    assert response.data['staff']['id'] == staff.id
+    assert response.data['active_shift']['branch']['id'] == branch.id
+    results = response.data['results']
+    assert results[1] == [{'id': flour.id, 'name': 'Flour', 'unit': 'kg'}]
+    assert InventoryMeasurement.objects.get().recorded_by == staff
+    assert InventoryInput.objects.get().note == 'delivery'
+    assert [results[4]['stock_after'], results[5]['stock_after']] == ['6.000', '4.000']
+    # Consecutive adjustments share one batch.
+    assert results[4]['batch_id'] == results[5]['batch_id']
+    assert models.BranchBasicItemStock.objects.get(branch=branch, item=milk).quantity == Decimal('4')
+
+
+def test_failing_operation_rolls_back_the_batch(staff, branch, flour, milk):
+    response = _gateway(
+        [
+            {'op': 'shift_start', 'branch_id': branch.id},
+            {'op': 'measurement', 'item': flour.id, 'quantity': '1'},
+            {'op': 'adjustment', 'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '-1'},
+        ]
+    )
+
+    assert response.status_code == 400
+    assert response.data['operations'][2] == {'quantity': ['Resulting stock cannot be negative.']}
+    assert not staff.shifts.exists()
+    assert not InventoryMeasurement.objects.exists()
+
+
+def test_unknown_references_are_reported_per_operation(staff, flour):
+    other = Branch.objects.create(name='Elsewhere', code='bot-other')
+    response = _gateway(
+        [
+            {'op': 'shift_start', 'branch_id': other.id},
+            {'op': 'input', 'item': 999999, 'quantity': '1'},
+            {'op': 'shift_end'},
+        ]
+    )
+
+    assert response.status_code == 400
+    assert response.data['operations'][:2] == [
+        {'branch_id': ['Staff is not assigned to this branch.']},
+        {'item': ['Unknown inventory item.']},
+    ]
+
+
+def test_gateway_requires_the_bot_secret_and_a_linked_staff(staff):
+    assert _gateway([{'op': 'items'}], secret='wrong').status_code == 403
+    assert _gateway([{'op': 'items'}], telegram_id='1').status_code == 404
+
+
+def test_gateway_rejects_deactivated_staff(staff, branch):
+    staff.user.is_active = False
+    staff.user.save()
+
+    assert _gateway([{'op': 'shift_start', 'branch_id': branch.id}]).status_code == 404
+    assert not staff.shifts.exists()
+
+
+def test_resolver_is_one_query_and_follows_a_moved_telegram_id(staff, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert telegram.resolve_staff('4242').user.username == 'bot-staff'
+
+    Staff.objects.filter(pk=staff.pk).update(telegram_id=None)
+    user = get_user_model().objects.create_user(username='bot-staff-2', password='pw')
+    other = Staff.objects.create(user=user, telegram_id='4242')
+    assert telegram.resolve_staff('4242') == other
@@ -0,0 +1,130 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from django.conf import settings as django_settings
+
+from core import connections, metrics
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    metrics.reset_registry()
+    yield tmp_path
+    metrics.reset_registry()
+
+
+def _pool(**kwargs):
+    return connections.ConnectionPool(**{'size': 2, 'timeout': 0.05, 'alias': 'test', **kwargs})
+
+
+def test_pool_reuses_connections_and_reports_metrics(metrics_dir):
+    pool = _pool()
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    first = pool.checkout(connect)
+    pool.checkin(first)
+    assert pool.checkout(connect) is first
+    assert len(opened) == 1
+    assert pool.stats() == {'size': 2, 'idle': 0, 'in_use': 1}
+
+    body = metrics.render_prometheus(metrics.get_registry().collect())
+    assert 'db_connections_total{alias="test",source="new"} 1' in body
+    assert 'db_connections_total{alias="test",source="reused"} 1' in body
+    assert 'db_pool_checkout_wait_seconds_count{alias="test"} 2' in body
+    assert 'db_pool_connections{alias="test",state="in_use"} 1' in body
+
+
+def test_checkout_waits_for_a_free_slot_then_times_out(metrics_dir):
+    pool = _pool(size=1, timeout=1)
+    held = pool.checkout(FakeConnection)
+    threading.Timer(0.05, pool.checkin, [held]).start()
+
+    assert pool.checkout(FakeConnection) is held
+
+    pool.timeout = 0.01
+    with pytest.raises(connections.PoolTimeout):
+        pool.checkout(FakeConnection)
+    assert 'db_pool_timeouts_total{alias="test"} 1' in metrics.render_prometheus(metrics.get_registry().collect())
+
+
+def test_expired_broken_or_dirty_connections_are_replaced():
+    healthy = {'ok': True}
+    pool = _pool(max_age=60, check=lambda connection: healthy['ok'])
+
+    broken = pool.checkout(FakeConnection)
+    pool.checkin(broken)
+    healthy['ok'] = False
+    replacement = pool.checkout(FakeConnection)
+    assert replacement is not broken and broken.closed
+
+    pool.reset = lambda connection: (_ for _ in ()).throw(RuntimeError('rollback failed'))
+    pool.checkin(replacement)
+    assert replacement.closed and pool.stats()['idle'] == 0
+
+    pool.reset, healthy['ok'] = None, True
+    old = pool.checkout(FakeConnection)
+    pool._expires[id(old)] = time.monotonic() - 1
+    pool.checkin(old)
+    assert old.closed and pool.stats() == {'size': 2, 'idle': 0, 'in_use': 0}
+
+
+def test_persistent_connections_expire_within_the_jitter_window(monkeypatch):
+    monkeypatch.setattr(connections.random, 'uniform', lambda low, high: high)
+    connection = SimpleNamespace(
+        alias='default',
+        close_at=1000.0,
+        settings_dict={'CONN_MAX_AGE': 300, 'CONN_MAX_AGE_JITTER': 0.2},
+    )
+
+    connections.jitter_close_at(sender=None, connection=connection)
+
+    assert connection.close_at == 940.0
+    assert connections.jittered_max_age(300, 0) == 300
+    assert connections.jittered_max_age(None, 0.2) is None
+
+
+def _asgi_settings(**env):
+    """Connection settings as seen by a process started through config/asgi.py."""
+    script = (
+        'import json, config.asgi; from django.conf import settings; '
+        'print(json.dumps([settings.DB_CONNECTION_MODE, settings.DATABASES["default"]["CONN_MAX_AGE"]]))'
+    )
+    environ = {key: value for key, value in os.environ.items() if not key.startswith('DB_')}
+    environ.pop('DJANGO_SETTINGS_MODULE', None)
+    return subprocess.run(
+        [sys.executable, '-c', script],
+        env={**environ, **env},
+        cwd=django_settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_asgi_processes_do_not_keep_per_thread_connections():
+    result = _asgi_settings(DB_CONNECTION_MODE='persistent')
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == ['request', 0]
+
+    result = _asgi_settings(DB_CONNECTION_MODE='pool')
+    assert result.returncode != 0 and 'DB_POOL_SIZE' in result.stderr
+    assert _asgi_settings(DB_CONNECTION_MODE='pool', DB_POOL_SIZE='8').returncode == 0
@@ -0,0 +1,129 @@
+import csv
+import io
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import resolve, reverse
+from rest_framework.test import force_authenticate
+
+from core import exports
+from core.exports import stream_xlsx
+from inventory import models
+from miyanGroup.models import InventoryInput, InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def _content(response) -> bytes:
+    assert response.streaming
+    return b''.join(response.streaming_content)
+
+
+def test_adjustments_export_streams_every_row_as_csv(admin_client, branch, settings):
+    settings.EXPORT_CHUNK_SIZE = 7
+    item = models.BasicItem.objects.create(name='زعفران', unit='g', unit_price=Decimal('1'))
+    models.InventoryAdjustment.objects.bulk_create(
+        models.InventoryAdjustment(
+            branch=branch,
+            item_type='basic',
+            basic_item=item,
+            mode='delta',
+            quantity=Decimal('1'),
+            stock_before=Decimal(index),
+            stock_after=Decimal(index + 1),
+        )
+        for index in range(60)
+    )
+
+    response = admin_client.get(reverse('inventory-adjustment-list'), {'format': 'csv', 'branch': branch.id})
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/csv')
+    assert 'attachment; filename="inventory-adjustments-' in response['Content-Disposition']
+    rows = list(csv.reader(io.StringIO(_content(response).decode('utf-8-sig'))))
+    assert rows[0][:3] == ['id', 'created_at', 'branch']
+    assert len(rows) == 61
+    assert {row[4] for row in rows[1:]} == {'زعفران'}
+
+
+def test_csv_export_streams_under_asgi(admin_user, branch, monkeypatch):
+    monkeypatch.setattr(exports, 'ASYNC_CHUNK_BYTES', 256)
+    item = models.BasicItem.objects.create(name='Saffron', unit='g', unit_price=Decimal('1'))
+    models.InventoryAdjustment.objects.bulk_create(
+        models.InventoryAdjustment(
+            branch=branch,
+            item_type='basic',
+            basic_item=item,
+            mode='delta',
+            quantity=Decimal('1'),
+            stock_before=Decimal(index),
+            stock_after=Decimal(index + 1),
+        )
+        for index in range(40)
+    )
+    pulls = []
+    next_chunks = exports._next_chunks
+    monkeypatch.setattr(exports, '_next_chunks', lambda iterator: pulls.append(1) or next_chunks(iterator))
+    url = reverse('inventory-adjustment-list')
+    request = AsyncRequestFactory().get(url, {'format': 'csv'})
+    force_authenticate(request, admin_user)
+    response = resolve(url).func(request)
+
+    async def collect():
+        parts, pulled_before_first_part = [], None
+        async for part in response:
+            if pulled_before_first_part is None:
+                pulled_before_first_part = len(pulls)
+            parts.append(part)
+        return parts, pulled_before_first_part
+
+    assert response.is_async
+    parts, pulled_before_first_part = async_to_sync(collect)()
+    # The first bytes go out after one pull, not after the writer is drained.
+    assert pulled_before_first_part == 1 and len(pulls) > 2
+    rows = list(csv.reader(io.StringIO(b''.join(parts).decode('utf-8-sig'))))
+    assert len(rows) == 41 and rows[1][4] == 'Saffron'
+
+
+def test_inputs_export_as_xlsx(admin_client, branch):
+    milk = InventoryItem.objects.create(branch=branch, name='Milk & cream', unit='litre')
+    InventoryInput.objects.create(branch=branch, item=milk, quantity=Decimal('2.5'), note='<delivery>')
+
+    response = admin_client.get(reverse('inventory-input-list'), {'format': 'xlsx'})
+
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(_content(response)))
+    sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    rows = sheet.findall(f'{SHEET_NS}sheetData/{SHEET_NS}row')
+    assert len(rows) == 2
+    values = [''.join(cell.itertext()) for cell in rows[1]]
+    assert 'Milk & cream' in values and '2.500' in values and '<delivery>' in values
+
+
+def test_xlsx_writer_yields_chunks_while_iterating():
+    consumed = []
+
+    def rows():
+        for index in range(1500):
+            consumed.append(index)
+            yield [index, f'row {index}']
+
+    stream = stream_xlsx(['n', 'label'], rows(), flush_every=500)
+    first = next(stream)
+    assert len(consumed) == 500
+
+    archive = zipfile.ZipFile(io.BytesIO(first + b''.join(stream)))
+    assert archive.read('xl/worksheets/sheet1.xml').count(b'<row>') == 1501
+
+
+def test_json_list_is_unchanged(admin_client, branch):
+    response = admin_client.get(reverse('inventory-measurement-list'))
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('application/json')
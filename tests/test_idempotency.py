@@ -0,0 +1,86 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+from inventory import models
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def milk():
+    return models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4'))
+
+
+def _adjust(client, branch, item, quantity, key):
+    return client.post(
+        reverse('inventory-adjustment-list'),
+        {'branch_id': branch.id, 'item_type': 'basic', 'basic_item': item.id, 'mode': 'delta', 'quantity': quantity},
+        format='json',
+        **({'HTTP_IDEMPOTENCY_KEY': key} if key else {}),
+    )
+
+
+def _stock(branch, item):
+    return models.BranchBasicItemStock.objects.get(branch=branch, item=item).quantity
+
+
+def test_retried_adjustment_is_applied_once(admin_client, branch, milk):
+    first = _adjust(admin_client, branch, milk, '5', 'retry-1')
+    retry = _adjust(admin_client, branch, milk, '5', 'retry-1')
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.data == first.data
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert _stock(branch, milk) == Decimal('5')
+    assert models.InventoryAdjustment.objects.count() == 1
+
+    assert _adjust(admin_client, branch, milk, '5', 'retry-2').status_code == 201
+    assert _stock(branch, milk) == Decimal('10')
+
+
+def test_key_reused_for_a_different_request_is_rejected(admin_client, branch, milk):
+    assert _adjust(admin_client, branch, milk, '5', 'reused').status_code == 201
+
+    response = _adjust(admin_client, branch, milk, '6', 'reused')
+
+    assert response.status_code == 422
+    assert _stock(branch, milk) == Decimal('5')
+
+
+def test_failed_request_does_not_keep_the_key(admin_client, branch, milk):
+    assert _adjust(admin_client, branch, milk, '-5', 'fix-and-retry').status_code == 400
+    assert not IdempotencyKey.objects.exists()
+
+    models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('8'))
+    assert _adjust(admin_client, branch, milk, '-5', 'fix-and-retry').status_code == 201
+    assert _stock(branch, milk) == Decimal('3')
+
+
+def test_batch_replays_and_expired_keys_are_purged(admin_client, branch, milk):
+    payload = {'branch_id': branch.id, 'lines': [{'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '2'}]}
+    url = reverse('inventory-adjustment-batch')
+
+    first = admin_client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+    retry = admin_client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+
+    assert first.status_code == 201, first.data
+    assert retry.data['batch_id'] == str(first.data['batch_id'])
+    assert _stock(branch, milk) == Decimal('2')
+
+    IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    call_command('purge_idempotency_keys')
+    assert not IdempotencyKey.objects.exists()
+
+
+def test_requests_without_a_key_are_unchanged(admin_client, branch, milk):
+    for _ in range(2):
+        assert _adjust(admin_client, branch, milk, '1', None).status_code == 201
+
+    assert _stock(branch, milk) == Decimal('2')
+    assert not IdempotencyKey.objects.exists()
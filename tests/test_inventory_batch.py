@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory import models
+
+pytestmark = pytest.mark.django_db
+
+
+def _items(count):
+    return models.BasicItem.objects.bulk_create(
+        models.BasicItem(name=f'Item {index}', unit='kg', unit_price=Decimal('1')) for index in range(count)
+    )
+
+
+def test_batch_applies_lines_in_order_with_constant_queries(admin_client, branch):
+    items = _items(30)
+    recipe = models.Recipe.objects.create(name='Cake', price=Decimal('3'))
+    lines = [{'item_type': 'basic', 'basic_item': item.id, 'mode': 'delta', 'quantity': '2'} for item in items]
+    lines += [
+        {'item_type': 'basic', 'basic_item': items[0].id, 'mode': 'delta', 'quantity': '-1.5'},
+        {'item_type': 'recipe', 'recipe': recipe.id, 'mode': 'set', 'quantity': '4'},
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.post(
+            reverse('inventory-adjustment-batch'), {'branch_id': branch.id, 'lines': lines}, format='json'
+        )
+
+    assert response.status_code == 201, response.data
+    assert len(response.data['adjustments']) == 32
+    assert len(queries) < 20
+    first = models.BranchBasicItemStock.objects.get(branch=branch, item=items[0])
+    assert first.quantity == Decimal('0.5')
+    assert models.BranchRecipeStock.objects.get(branch=branch, recipe=recipe).quantity == Decimal('4')
+    adjustments = models.InventoryAdjustment.objects.filter(batch_id=response.data['batch_id'])
+    assert adjustments.count() == 32
+    assert adjustments.get(basic_item=items[0], quantity=Decimal('-1.5')).stock_before == Decimal('2')
+
+
+def test_batch_is_all_or_nothing_with_per_line_errors(admin_client, branch):
+    milk, sugar = _items(2)
+    models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('1'))
+
+    response = admin_client.post(
+        reverse('inventory-adjustment-batch'),
+        {
+            'branch_id': branch.id,
+            'lines': [
+                {'item_type': 'basic', 'basic_item': sugar.id, 'mode': 'set', 'quantity': '9'},
+                {'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '-3'},
+            ],
+        },
+        format='json',
+    )
+
+    assert response.status_code == 400
+    assert response.data['lines'][0] == {}
+    assert response.data['lines'][1] == {'quantity': ['Resulting stock cannot be negative.']}
+    assert not models.InventoryAdjustment.objects.exists()
+    assert not models.BranchBasicItemStock.objects.filter(item=sugar).exists()
+
+
+def test_batch_reports_unknown_items_per_line(admin_client, branch):
+    (item,) = _items(1)
+
+    response = admin_client.post(
+        reverse('inventory-adjustment-batch'),
+        {
+            'branch_id': branch.id,
+            'lines': [
+                {'item_type': 'basic', 'basic_item': item.id, 'mode': 'delta', 'quantity': '1'},
+                {'item_type': 'basic', 'basic_item': 999999, 'mode': 'delta', 'quantity': '1'},
+            ],
+        },
+        format='json',
+    )
+
+    assert response.status_code == 400
+    assert response.data['lines'][0] == {}
+    assert response.data['lines'][1] == {'basic_item': ['Unknown basic item.']}
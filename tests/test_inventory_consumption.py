@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory import models
+
+pytestmark = pytest.mark.django_db
+
+
+def _recipes_sharing(items, count):
+    recipes = models.Recipe.objects.bulk_create(
+        models.Recipe(name=f'Recipe {index}', price=Decimal('10')) for index in range(count)
+    )
+    models.RecipeIngredient.objects.bulk_create(
+        models.RecipeIngredient(recipe=recipe, basic_item=item, amount=Decimal('0.5'))
+        for recipe in recipes
+        for item in items
+    )
+    return recipes
+
+
+def _consume(client, branch, lines):
+    return client.post(
+        reverse('recipe-consumption-list'), {'branch_id': branch.id, 'lines': lines}, format='json'
+    )
+
+
+def test_consumption_deducts_aggregated_ingredients_in_constant_queries(admin_client, branch):
+    milk, coffee = models.BasicItem.objects.bulk_create(
+        models.BasicItem(name=name, unit='kg', unit_price=Decimal('1')) for name in ('Milk', 'Coffee')
+    )
+    for item in (milk, coffee):
+        models.BranchBasicItemStock.objects.create(branch=branch, item=item, quantity=Decimal('100'))
+    recipes = _recipes_sharing([milk, coffee], 40)
+    lines = [{'recipe': recipe.id, 'quantity': '2'} for recipe in recipes]
+    lines.append({'recipe': recipes[0].id, 'quantity': '1'})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = _consume(admin_client, branch, lines)
+
+    assert response.status_code == 201, response.data
+    assert len(queries) <= 20
+    # 40 recipes x 2 + 1 extra, each needing 0.5 of both items.
+    for item in (milk, coffee):
+        assert models.BranchBasicItemStock.objects.get(branch=branch, item=item).quantity == Decimal('59.5')
+    consumption = models.RecipeConsumption.objects.get(pk=response.data['id'])
+    assert consumption.lines.count() == 41
+    adjustments = consumption.adjustments.order_by('basic_item_id')
+    assert [adjustment.quantity for adjustment in adjustments] == [Decimal('-40.5'), Decimal('-40.5')]
+    assert len(response.data['adjustments']) == 2
+
+
+def test_consumption_is_rejected_when_an_ingredient_runs_out(admin_client, branch):
+    sugar = models.BasicItem.objects.create(name='Sugar', unit='kg', unit_price=Decimal('1'))
+    models.BranchBasicItemStock.objects.create(branch=branch, item=sugar, quantity=Decimal('1'))
+    (cake,) = _recipes_sharing([sugar], 1)
+
+    response = _consume(admin_client, branch, [{'recipe': cake.id, 'quantity': '3'}])
+
+    assert response.status_code == 400
+    assert response.data['ingredients'] == {str(sugar.id): ['Resulting stock cannot be negative.']}
+    assert not models.RecipeConsumption.objects.exists()
+    assert models.BranchBasicItemStock.objects.get(item=sugar).quantity == Decimal('1')
+
+
+def test_consumption_reports_unknown_recipes_per_line(admin_client, branch):
+    response = _consume(admin_client, branch, [{'recipe': 999999, 'quantity': '1'}])
+
+    assert response.status_code == 400
+    assert response.data['lines'] == [{'recipe': ['Unknown recipe.']}]
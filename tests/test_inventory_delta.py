@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers as drf_serializers
+
+from inventory import models, serializers, services
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def milk():
+    return models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('5'))
+
+
+def _save(branch, **data):
+    serializer = serializers.InventoryAdjustmentSerializer(data={'branch_id': branch.id, **data})
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(branch=branch)
+
+
+def test_delta_uses_guarded_update_without_row_lock(branch, milk):
+    models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('3'))
+
+    with CaptureQueriesContext(connection) as queries:
+        adjustment = _save(branch, item_type='basic', basic_item=milk.id, mode='delta', quantity='2')
+
+    sql = ' '.join(query['sql'] for query in queries)
+    assert 'FOR UPDATE' not in sql
+    assert adjustment.stock_before == Decimal('3')
+    assert adjustment.stock_after == Decimal('5')
+    assert models.BranchBasicItemStock.objects.get(branch=branch, item=milk).quantity == Decimal('5')
+
+
+def test_delta_creates_missing_row_and_rejects_negative_result(branch, milk):
+    adjustment = _save(branch, item_type='basic', basic_item=milk.id, mode='delta', quantity='1.5')
+    assert adjustment.stock_before == Decimal('0')
+
+    with pytest.raises(drf_serializers.ValidationError) as excinfo:
+        _save(branch, item_type='basic', basic_item=milk.id, mode='delta', quantity='-2')
+
+    assert 'Resulting stock cannot be negative.' in str(excinfo.value)
+    assert models.BranchBasicItemStock.objects.get(branch=branch, item=milk).quantity == Decimal('1.5')
+    assert models.InventoryAdjustment.objects.count() == 1
+
+
+def test_returning_statement_applies_guard(branch, milk):
+    # sqlite >= 3.35 understands the same UPDATE ... RETURNING used on postgres.
+    models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('2'))
+
+    new_quantity = services._increment_returning(models.BranchBasicItemStock, branch, 'item', milk.id, Decimal('-1'))
+    refused = services._increment_returning(models.BranchBasicItemStock, branch, 'item', milk.id, Decimal('-5'))
+
+    assert Decimal(str(new_quantity)) == Decimal('1')
+    assert refused is None
+
+
+def test_database_rejects_negative_stock(branch, milk):
+    with pytest.raises(IntegrityError), transaction.atomic():
+        models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('-1'))
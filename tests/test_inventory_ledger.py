@@ -0,0 +1,78 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory import models
+from miyanGroup.models import Branch
+
+pytestmark = pytest.mark.django_db
+
+
+def _adjust(client, branch, item, mode, quantity):
+    response = client.post(
+        reverse('inventory-adjustment-list'),
+        {'branch_id': branch.id, 'item_type': 'basic', 'basic_item': item.id, 'mode': mode, 'quantity': quantity},
+        format='json',
+    )
+    assert response.status_code == 201, response.data
+    return models.InventoryAdjustment.objects.get(pk=response.data['id'])
+
+
+def _backdate(adjustment, moment):
+    models.InventoryAdjustment.objects.filter(pk=adjustment.pk).update(created_at=moment)
+
+
+def _stock_as_of(client, branch, as_of):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            reverse('branch-basic-stock-list'), {'branch': branch.id, 'as_of': as_of.isoformat()}
+        )
+    assert response.status_code == 200, response.data
+    assert sum('inventory_inventoryadjustment' in q['sql'] for q in queries) == 1
+    return {row['item']: Decimal(row['quantity']) for row in response.data['results']}
+
+
+def test_as_of_uses_checkpoint_plus_later_movements(admin_client):
+    branch = Branch.objects.create(name='Ledger Branch', code='ledger-test')
+    beans = models.BasicItem.objects.create(name='Beans', unit='kg', unit_price=Decimal('9'))
+    start = timezone.now() - timedelta(days=3)
+    models.BranchBasicItemStock.objects.filter(pk=models.BranchBasicItemStock.objects.create(
+        branch=branch, item=beans, quantity=Decimal('0')
+    ).pk).update(created_at=start)
+
+    _backdate(_adjust(admin_client, branch, beans, 'set', '10'), start + timedelta(hours=1))
+    _backdate(_adjust(admin_client, branch, beans, 'delta', '-4'), start + timedelta(days=1))
+    call_command('inventory_checkpoint', at=(start + timedelta(days=1, hours=1)).isoformat())
+    _backdate(_adjust(admin_client, branch, beans, 'delta', '5'), start + timedelta(days=2))
+
+    assert models.InventoryCheckpoint.objects.get(basic_item=beans).quantity == Decimal('6')
+    assert _stock_as_of(admin_client, branch, start + timedelta(hours=2)) == {beans.id: Decimal('10')}
+    assert _stock_as_of(admin_client, branch, start + timedelta(days=1, hours=2)) == {beans.id: Decimal('6')}
+    assert _stock_as_of(admin_client, branch, timezone.now()) == {beans.id: Decimal('11')}
+
+
+def test_direct_stock_edit_is_recorded_in_ledger(admin_client):
+    branch = Branch.objects.create(name='Ledger Branch', code='ledger-edit')
+    milk = models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('5'))
+    stock = models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('3'))
+
+    response = admin_client.patch(
+        reverse('branch-basic-stock-detail', args=[stock.pk]), {'quantity': '7'}, format='json'
+    )
+
+    assert response.status_code == 200, response.data
+    entry = models.InventoryAdjustment.objects.get(basic_item=milk)
+    assert (entry.mode, entry.stock_before, entry.stock_after) == ('set', Decimal('3'), Decimal('7'))
+
+
+def test_invalid_as_of_is_rejected(admin_client):
+    response = admin_client.get(reverse('branch-basic-stock-list'), {'as_of': 'yesterday'})
+
+    assert response.status_code == 400
+    assert 'as_of' in response.data
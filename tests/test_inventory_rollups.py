@@ -0,0 +1,96 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory import models, rollups
+from miyanGroup.models import InventoryInput, InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+# 21:00 UTC is 00:30 the next day in Tehran (UTC+03:30).
+LATE_EVENING_UTC = datetime(2026, 3, 1, 21, 0, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def beans():
+    return models.BasicItem.objects.create(name='Beans', unit='kg', unit_price=Decimal('9'))
+
+
+def _ledger(branch, item, mode, quantity, before, after, at):
+    entry = models.InventoryAdjustment.objects.create(
+        branch=branch,
+        item_type='basic',
+        basic_item=item,
+        mode=mode,
+        quantity=Decimal(quantity),
+        stock_before=Decimal(before),
+        stock_after=Decimal(after),
+    )
+    models.InventoryAdjustment.objects.filter(pk=entry.pk).update(created_at=at)
+    return entry
+
+
+def test_refresh_buckets_by_tehran_day_and_is_incremental(branch, beans):
+    _ledger(branch, beans, 'delta', '10', '0', '10', LATE_EVENING_UTC - timedelta(hours=2))
+    _ledger(branch, beans, 'delta', '-3', '10', '7', LATE_EVENING_UTC)
+    _ledger(branch, beans, 'set', '5', '7', '5', LATE_EVENING_UTC + timedelta(hours=1))
+
+    assert rollups.refresh_all(settle_seconds=0)['daily-stock'] == 3
+    by_day = {rollup.day: rollup for rollup in models.DailyStockRollup.objects.all()}
+    assert set(by_day) == {date(2026, 3, 1), date(2026, 3, 2)}
+    assert by_day[date(2026, 3, 1)].inbound == Decimal('10')
+    assert (by_day[date(2026, 3, 2)].outbound, by_day[date(2026, 3, 2)].corrections) == (Decimal('3'), Decimal('-2'))
+
+    assert rollups.refresh_all(settle_seconds=0)['daily-stock'] == 0
+    _ledger(branch, beans, 'delta', '4', '5', '9', LATE_EVENING_UTC + timedelta(hours=2))
+    call_command('refresh_inventory_rollups', settle_seconds=0)
+
+    # Only the new row was added; earlier sums were not counted twice.
+    assert models.DailyStockRollup.objects.get(day=date(2026, 3, 2)).inbound == Decimal('4')
+    assert models.DailyStockRollup.objects.get(day=date(2026, 3, 2)).entries == 3
+
+
+def test_watermark_stops_before_unsettled_rows(branch, beans):
+    _ledger(branch, beans, 'delta', '1', '0', '1', timezone.now() - timedelta(hours=1))
+    recent = _ledger(branch, beans, 'delta', '1', '1', '2', timezone.now())
+    _ledger(branch, beans, 'delta', '1', '2', '3', timezone.now() - timedelta(hours=1))
+
+    assert rollups.refresh_all(settle_seconds=600)['daily-stock'] == 1
+    assert models.RollupWatermark.objects.get(name='daily-stock').last_id == recent.pk - 1
+
+
+def test_input_rollups_and_usage_report(admin_client, branch, beans):
+    milk = InventoryItem.objects.create(branch=branch, name='Milk', unit='litre')
+    for quantity in ('2', '3'):
+        entry = InventoryInput.objects.create(branch=branch, item=milk, quantity=Decimal(quantity))
+        InventoryInput.objects.filter(pk=entry.pk).update(recorded_at=LATE_EVENING_UTC)
+    _ledger(branch, beans, 'delta', '10', '0', '10', LATE_EVENING_UTC - timedelta(days=3))
+    _ledger(branch, beans, 'delta', '-4', '10', '6', LATE_EVENING_UTC)
+    call_command('refresh_inventory_rollups', settle_seconds=0)
+
+    inputs = admin_client.get(reverse('input-rollup-list'), {'branch': branch.id})
+    assert inputs.status_code == 200
+    assert [(row['day'], row['quantity'], row['entries']) for row in inputs.data['results']] == [
+        ('2026-03-02', '5.000', 2)
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        usage = admin_client.get(
+            reverse('stock-rollup-usage'), {'branch': branch.id, 'from': '2026-02-26', 'to': '2026-03-02'}
+        )
+    assert usage.status_code == 200
+    assert not any('inventory_inventoryadjustment' in query['sql'] for query in queries)
+    (row,) = usage.data['results']
+    assert (row['basic_item'], row['inbound'], row['outbound'], row['entries']) == (beans.id, '10.000', '4.000', 2)
+
+    bad = admin_client.get(reverse('stock-rollup-list'), {'from': 'last week'})
+    assert bad.status_code == 400
+    for params in ({'from': '2026-02-30'}, {'branch': 'abc'}, {'basic_item': 'x'}):
+        response = admin_client.get(reverse('stock-rollup-list'), params)
+        assert response.status_code == 400 and set(response.data) == set(params)
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from inventory import models
+from miyanGroup.models import Branch
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stocked_branch():
+    branch = Branch.objects.create(name='Snapshot Branch', code='snapshot-test')
+    milk = models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4'))
+    beans = models.BasicItem.objects.create(name='Beans', unit='kg', unit_price=Decimal('9'))
+    latte = models.Recipe.objects.create(name='Latte', price=Decimal('10'))
+    models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('3'))
+    models.BranchBasicItemStock.objects.create(branch=branch, item=beans, quantity=Decimal('1.5'))
+    models.BranchRecipeStock.objects.create(branch=branch, recipe=latte, quantity=Decimal('2'))
+    return branch
+
+
+def _url(branch):
+    return reverse('inventory-branch-snapshot', kwargs={'pk': branch.pk})
+
+
+def test_snapshot_is_columnar_with_branch_once(admin_client, stocked_branch):
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(_url(stocked_branch))
+
+    assert response.status_code == 200
+    assert response.data['branch']['code'] == 'snapshot-test'
+    assert response.data['basic_items'] == {
+        'id': [item.pk for item in models.BasicItem.objects.order_by('name')],
+        'name': ['Beans', 'Milk'],
+        'unit': ['kg', 'litre'],
+        'quantity': ['1.500', '3.000'],
+    }
+    assert response.data['recipes']['name'] == ['Latte']
+    assert response.data['recipes']['quantity'] == ['2.000']
+    assert len([q for q in queries if q['sql'].startswith('SELECT')]) == 3
+
+
+def test_etag_revalidates_until_an_adjustment_lands(admin_client, stocked_branch):
+    first = admin_client.get(_url(stocked_branch))
+    etag = first['ETag']
+
+    unchanged = admin_client.get(_url(stocked_branch), HTTP_IF_NONE_MATCH=etag)
+    assert unchanged.status_code == 304
+    assert unchanged['ETag'] == etag
+
+    milk = models.BasicItem.objects.get(name='Milk')
+    response = admin_client.post(
+        reverse('inventory-adjustment-list'),
+        {'branch_id': stocked_branch.id, 'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '-1'},
+        format='json',
+    )
+    assert response.status_code == 201, response.data
+
+    changed = admin_client.get(_url(stocked_branch), HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed['ETag'] != etag
+    assert changed.data['version'] == response.data['id']
+    assert changed.data['basic_items']['quantity'] == ['1.500', '2.000']
+
+
+def test_staff_cannot_snapshot_another_branch(django_user_model, stocked_branch):
+    client = APIClient()
+    client.force_authenticate(django_user_model.objects.create_user(username='clerk', password='x'))
+
+    response = client.get(_url(stocked_branch))
+
+    assert response.status_code == 403
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from core import metrics
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    settings.METRICS_TOKEN = 'scrape-secret'
+    metrics.reset_registry()
+    yield tmp_path
+    metrics.reset_registry()
+
+
+def test_metrics_endpoint_reports_view_labels(client, metrics_dir):
+    client.get(reverse('core-health'))
+    client.get(reverse('beresht-menu-main'))
+
+    response = client.get(reverse('core-metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    body = response.content.decode()
+    assert (
+        'http_requests_total{action="get",method="GET",status="200",view="HealthcheckView"} 1'
+        in body
+    )
+    assert 'http_request_duration_seconds_bucket{action="main",view="BereshtMenuViewSet",le="+Inf"} 1' in body
+    assert '# TYPE http_request_db_queries histogram' in body
+
+
+def test_metrics_merge_worker_snapshots(client, metrics_dir):
+    other_worker = {
+        'pid': 999999999,
+        'counters': [['http_requests_total', [['action', 'list'], ['method', 'GET'], ['status', '200'], ['view', 'X']], 4]],
+        'gauges': [['http_requests_in_flight', [], 3]],
+        'histograms': [],
+    }
+    (metrics_dir / 'metrics-999999999.json').write_text(json.dumps(other_worker))
+    metrics.record_cache_lookup('default', True)
+    metrics.record_cache_lookup('default', False)
+
+    body = client.get(reverse('core-metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret').content.decode()
+
+    assert 'http_requests_total{action="list",method="GET",status="200",view="X"} 4' in body
+    # Gauges of dead workers are dropped; only this process is in flight.
+    assert 'http_requests_in_flight 1' in body
+    assert 'cache_hit_ratio{cache="default"} 0.5' in body
+
+
+def test_metrics_endpoint_requires_the_token_or_a_staff_user(client, admin_client, metrics_dir, settings):
+    url = reverse('core-metrics')
+
+    assert client.get(url).status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret').status_code == 200
+    assert admin_client.get(url).status_code == 200
+
+    # Without a token configured only staff can read the metrics.
+    settings.METRICS_TOKEN = ''
+    assert client.get(url, HTTP_AUTHORIZATION='Bearer ').status_code == 403
+    assert admin_client.get(url).status_code == 200
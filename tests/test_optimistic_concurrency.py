@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+from core.models import VersionConflict
+from inventory import models, recipe_graph
+from miyanGroup.models import Branch
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_recipe_graph(monkeypatch):
+    monkeypatch.setattr(recipe_graph, '_cached', None)
+
+
+@pytest.fixture
+def milk():
+    return models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4'))
+
+
+def test_if_match_guards_basic_item_updates(admin_client, milk):
+    url = reverse('basic-item-detail', kwargs={'pk': milk.pk})
+    read = admin_client.get(url)
+    assert read['ETag'] == '"1"'
+
+    first = admin_client.patch(url, {'unit_price': '5'}, format='json', HTTP_IF_MATCH=read['ETag'])
+    stale = admin_client.patch(url, {'unit_price': '6'}, format='json', HTTP_IF_MATCH=read['ETag'])
+
+    assert first.status_code == 200
+    assert first['ETag'] == '"2"'
+    assert stale.status_code == 412
+    milk.refresh_from_db()
+    assert (milk.unit_price, milk.version) == (Decimal('5'), 2)
+
+
+def test_stock_edit_conflicts_with_a_concurrent_adjustment(admin_client, milk):
+    branch = Branch.objects.create(name='Version Branch', code='version-test')
+    row = models.BranchBasicItemStock.objects.create(branch=branch, item=milk, quantity=Decimal('3'))
+    url = reverse('branch-basic-stock-detail', kwargs={'pk': row.pk})
+    version = admin_client.get(url).data['version']
+
+    adjusted = admin_client.post(
+        reverse('inventory-adjustment-list'),
+        {'branch_id': branch.id, 'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '2'},
+        format='json',
+    )
+    assert adjusted.status_code == 201, adjusted.data
+    response = admin_client.patch(url, {'quantity': '10', 'version': version}, format='json')
+
+    assert response.status_code == 412
+    row.refresh_from_db()
+    assert (row.quantity, row.version) == (Decimal('5'), version + 1)
+    assert models.InventoryAdjustment.objects.count() == 1
+
+
+def test_stale_recipe_edit_leaves_ingredients_alone(admin_client, milk):
+    latte = models.Recipe.objects.create(name='Latte', price=Decimal('10'))
+    models.RecipeIngredient.objects.create(recipe=latte, basic_item=milk, amount=Decimal('0.5'))
+    models.Recipe.objects.get(pk=latte.pk).save()
+
+    response = admin_client.patch(
+        reverse('recipe-detail', kwargs={'pk': latte.pk}),
+        {'price': '12', 'ingredients': [], 'version': 1},
+        format='json',
+    )
+
+    assert response.status_code == 412
+    assert latte.ingredients.count() == 1
+
+
+def test_concurrent_saves_of_one_row_conflict(milk):
+    first = models.BasicItem.objects.get(pk=milk.pk)
+    second = models.BasicItem.objects.get(pk=milk.pk)
+    first.unit_price = Decimal('5')
+    first.save()
+    second.unit_price = Decimal('6')
+
+    with pytest.raises(VersionConflict), transaction.atomic():
+        second.save()
+
+    assert second.version == 1
+    milk.refresh_from_db()
+    assert milk.unit_price == Decimal('5')
+
+
+def test_unconditional_patch_still_works(admin_client, milk):
+    response = admin_client.patch(
+        reverse('basic-item-detail', kwargs={'pk': milk.pk}), {'unit': 'ml'}, format='json'
+    )
+
+    assert response.status_code == 200
+    assert response.data['version'] == 2
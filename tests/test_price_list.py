@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from inventory import models, pricelist, recipe_graph
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_recipe_graph(monkeypatch):
+    monkeypatch.setattr(recipe_graph, '_cached', None)
+
+
+def test_parse_normalizes_arabic_letters_and_persian_digits():
+    rows = pricelist.parse_price_list('نام,واحد,قیمت\nشير كاكائو,۱ لیتری,"۱۲۰,۵۰۰"\n')
+
+    assert len(rows) == 1
+    assert rows[0].name == 'شیر کاکائو'
+    assert rows[0].unit == '1 لیتری'
+    assert rows[0].unit_price == Decimal('120500')
+    assert rows[0].line == 2
+
+
+def test_parse_reports_every_bad_line():
+    with pytest.raises(pricelist.PriceListError) as excinfo:
+        pricelist.parse_price_list('Milk,litre,abc\nSugar,kg\nMilk,litre,5\nمیلک,لیتر,5\n')
+
+    assert set(excinfo.value.errors) == {1, 2}
+
+
+def test_preview_reports_diff_without_writing(admin_client):
+    models.BasicItem.objects.create(name='شیر', unit='1 لیتری', unit_price=Decimal('74000'))
+    models.BasicItem.objects.create(name='نی 6', unit='1 بسته', unit_price=Decimal('68200'))
+    models.BasicItem.objects.create(name='Old', unit='kg', unit_price=Decimal('1'))
+
+    response = admin_client.post(
+        reverse('basic-item-price-list'),
+        {'csv': 'شير,1 لیتری,80000\nنی ۶,1 بسته,68200\nقند,1 کیلو,90000\n'},
+        format='json',
+    )
+
+    assert response.status_code == 200, response.data
+    assert response.data['applied'] is False
+    assert [row['name'] for row in response.data['created']] == ['قند']
+    assert response.data['updated'][0]['changes'] == {'unit_price': ['74000.00', '80000']}
+    assert response.data['unchanged'] == 1
+    assert [row['name'] for row in response.data['missing']] == ['Old']
+    assert models.BasicItem.objects.get(name='شیر').unit_price == Decimal('74000')
+    assert not models.BasicItem.objects.filter(name='قند').exists()
+
+
+def test_apply_upserts_and_recosts_recipes(admin_client):
+    milk = models.BasicItem.objects.create(name='شیر', unit='1 لیتری', unit_price=Decimal('4'))
+    latte = models.Recipe.objects.create(name='Latte', price=Decimal('10'))
+    models.RecipeIngredient.objects.create(recipe=latte, basic_item=milk, amount=Decimal('0.5'))
+    # Windows-1256 has no Persian yeh; Excel writes the Arabic one.
+    upload = SimpleUploadedFile('prices.csv', 'شير,1 ليتری,6\nقند,1 کيلو,3\n'.replace('ی', 'ي').encode('cp1256'))
+
+    response = admin_client.post(reverse('basic-item-price-list'), {'file': upload, 'apply': 'true'})
+
+    assert response.status_code == 200, response.data
+    assert response.data['applied'] is True
+    assert response.data['recipes_recosted'] == 1
+    milk.refresh_from_db()
+    latte.refresh_from_db()
+    assert milk.unit_price == Decimal('6')
+    assert latte.cost == Decimal('3.00')
+    assert models.BasicItem.objects.filter(name='قند', unit_price=Decimal('3')).exists()
+
+
+def test_invalid_lines_return_400(admin_client):
+    response = admin_client.post(reverse('basic-item-price-list'), {'csv': 'Milk,litre,-1\n'}, format='json')
+
+    assert response.status_code == 400
+    assert '1' in response.data['lines']
+
+
+def test_price_list_requires_admin(django_user_model):
+    client = APIClient()
+    client.force_authenticate(django_user_model.objects.create_user(username='clerk', password='x'))
+
+    response = client.post(reverse('basic-item-price-list'), {'csv': 'Milk,litre,1\n'}, format='json')
+
+    assert response.status_code == 403
+
+
+def test_prune_keeps_items_still_in_use(admin_client):
+    used = models.BasicItem.objects.create(name='Cocoa', unit='kg', unit_price=Decimal('5'))
+    models.BasicItem.objects.create(name='Unused', unit='kg', unit_price=Decimal('1'))
+    mocha = models.Recipe.objects.create(name='Mocha', price=Decimal('10'))
+    models.RecipeIngredient.objects.create(recipe=mocha, basic_item=used, amount=Decimal('0.1'))
+
+    response = admin_client.post(
+        reverse('basic-item-price-list'),
+        {'csv': 'Milk,litre,4\n', 'apply': True, 'prune_missing': True},
+        format='json',
+    )
+
+    assert response.status_code == 200, response.data
+    assert response.data['protected'] == [{'id': used.pk, 'name': 'Cocoa'}]
+    assert set(models.BasicItem.objects.values_list('name', flat=True)) == {'Cocoa', 'Milk'}
+
+
+def test_apply_bumps_the_version_of_rows_edited_after_the_diff():
+    milk = models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4'))
+    diff = pricelist.diff_price_list(pricelist.parse_price_list('Milk,litre,6\n'))
+
+    # An admin edit lands between the preview and the apply.
+    milk.unit_price = Decimal('5')
+    milk.save()
+    assert milk.version == 2
+
+    pricelist.apply_price_list(diff)
+
+    milk.refresh_from_db()
+    assert (milk.unit_price, milk.version) == (Decimal('6'), 3)
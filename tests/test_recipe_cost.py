@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory import models, recipe_graph
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_recipe_graph(monkeypatch):
+    # The memoized graph outlives the test database; never share it across tests.
+    monkeypatch.setattr(recipe_graph, '_cached', None)
+
+
+def test_recipe_cost_and_margin_follow_ingredients(admin_client):
+    milk = models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4.00'))
+    coffee = models.BasicItem.objects.create(name='Coffee', unit='kg', unit_price=Decimal('50.00'))
+
+    response = admin_client.post(
+        reverse('recipe-list'),
+        {
+            'name': 'Latte',
+            'price': '12.00',
+            'ingredients': [{'basic_item': milk.id, 'amount': '0.250'}, {'basic_item': coffee.id, 'amount': '0.020'}],
+        },
+        format='json',
+    )
+
+    assert response.status_code == 201, response.data
+    assert response.data['cost'] == '2.00'
+    assert response.data['margin'] == '10.00'
+
+    latte = models.Recipe.objects.get(pk=response.data['id'])
+    models.RecipeIngredient.objects.filter(recipe=latte, basic_item=coffee).delete()
+    latte.refresh_from_db()
+    assert latte.cost == Decimal('1.00')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_unit_price_change_only_touches_recipes_using_the_item():
+    flour = models.BasicItem.objects.create(name='Flour', unit='kg', unit_price=Decimal('2.00'))
+    salt = models.BasicItem.objects.create(name='Salt', unit='kg', unit_price=Decimal('1.00'))
+    bread = models.Recipe.objects.create(name='Bread', price=Decimal('5'))
+    brine = models.Recipe.objects.create(name='Brine', price=Decimal('1'))
+    models.RecipeIngredient.objects.create(recipe=bread, basic_item=flour, amount=Decimal('0.5'))
+    models.RecipeIngredient.objects.create(recipe=brine, basic_item=salt, amount=Decimal('0.1'))
+    models.Recipe.objects.filter(pk=brine.pk).update(cost=Decimal('99'))
+    recipe_graph.get_recipe_graph()
+
+    flour.unit_price = Decimal('3.00')
+    with CaptureQueriesContext(connection) as queries:
+        flour.save()
+
+    # The item update plus one recipe layer; sync change-log writes aside.
+    assert len([q for q in queries if q['sql'].startswith('UPDATE "inventory_')]) == 2
+    bread.refresh_from_db()
+    brine.refresh_from_db()
+    assert bread.cost == Decimal('1.50')
+    assert brine.cost == Decimal('99')
+
+
+def test_recipe_list_reads_stored_cost_without_aggregation(admin_client):
+    item = models.BasicItem.objects.create(name='Tea', unit='kg', unit_price=Decimal('10.00'))
+    for index in range(5):
+        recipe = models.Recipe.objects.create(name=f'Tea {index}', price=Decimal('3'))
+        models.RecipeIngredient.objects.create(recipe=recipe, basic_item=item, amount=Decimal('0.010'))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(reverse('recipe-list'))
+
+    assert response.status_code == 200
+    assert not any('SUM(' in query['sql'].upper() for query in queries)
+    results = response.data['results'] if isinstance(response.data, dict) else response.data
+    assert {row['cost'] for row in results} == {'0.10'}
+
+
+def test_ingredient_sync_rolls_costs_up_once(admin_client):
+    items = [
+        models.BasicItem.objects.create(name=f'Spice {index}', unit='kg', unit_price=Decimal('1.00'))
+        for index in range(12)
+    ]
+    recipe = models.Recipe.objects.create(name='Curry', price=Decimal('20'))
+    for item in items[:3]:
+        models.RecipeIngredient.objects.create(recipe=recipe, basic_item=item, amount=Decimal('1'))
+    payload = [{'basic_item': item.id, 'amount': '2'} for item in items[2:]]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.patch(reverse('recipe-detail', args=[recipe.pk]), {'ingredients': payload}, format='json')
+
+    assert response.status_code == 200, response.data
+    assert response.data['cost'] == '20.00'
+    cost_updates = [q for q in queries if q['sql'].startswith('UPDATE "inventory_recipe" SET "cost"')]
+    assert len(cost_updates) == 1
+    assert len(queries) < 30
+    assert set(recipe.ingredients.values_list('basic_item', flat=True)) == {item.id for item in items[2:]}
+
+
+def test_deleting_a_recipe_rebuilds_the_graph_once(admin_client, admin_site_client):
+    items = models.BasicItem.objects.bulk_create(
+        models.BasicItem(name=f'Herb {index}', unit='kg', unit_price=Decimal('1.00')) for index in range(8)
+    )
+    recipes = [models.Recipe.objects.create(name=f'Stew {index}', price=Decimal('9')) for index in range(3)]
+    for recipe in recipes:
+        for item in items:
+            models.RecipeIngredient.objects.create(recipe=recipe, basic_item=item, amount=Decimal('1'))
+
+    with CaptureQueriesContext(connection) as api_queries:
+        response = admin_client.delete(reverse('recipe-detail', args=[recipes[0].pk]))
+    with CaptureQueriesContext(connection) as admin_queries:
+        response_admin = admin_site_client.post(
+            reverse('admin:inventory_recipe_changelist'),
+            {'action': 'delete_selected', '_selected_action': [recipes[1].pk, recipes[2].pk], 'post': 'yes'},
+        )
+
+    assert response.status_code == 204
+    assert response_admin.status_code == 302
+    assert not models.Recipe.objects.exists()
+    for queries in (api_queries, admin_queries):
+        sql = [query['sql'] for query in queries]
+        assert sum(statement.startswith('UPDATE "core_cacheversion"') for statement in sql) == 1
+        assert not any(statement.startswith('UPDATE "inventory_recipe" SET "cost"') for statement in sql)
@@ -0,0 +1,138 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory import models, recipe_graph
+from inventory.services import explode_recipes
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_recipe_graph(monkeypatch):
+    # The memoized graph outlives the test database; never share it across tests.
+    monkeypatch.setattr(recipe_graph, '_cached', None)
+
+
+@pytest.fixture
+def latte_chain():
+    """latte -> (milk, vanilla syrup -> (sugar, water))"""
+    sugar = models.BasicItem.objects.create(name='Sugar', unit='kg', unit_price=Decimal('2.00'))
+    milk = models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4.00'))
+    syrup = models.Recipe.objects.create(name='Vanilla syrup', price=Decimal('0'))
+    latte = models.Recipe.objects.create(name='Vanilla latte', price=Decimal('10'))
+    models.RecipeIngredient.objects.create(recipe=syrup, basic_item=sugar, amount=Decimal('0.500'))
+    models.RecipeIngredient.objects.create(recipe=latte, basic_item=milk, amount=Decimal('0.250'))
+    models.RecipeIngredient.objects.create(recipe=latte, sub_recipe=syrup, amount=Decimal('0.100'))
+    return latte, syrup, sugar, milk
+
+
+def test_cost_rolls_up_through_sub_recipes(latte_chain):
+    latte, syrup, sugar, _ = latte_chain
+    latte.refresh_from_db()
+    assert latte.cost == Decimal('1.10')
+
+    sugar.unit_price = Decimal('12.00')
+    sugar.save()
+
+    syrup.refresh_from_db()
+    latte.refresh_from_db()
+    assert syrup.cost == Decimal('6.00')
+    assert latte.cost == Decimal('1.60')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_requirements_are_memoized_per_graph_version(latte_chain):
+    latte, _, sugar, milk = latte_chain
+    graph = recipe_graph.get_recipe_graph()
+
+    with CaptureQueriesContext(connection) as queries:
+        assert recipe_graph.get_recipe_graph() is graph
+        required = explode_recipes({latte.pk: Decimal('10')})
+
+    assert len(queries) == 3  # the graph version twice and BasicItem in_bulk
+    assert {item_id: total for item_id, (_, total) in required.items()} == {
+        milk.pk: Decimal('2.5'),
+        sugar.pk: Decimal('0.5'),
+    }
+
+    models.RecipeIngredient.objects.filter(recipe=latte, basic_item=milk).delete()
+    assert recipe_graph.get_recipe_graph() is not graph
+    assert recipe_graph.get_recipe_graph().requirements(latte.pk) == {sugar.pk: Decimal('0.05')}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_a_change_made_by_another_worker_reaches_this_one(latte_chain, monkeypatch):
+    latte, _, sugar, milk = latte_chain
+    stale = recipe_graph.get_recipe_graph()
+    this_worker = recipe_graph._cached
+
+    # Another worker, with its own memo and its own local cache, edits the recipe.
+    monkeypatch.setattr(recipe_graph, '_cached', None)
+    models.RecipeIngredient.objects.filter(recipe=latte, basic_item=milk).delete()
+    cache.clear()
+    monkeypatch.setattr(recipe_graph, '_cached', this_worker)
+
+    graph = recipe_graph.get_recipe_graph()
+    assert graph is not stale
+    assert graph.requirements(latte.pk) == {sugar.pk: Decimal('0.05')}
+
+
+def test_cycles_are_rejected_on_save(latte_chain, admin_client):
+    latte, syrup, sugar, _ = latte_chain
+
+    ingredient = models.RecipeIngredient(recipe=syrup, sub_recipe=latte, amount=Decimal('1'))
+    with pytest.raises(ValidationError):
+        ingredient.full_clean()
+
+    response = admin_client.patch(
+        reverse('recipe-detail', args=[syrup.pk]),
+        {'ingredients': [{'basic_item': sugar.pk, 'amount': '0.5'}, {'sub_recipe': latte.pk, 'amount': '1'}]},
+        format='json',
+    )
+    assert response.status_code == 400
+    assert 'ingredients' in response.data
+    assert not models.RecipeIngredient.objects.filter(recipe=syrup, sub_recipe=latte).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_ingredient_change_keeps_the_memo(latte_chain):
+    latte, _, sugar, _ = latte_chain
+    graph = recipe_graph.get_recipe_graph()
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        models.RecipeIngredient.objects.create(recipe=latte, basic_item=sugar, amount=Decimal('0.010'))
+        assert sugar.pk in recipe_graph.get_recipe_graph().requirements(latte.pk)
+        raise RuntimeError
+
+    with CaptureQueriesContext(connection) as queries:
+        assert recipe_graph.get_recipe_graph() is graph
+    assert len(queries) == 1  # the graph version only
+
+
+def test_traversals_raise_on_a_stored_cycle():
+    graph = recipe_graph.RecipeGraph([(1, None, 2, Decimal('1')), (2, None, 1, Decimal('1')), (3, 7, None, Decimal('1'))])
+
+    with pytest.raises(recipe_graph.RecipeCycleError):
+        graph.layers({1, 2})
+    with pytest.raises(recipe_graph.RecipeCycleError):
+        graph.requirements(1)
+    assert graph.layers({3}) == [[3]]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_locked_check_sees_edges_the_memo_missed(latte_chain):
+    latte, syrup, _, _ = latte_chain
+    caramel = models.Recipe.objects.create(name='Caramel', price=Decimal('0'))
+    recipe_graph.get_recipe_graph()
+    # Committed by a concurrent edit after this worker memoized the graph.
+    models.RecipeIngredient.objects.bulk_create([models.RecipeIngredient(recipe=syrup, sub_recipe=caramel, amount=Decimal('1'))])
+
+    recipe_graph.check_no_cycle(caramel.pk, [latte.pk])
+    with transaction.atomic(), pytest.raises(recipe_graph.RecipeCycleError):
+        recipe_graph.lock_and_check_no_cycle(caramel.pk, [latte.pk])
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core import replicas
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import ReplicaPin
+from miyanGroup.models import Branch
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def replica(monkeypatch, settings):
+    monkeypatch.setattr(replicas, 'replica_configured', lambda: True)
+    settings.REPLICA_LAG_CHECK_SECONDS = 60
+    monkeypatch.setattr(replicas, '_health', {'checked_at': float('-inf'), 'available': False})
+    monkeypatch.setattr(replicas, 'replica_lag', lambda: 0.0)
+    cache.clear()
+
+
+def _request(user=None, **cookies):
+    request = RequestFactory().get('/')
+    request.COOKIES.update(cookies)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def _read_alias(request):
+    state = replicas.RequestState()
+    token = replicas.bind(state)
+    try:
+        replicas.use_replica_for_reads(request)
+        return replicas.ReplicaRouter().db_for_read(Branch)
+    finally:
+        replicas.unbind(token)
+
+
+def test_reads_use_the_replica_unless_the_client_is_pinned(settings, admin_user):
+    assert _read_alias(_request()) == 'replica'
+    assert _read_alias(_request(**{settings.REPLICA_PIN_COOKIE: '1'})) == 'default'
+
+    replicas.pin(_request(user=admin_user), HttpResponse())
+    assert _read_alias(_request(user=admin_user)) == 'default'
+
+
+def test_user_pins_are_shared_by_every_worker_and_expire(settings, admin_user):
+    replicas.pin(_request(user=admin_user), HttpResponse())
+    # Another worker has its own local cache; the pin is read from the primary.
+    cache.clear()
+    assert replicas.is_pinned(_request(user=admin_user))
+
+    ReplicaPin.objects.filter(user=admin_user).update(pinned_until=timezone.now() - timedelta(seconds=1))
+    assert not replicas.is_pinned(_request(user=admin_user))
+    replicas.pin(_request(user=admin_user), HttpResponse())
+    assert ReplicaPin.objects.count() == 1 and replicas.is_pinned(_request(user=admin_user))
+
+
+def test_lagging_replica_falls_back_to_the_primary(monkeypatch, settings):
+    settings.REPLICA_MAX_LAG_SECONDS = 10
+    monkeypatch.setattr(replicas, 'replica_lag', lambda: 30.0)
+    assert _read_alias(_request()) == 'default'
+
+    # The verdict is cached between checks.
+    monkeypatch.setattr(replicas, 'replica_lag', lambda: 0.0)
+    assert _read_alias(_request()) == 'default'
+    settings.REPLICA_LAG_CHECK_SECONDS = 0
+    assert _read_alias(_request()) == 'replica'
+
+
+def test_without_request_state_everything_uses_default():
+    router = replicas.ReplicaRouter()
+    assert replicas.use_replica_for_reads(_request()) is False
+    assert router.db_for_read(Branch) is None
+    assert router.db_for_write(Branch) == 'default'
+    assert router.allow_migrate('replica', 'miyanGroup') is False
+
+
+def test_middleware_pins_clients_that_wrote(settings, admin_user):
+    settings.DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+    def write(request):
+        Branch.objects.create(name='Pinned', code='replica-pinned')
+        return HttpResponse()
+
+    read = ReplicaRoutingMiddleware(lambda request: HttpResponse())(_request())
+    assert settings.REPLICA_PIN_COOKIE not in read.cookies
+
+    response = ReplicaRoutingMiddleware(write)(_request(user=admin_user))
+    assert response.cookies[settings.REPLICA_PIN_COOKIE]['max-age'] == settings.REPLICA_PIN_SECONDS
+    assert replicas.is_pinned(_request(user=admin_user))
+
+
+def test_async_middleware_writes_the_pin_off_the_event_loop(settings, admin_user):
+    async def wrote(request):
+        # What ReplicaRouter.db_for_write records for a write.
+        replicas._state.get().wrote = True
+        return HttpResponse()
+
+    response = async_to_sync(ReplicaRoutingMiddleware(wrote))(_request(user=admin_user))
+
+    assert settings.REPLICA_PIN_COOKIE in response.cookies
+    assert replicas.is_pinned(_request(user=admin_user))
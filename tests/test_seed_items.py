@@ -0,0 +1,62 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.seed_items import INVENTORY_DEFAULTS, MENUS_TO_SEED
+from miyanBeresht.models import BereshtMenu, BereshtMenuItem
+from miyanGroup.models import InventoryItem
+from miyanMadi.models import MadiMenuSection
+
+pytestmark = pytest.mark.django_db
+
+
+def _seed(**options):
+    out = StringIO()
+    call_command('seed_items', stdout=out, **options)
+    return out.getvalue()
+
+
+def test_seed_items_creates_curated_menus_and_inventory():
+    _seed(with_inventory=True)
+
+    assert BereshtMenu.objects.count() == len(MENUS_TO_SEED)
+    expected_items = sum(len(section['items']) for menu in MENUS_TO_SEED for section in menu['sections'])
+    assert BereshtMenuItem.objects.count() == expected_items
+    latte = BereshtMenuItem.objects.get(name_fa='لاته')
+    assert latte.price_en == '195'
+    assert InventoryItem.objects.filter(branch__code='madi').count() == len(INVENTORY_DEFAULTS)
+
+
+def test_seed_items_skips_when_fingerprint_matches():
+    _seed(with_inventory=True)
+
+    with CaptureQueriesContext(connection) as queries:
+        output = _seed(with_inventory=True)
+
+    assert 'nothing to do' in output
+    assert not any(
+        query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for query in queries
+    )
+
+
+def test_seed_items_repairs_drift_and_prunes_strays():
+    _seed()
+    latte = BereshtMenuItem.objects.get(name_fa='لاته')
+    latte.price_fa = '1'
+    latte.save()
+    stray = BereshtMenuItem.objects.create(section=latte.section, name_fa='موقت', name_en='Stray')
+    stray_section = MadiMenuSection.objects.create(
+        menu=MadiMenuSection.objects.first().menu, title_fa='اضافه', title_en='Extra'
+    )
+
+    output = _seed()
+
+    assert 'nothing to do' not in output
+    latte.refresh_from_db()
+    assert latte.price_fa == '195'
+    assert not BereshtMenuItem.objects.filter(id=stray.id).exists()
+    assert not MadiMenuSection.objects.filter(id=stray_section.id).exists()
+    assert 'nothing to do' in _seed()
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inventory.rollups import report_zone
+from miyanGroup.models import Branch, Staff, StaffShift
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def branches():
+    return (
+        Branch.objects.create(name='Roster Madi', code='roster-madi'),
+        Branch.objects.create(name='Roster Beresht', code='roster-beresht'),
+    )
+
+
+def _staff(username):
+    return Staff.objects.create(user=get_user_model().objects.create_user(username=username, password='pw'))
+
+
+def _shift(staff, branch, started_at, ended_at=None):
+    shift = StaffShift.objects.create(staff=staff, branch=branch)
+    StaffShift.objects.filter(pk=shift.pk).update(started_at=started_at, ended_at=ended_at)
+    return shift
+
+
+def test_roster_lists_open_shifts_in_one_query(admin_client, branches, django_assert_max_num_queries):
+    madi, beresht = branches
+    now = timezone.now()
+    for index in range(3):
+        _shift(_staff(f'on-{index}'), madi, now - timedelta(hours=index + 1))
+    _shift(_staff('off'), madi, now - timedelta(hours=5), now - timedelta(hours=1))
+    _shift(_staff('elsewhere'), beresht, now - timedelta(hours=1))
+
+    # Auth, count and page: the page does not grow with the number of staff.
+    with django_assert_max_num_queries(3):
+        response = admin_client.get(reverse('shift-roster'), {'branch': madi.id})
+
+    assert response.status_code == 200
+    assert [row['username'] for row in response.data['results']] == ['on-2', 'on-1', 'on-0']
+    assert response.data['results'][0]['branch']['code'] == 'roster-madi'
+
+
+def test_timesheet_sums_durations_clipped_to_the_period(admin_client, branches):
+    madi, beresht = branches
+    zone = report_zone()
+    sara = _staff('sara')
+    # 22:00 on the 31st to 02:00 on the 1st: only 2 hours fall in the period.
+    _shift(sara, madi, datetime(2026, 5, 31, 22, tzinfo=zone), datetime(2026, 6, 1, 2, tzinfo=zone))
+    _shift(sara, madi, datetime(2026, 6, 2, 9, tzinfo=zone), datetime(2026, 6, 2, 17, 30, tzinfo=zone))
+    _shift(sara, beresht, datetime(2026, 6, 3, 9, tzinfo=zone), datetime(2026, 6, 3, 12, tzinfo=zone))
+    _shift(_staff('reza'), madi, datetime(2026, 7, 1, 9, tzinfo=zone), datetime(2026, 7, 1, 17, tzinfo=zone))
+
+    response = admin_client.get(reverse('shift-timesheet'), {'from': '2026-06-01', 'to': '2026-06-30'})
+
+    assert response.status_code == 200
+    rows = {(row['username'], row['branch_code']): row for row in response.data['results']}
+    assert set(rows) == {('sara', 'roster-madi'), ('sara', 'roster-beresht')}
+    assert rows['sara', 'roster-madi']['shifts'] == 2
+    assert rows['sara', 'roster-madi']['hours'] == '10.50'
+    assert rows['sara', 'roster-beresht']['seconds'] == 3 * 3600
+
+
+def test_shift_reports_are_admin_only(branches):
+    client = APIClient()
+    client.force_authenticate(_staff('plain').user)
+    assert client.get(reverse('shift-roster')).status_code == 403
+    assert client.get(reverse('shift-timesheet')).status_code == 403
+
+
+def test_malformed_report_filters_are_rejected(admin_client):
+    for name, params in [
+        ('shift-roster', {'branch': 'abc'}),
+        ('shift-timesheet', {'staff': 'abc'}),
+        ('shift-timesheet', {'branch': '1.5'}),
+        ('shift-timesheet', {'from': '2026-02-30'}),
+        ('shift-timesheet', {'to': 'june'}),
+    ]:
+        response = admin_client.get(reverse(name), params)
+        assert response.status_code == 400, params
+        assert set(response.data) == set(params)
@@ -0,0 +1,81 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from miyanGroup import onboarding
+from miyanGroup.models import Branch, Staff, StaffBranchAssignment
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def test_bulk_registration_creates_users_staff_and_assignments(admin_client, branch, settings):
+    settings.STAFF_HASH_WORKERS = 2
+    settings.STAFF_HASH_POOL_MIN_ROWS = 2
+    csv_text = 'username,password,first_name,language_preference\nsara,pw-one,Sara,fa\nreza,pw-two,,en\n'
+    response = admin_client.post(
+        reverse('staff-register-bulk'),
+        {'file': SimpleUploadedFile('staff.csv', csv_text.encode()), 'branch_id': branch.id},
+        format='multipart',
+    )
+
+    assert response.status_code == 201, response.data
+    assert response.data['created'] == 2
+    sara, reza = User.objects.get(username='sara'), User.objects.get(username='reza')
+    # Hashed in the pool, still checkable in this process.
+    assert sara.check_password('pw-one') and reza.check_password('pw-two')
+    assert sara.first_name == 'Sara'
+    assert Staff.objects.get(user=reza).language_preference == 'en'
+    assert StaffBranchAssignment.objects.filter(branch=branch, is_primary=True).count() == 2
+
+
+def test_bulk_registration_reports_errors_per_row_and_creates_nothing(admin_client, branch, admin_user):
+    rows = [
+        {'username': 'nima', 'password': 'pw'},
+        {'username': admin_user.username, 'password': 'pw'},
+        {'username': 'nima', 'password': 'pw'},
+        {'username': 'leila'},
+        {'username': 'omid', 'password': 'pw', 'branch_id': 999999},
+    ]
+    response = admin_client.post(reverse('staff-register-bulk'), {'rows': rows}, format='json')
+
+    assert response.status_code == 400
+    errors = response.data['rows']
+    assert set(errors) == {'2', '3', '4', '5'}
+    assert errors['2']['username'] == ['Username already exists.']
+    assert errors['3']['username'] == ['Duplicate of row 1.']
+    assert 'password' in errors['4']
+    assert errors['5']['branch_id'] == ['Branch not found or inactive.']
+    assert not Staff.objects.exists()
+
+
+def test_register_staff_command(tmp_path, branch):
+    path = tmp_path / 'staff.json'
+    path.write_text('[{"username": "ali", "password": "pw"}]')
+
+    call_command('register_staff', str(path), '--branch-id', str(branch.id))
+
+    assert StaffBranchAssignment.objects.get().staff.user.username == 'ali'
+    with pytest.raises(CommandError, match='row 1: username'):
+        call_command('register_staff', str(path))
+
+
+def test_password_pool_spawns_its_workers(settings, monkeypatch):
+    settings.STAFF_HASH_WORKERS = 2
+    settings.STAFF_HASH_POOL_MIN_ROWS = 2
+    contexts = []
+    pool_class = onboarding.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs['mp_context'].get_start_method())
+        return pool_class(*args, **kwargs)
+
+    monkeypatch.setattr(onboarding, 'ProcessPoolExecutor', recording_pool)
+    hashes = onboarding.hash_passwords(['pw-one', 'pw-two'])
+
+    assert contexts == ['spawn']
+    assert check_password('pw-one', hashes[0]) and check_password('pw-two', hashes[1])
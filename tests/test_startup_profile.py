@@ -0,0 +1,71 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.signals import request_started
+
+from core import observability
+from core.management.commands.startup_profile import package_totals, parse_importtime
+
+IMPORTTIME_SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   rest_framework.settings
+import time:       300 |        420 | rest_framework.views
+import time:        50 |         50 | json
+"""
+
+
+def test_parse_importtime_keeps_nesting_and_package_self_time():
+    records = parse_importtime(IMPORTTIME_SAMPLE)
+
+    assert [(r.module, r.cumulative_us, r.depth) for r in records] == [
+        ('rest_framework.settings', 120, 1),
+        ('rest_framework.views', 420, 0),
+        ('json', 50, 0),
+    ]
+    assert package_totals(records) == {'rest_framework': 420, 'json': 50}
+
+
+def test_startup_profile_reports_ready_and_keeps_drf_out_of_setup():
+    out = StringIO()
+    call_command('startup_profile', '--json', '--top', '500', stdout=out)
+    report = json.loads(out.getvalue())
+
+    assert 'setup' in report['phases']
+    assert 'core' in {label for label, _ in report['ready']}
+    modules = {module for module, _, _ in report['modules']}
+    assert 'rest_framework.views' not in modules
+    assert 'sentry_sdk' not in dict(report['packages'])
+
+
+@pytest.mark.django_db
+def test_sentry_is_initialised_on_first_request(settings, monkeypatch):
+    calls = []
+    monkeypatch.setattr(observability, 'init_sentry', lambda: calls.append(1))
+    settings.SENTRY_DSN = 'https://key@example.invalid/1'
+    settings.SENTRY_EAGER_INIT = False
+
+    observability.install()
+    assert calls == []
+
+    request_started.send(sender=None)
+    request_started.send(sender=None)
+    assert calls == [1]
+
+
+@pytest.mark.django_db
+def test_sentry_starts_immediately_for_management_commands(settings, monkeypatch):
+    calls = []
+    monkeypatch.setattr(observability, 'init_sentry', lambda: calls.append(1))
+    settings.SENTRY_DSN = 'https://key@example.invalid/1'
+    settings.SENTRY_EAGER_INIT = False
+
+    monkeypatch.setattr(observability.sys, 'argv', ['manage.py', 'runserver'])
+    observability.install()
+    assert calls == []
+    request_started.disconnect(dispatch_uid='core-sentry-lazy-init')
+
+    monkeypatch.setattr(observability.sys, 'argv', ['/app/manage.py', 'import_price_list', 'prices.csv'])
+    observability.install()
+    assert calls == [1]
+    assert observability.running_management_command(['/venv/lib/django/__main__.py', 'bootstrap'])
@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from inventory import models, pricelist, recipe_graph
+from miyanGroup.models import Branch, InventoryItem, Staff, StaffBranchAssignment
+from sync.models import ChangeLogEntry
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures('settled')]
+
+
+@pytest.fixture(autouse=True)
+def fresh_recipe_graph(monkeypatch):
+    monkeypatch.setattr(recipe_graph, '_cached', None)
+
+
+@pytest.fixture
+def settled():
+    with override_settings(SYNC_SETTLE_SECONDS=0):
+        yield
+
+
+@pytest.fixture
+def head(admin_client):
+    """Cursor after everything logged so far (e.g. by data migrations)."""
+    return _sync(admin_client)['cursor']
+
+
+def _sync(client, cursor=None, **params):
+    response = client.get(reverse('sync-changes'), {**params, **({'cursor': cursor} if cursor else {})})
+    assert response.status_code == 200, response.data
+    while response.data['has_more']:
+        more = client.get(reverse('sync-changes'), {**params, 'cursor': response.data['cursor']})
+        more.data['changes'] = response.data['changes'] + more.data['changes']
+        response = more
+    return response.data
+
+
+def _by_model(changes, model):
+    return {change['id']: change for change in changes if change['model'] == model}
+
+
+def test_changes_collapse_per_row_and_tombstone_deletes(admin_client, head):
+    milk = models.BasicItem.objects.create(name='Milk', unit='litre', unit_price=Decimal('4'))
+    milk.unit_price = Decimal('5')
+    milk.save()
+    sugar = models.BasicItem.objects.create(name='Sugar', unit='kg', unit_price=Decimal('2'))
+    sugar_id = sugar.pk
+    sugar.delete()
+
+    data = _sync(admin_client, head)
+
+    items = _by_model(data['changes'], 'inventory.basicitem')
+    assert items[milk.pk]['action'] == 'create'
+    assert items[milk.pk]['data'] == {'id': milk.pk, 'name': 'Milk', 'unit': 'litre', 'unit_price': '5.00', 'version': 2}
+    assert items[sugar_id] == {'model': 'inventory.basicitem', 'id': sugar_id, 'action': 'delete', 'data': None}
+    assert _sync(admin_client, data['cursor'])['changes'] == []
+
+
+def test_bulk_writes_are_logged(admin_client, head):
+    branch = Branch.objects.create(name='Sync Branch', code='sync-test')
+    milk = models.BasicItem.objects.create(name='شیر', unit='1 لیتری', unit_price=Decimal('4'))
+    latte = models.Recipe.objects.create(name='Latte', price=Decimal('10'))
+    models.RecipeIngredient.objects.create(recipe=latte, basic_item=milk, amount=Decimal('0.5'))
+    cursor = _sync(admin_client, head)['cursor']
+
+    response = admin_client.post(
+        reverse('inventory-adjustment-list'),
+        {'branch_id': branch.id, 'item_type': 'basic', 'basic_item': milk.id, 'mode': 'delta', 'quantity': '7'},
+        format='json',
+    )
+    assert response.status_code == 201, response.data
+    rows = pricelist.parse_price_list('شیر,1 لیتری,6\nقند,1 کیلو,3\n')
+    pricelist.apply_price_list(pricelist.diff_price_list(rows))
+
+    changes = _sync(admin_client, cursor)['changes']
+
+    stock = models.BranchBasicItemStock.objects.get(branch=branch, item=milk)
+    assert _by_model(changes, 'inventory.branchbasicitemstock')[stock.pk]['data']['quantity'] == '7.000'
+    items = _by_model(changes, 'inventory.basicitem')
+    assert items[milk.pk]['data']['unit_price'] == '6.00'
+    assert {change['data']['name'] for change in items.values()} == {'شیر', 'قند'}
+    assert _by_model(changes, 'inventory.recipe')[latte.pk]['data']['cost'] == '3.00'
+
+
+def test_cursor_holds_before_unsettled_entries(admin_client, head):
+    models.BasicItem.objects.create(name='Tea', unit='kg', unit_price=Decimal('1'))
+
+    with override_settings(SYNC_SETTLE_SECONDS=3600):
+        data = _sync(admin_client, head)
+
+    assert [change['data']['name'] for change in data['changes']] == ['Tea']
+    assert data['cursor'] == head
+    assert data['has_more'] is False
+
+
+def test_staff_only_see_stock_of_assigned_branches(django_user_model, head):
+    mine = Branch.objects.create(name='Mine', code='sync-mine')
+    other = Branch.objects.create(name='Other', code='sync-other')
+    user = django_user_model.objects.create_user(username='clerk', password='x')
+    StaffBranchAssignment.objects.create(staff=Staff.objects.create(user=user), branch=mine)
+    InventoryItem.objects.create(branch=mine, name='Cups')
+    InventoryItem.objects.create(branch=other, name='Lids')
+    models.BasicItem.objects.create(name='Tea', unit='kg', unit_price=Decimal('1'))
+    client = APIClient()
+    client.force_authenticate(user)
+
+    changes = _sync(client, head)['changes']
+
+    assert {change['data']['name'] for change in changes} == {'Cups', 'Tea'}
+    assert client.get(reverse('sync-changes'), {'branch': other.pk}).status_code == 403
+
+
+def test_invalid_cursor_is_rejected(admin_client):
+    response = admin_client.get(reverse('sync-changes'), {'cursor': 'not-a-cursor'})
+
+    assert response.status_code == 400
+    assert 'cursor' in response.data
+
+
+def test_full_sync_starts_from_the_first_entry(admin_client):
+    item = models.BasicItem.objects.create(name='Tea', unit='kg', unit_price=Decimal('1'))
+
+    changes = _sync(admin_client)['changes']
+
+    assert ChangeLogEntry.objects.filter(model='inventory.basicitem', object_id=item.pk).exists()
+    assert item.pk in _by_model(changes, 'inventory.basicitem')